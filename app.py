@@ -39,10 +39,19 @@ try:
     from modules.portfolio_analyzer import PortfolioAnalyzer
     from modules.metrics_calculator import MetricsCalculator
     from modules.visualizations import PortfolioVisualizer
+    from modules.monte_carlo import MonteCarloSimulator
+    from modules.portfolio_optimizer import PortfolioOptimizer
+    from modules.backtester import RebalancingBacktester
+    from modules.request_queue import request_context
 except ImportError as e:
     st.error(f"❌ Module import error: {str(e)}")
     st.stop()
 
+# Metrics shown by display_metrics, and the extra rows of the comparison table (only these are calculated)
+DISPLAY_METRICS = ['CAGR', 'Annual Return', 'Annual Volatility', 'Sharpe Ratio',
+                   'Sortino Ratio', 'Max Drawdown', 'Calmar Ratio', 'Information Ratio']
+COMPARISON_METRICS = ['Total Return', 'Value at Risk', 'Skewness']
+
 # ============================================================================
 # PAGE CONFIGURATION
 # ============================================================================
@@ -199,6 +208,30 @@ def render_professional_footer():
     </div>
     """, unsafe_allow_html=True)
 
+# ============================================================================
+# SHARED DATA
+# ============================================================================
+
+@st.cache_resource
+def get_data_fetcher():
+    """Single data fetcher shared by every page, so the universe matrix is downloaded once"""
+    return NiftyDataFetcher()
+
+@st.cache_resource
+def start_cache_warmer():
+    """Start the after-close cache warmer once per server process (enabled with PRICE_CACHE_WARMER=1)"""
+    from modules.cache_warmer import start_background_warmer
+    return start_background_warmer(get_data_fetcher())
+
+def get_session_id():
+    """Streamlit session id, so each browser session gets a fair share of the Yahoo request budget"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else 'default'
+    except Exception:
+        return 'default'
+
 # ============================================================================
 # SIDEBAR SETUP
 # ============================================================================
@@ -265,9 +298,15 @@ def setup_sidebar():
     # Settings Section
     st.sidebar.markdown("<h4 style='color: white; background: #003366; padding: 10px; margin: 10px -16px 10px -16px; font-size: 13px; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px;'>Settings:</h4>", unsafe_allow_html=True)
     
+    interval = st.sidebar.selectbox(
+        "Bar Interval",
+        NiftyDataFetcher.INTERVALS,
+        help="Intraday bars are limited to Yahoo's recent history (about 30 days for 1m, 60 days for 5m/15m)"
+    )
+    
     period = st.sidebar.selectbox(
         "Data Period",
-        ["1y", "3y", "5y", "10y"],
+        NiftyDataFetcher.PERIODS if interval == '1d' else NiftyDataFetcher.INTRADAY_PERIODS,
         label_visibility="collapsed"
     )
     
@@ -294,7 +333,11 @@ def setup_sidebar():
     st.sidebar.markdown("---")
     st.sidebar.caption("© 2024 Prof. V. Ravichandran")
     
-    return mode, period, risk_free_rate / 100
+    if os.environ.get('PRICE_SHOW_STATS', '').lower() in ('1', 'true', 'yes'):
+        with st.sidebar.expander("Data service status"):
+            st.json(get_data_fetcher().get_service_stats())
+    
+    return mode, period, interval, risk_free_rate / 100
 
 # ============================================================================
 # LANDING PAGE
@@ -456,7 +499,7 @@ def show_landing_page():
 # PORTFOLIO ANALYSIS
 # ============================================================================
 
-def show_portfolio_analysis(period, risk_free_rate):
+def show_portfolio_analysis(period, risk_free_rate, interval='1d'):
     """Portfolio analysis page"""
     
     st.markdown("""
@@ -466,7 +509,7 @@ def show_portfolio_analysis(period, risk_free_rate):
     """, unsafe_allow_html=True)
     
     try:
-        fetcher = NiftyDataFetcher()
+        fetcher = get_data_fetcher()
         nifty_stocks = fetcher.get_nifty_50_stocks()
         
         # Initialize tracking for portfolio A
@@ -505,6 +548,9 @@ def show_portfolio_analysis(period, risk_free_rate):
                     
                     st.session_state.last_stocks_a_count = num_stocks_a
                 
+                # Weights picked by the optimiser on the previous run
+                apply_pending_weights("a", stocks_a)
+                
                 # Display info
                 st.info(f"📊 {num_stocks_a} stocks selected → Equal weight: {equal_weight_a:.2f}% each")
                 
@@ -524,6 +570,8 @@ def show_portfolio_analysis(period, risk_free_rate):
                             key=weight_key,
                             format="%.2f"
                         )
+                
+                show_weight_optimizer(fetcher, stocks_a, "a", period, risk_free_rate, interval)
         
         with col2:
             st.markdown("<h3 class='section-header'>Portfolio B</h3>", unsafe_allow_html=True)
@@ -553,6 +601,9 @@ def show_portfolio_analysis(period, risk_free_rate):
                     
                     st.session_state.last_stocks_b_count = num_stocks_b
                 
+                # Weights picked by the optimiser on the previous run
+                apply_pending_weights("b", stocks_b)
+                
                 # Display info
                 st.info(f"📊 {num_stocks_b} stocks selected → Equal weight: {equal_weight_b:.2f}% each")
                 
@@ -572,6 +623,8 @@ def show_portfolio_analysis(period, risk_free_rate):
                             key=weight_key,
                             format="%.2f"
                         )
+                
+                show_weight_optimizer(fetcher, stocks_b, "b", period, risk_free_rate, interval)
         
         st.markdown("---")
         
@@ -605,6 +658,11 @@ def show_portfolio_analysis(period, risk_free_rate):
         
         st.markdown("---")
         
+        # Rebalancing rule applied to both portfolios
+        rebalancing = setup_rebalancing()
+        
+        st.markdown("---")
+        
         st.caption("💡 **Tip:** If there are any data issues, Reclick 'Analyze Portfolios' to retry. This usually resolves Yahoo Finance temporary disruptions immediately!")
         
         if st.button("🔍 Analyze Portfolios", use_container_width=True, key="analyze_portfolios"):
@@ -623,13 +681,16 @@ def show_portfolio_analysis(period, risk_free_rate):
                     if stocks_a and weights_a:
                         st.markdown("<h2 class='section-header'>Portfolio A</h2>", unsafe_allow_html=True)
                         try:
-                            data_a = fetcher.fetch_stock_data(stocks_a, period)
+                            result_a, stocks_a, weights_a = fetch_portfolio_data(fetcher, stocks_a, weights_a, period, interval)
+                            data_a = result_a.data
                             
                             if data_a.empty:
                                 st.error(f"❌ No data available for {', '.join(stocks_a)}")
                             else:
-                                analyzer_a = PortfolioAnalyzer(stocks_a, weights_a, data_a)
-                                metrics_a = MetricsCalculator(data_a, analyzer_a, risk_free_rate).calculate_all_metrics()
+                                analyzer_a = RebalancingBacktester(stocks_a, weights_a, data_a, result_a.benchmark, result_a.interval, result_a.returns, **rebalancing)
+                                show_rebalance_summary(analyzer_a)
+                                calculator_a = MetricsCalculator(data_a, analyzer_a, risk_free_rate)
+                                metrics_a = calculator_a.calculate_metrics(DISPLAY_METRICS + COMPARISON_METRICS)
                                 
                                 display_metrics(metrics_a)
                                 
@@ -647,6 +708,10 @@ def show_portfolio_analysis(period, risk_free_rate):
                                     except Exception as e:
                                         st.warning(f"⚠️ Chart error: {str(e)}")
                                 
+                                show_worst_drawdowns(calculator_a)
+                                show_efficient_frontier(visualizer, analyzer_a, risk_free_rate, chart_id="portfolio_a")
+                                show_monte_carlo(visualizer, analyzer_a, chart_id="portfolio_a")
+                                
                                 st.success("✅ Portfolio A analysis complete!")
                         except Exception as e:
                             st.error(f"❌ Error: {str(e)}")
@@ -654,13 +719,16 @@ def show_portfolio_analysis(period, risk_free_rate):
                     if stocks_b and weights_b:
                         st.markdown("<h2 class='section-header'>Portfolio B</h2>", unsafe_allow_html=True)
                         try:
-                            data_b = fetcher.fetch_stock_data(stocks_b, period)
+                            result_b, stocks_b, weights_b = fetch_portfolio_data(fetcher, stocks_b, weights_b, period, interval)
+                            data_b = result_b.data
                             
                             if data_b.empty:
                                 st.error(f"❌ No data available for {', '.join(stocks_b)}")
                             else:
-                                analyzer_b = PortfolioAnalyzer(stocks_b, weights_b, data_b)
-                                metrics_b = MetricsCalculator(data_b, analyzer_b, risk_free_rate).calculate_all_metrics()
+                                analyzer_b = RebalancingBacktester(stocks_b, weights_b, data_b, result_b.benchmark, result_b.interval, result_b.returns, **rebalancing)
+                                show_rebalance_summary(analyzer_b)
+                                calculator_b = MetricsCalculator(data_b, analyzer_b, risk_free_rate)
+                                metrics_b = calculator_b.calculate_metrics(DISPLAY_METRICS + COMPARISON_METRICS)
                                 
                                 display_metrics(metrics_b)
                                 
@@ -678,6 +746,10 @@ def show_portfolio_analysis(period, risk_free_rate):
                                     except Exception as e:
                                         st.warning(f"⚠️ Chart error: {str(e)}")
                                 
+                                show_worst_drawdowns(calculator_b)
+                                show_efficient_frontier(visualizer, analyzer_b, risk_free_rate, chart_id="portfolio_b")
+                                show_monte_carlo(visualizer, analyzer_b, chart_id="portfolio_b")
+                                
                                 st.success("✅ Portfolio B analysis complete!")
                         except Exception as e:
                             st.error(f"❌ Error: {str(e)}")
@@ -873,6 +945,186 @@ def show_portfolio_analysis(period, risk_free_rate):
     except Exception as e:
         st.error(f"Error: {str(e)}")
 
+def fetch_portfolio_data(fetcher, stocks, weights, period, interval='1d'):
+    """Fetch portfolio prices, keeping the stocks that loaded and warning about the rest"""
+    result = fetcher.fetch_stock_data_detailed(stocks, period, interval=interval)
+    
+    if result.failed:
+        st.warning(f"⚠️ Could not load {', '.join(result.failed)} - analyzing the remaining stocks. "
+                   f"Reclick 'Analyze Portfolios' to retry only these.")
+    
+    show_stale_warning(result)
+    
+    limiting = result.limiting_stocks()
+    if limiting and not result.data.empty:
+        st.info(f"ℹ️ Analysis starts {result.data.index[0]:%d %b %Y} because of shorter history for {', '.join(limiting)}")
+    
+    stocks = result.succeeded
+    weights = {stock: weights[stock] for stock in stocks}
+    return result, stocks, weights
+
+def show_stale_warning(result):
+    """Flag prices served from the cache while the data provider is unavailable"""
+    if result.stale and result.as_of is not None:
+        st.warning(f"⚠️ Live prices are temporarily unavailable - showing cached prices as of "
+                   f"{result.as_of:%d %b %Y} for {', '.join(result.stale)}")
+
+def setup_rebalancing():
+    """Rebalancing rule and trading cost controls"""
+    rules = {
+        "Daily (constant mix)": 'daily',
+        "Monthly": 'monthly',
+        "Quarterly": 'quarterly',
+        "Annually": 'annual',
+        "Threshold band": 'threshold',
+        "Never (buy & hold)": 'none',
+    }
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rule = st.selectbox("🔁 Rebalancing", options=list(rules), key="rebalance_rule",
+                            help="When weights are reset to target; between rebalances they drift with prices")
+    with col2:
+        threshold = st.number_input("Band (% points)", min_value=0.5, max_value=50.0, value=5.0, step=0.5,
+                                    key="rebalance_band", disabled=rules[rule] != 'threshold',
+                                    help="Rebalance when any weight is this far from its target")
+    with col3:
+        cost_bps = st.number_input("Trading cost (bps)", min_value=0.0, max_value=200.0, value=0.0, step=1.0,
+                                   key="rebalance_cost", help="Cost per unit traded, in basis points")
+    
+    return {'rebalance': rules[rule], 'threshold': threshold / 100, 'cost': cost_bps / 10000}
+
+def show_rebalance_summary(analyzer):
+    """One line on how often the portfolio traded and what it cost"""
+    summary = analyzer.get_rebalance_summary()
+    if summary['Rebalancing'] == 'daily' and analyzer.cost == 0:
+        return
+    st.caption(f"🔁 {summary['Rebalances']} rebalances · turnover {summary['Annual Turnover']*100:.1f}% a year · "
+               f"cost drag {summary['Annual Cost Drag']*100:.2f}% a year")
+
+def apply_pending_weights(portfolio_key, stocks):
+    """Copy optimised weights into the weight inputs (must run before the inputs are drawn)"""
+    pending = st.session_state.pop(f"pending_weights_{portfolio_key}", None)
+    if pending and set(pending) == set(stocks):
+        for stock, weight in pending.items():
+            st.session_state[f"weight_{portfolio_key}_{stock}"] = weight
+
+def show_weight_optimizer(fetcher, stocks, portfolio_key, period, risk_free_rate, interval='1d'):
+    """Fill in the weights with a minimum-variance, maximum-Sharpe or target-return portfolio"""
+    if len(stocks) < 2:
+        return
+    
+    with st.expander("⚖️ Optimise weights"):
+        objective = st.selectbox(
+            "Objective",
+            options=["Maximum Sharpe Ratio", "Minimum Volatility", "Target Return"],
+            key=f"optimizer_objective_{portfolio_key}"
+        )
+        max_weight = st.slider(
+            "Maximum weight per stock (%)",
+            min_value=int(np.ceil(100 / len(stocks))),
+            max_value=100,
+            value=100,
+            key=f"optimizer_cap_{portfolio_key}"
+        )
+        target = None
+        if objective == "Target Return":
+            target = st.number_input("Target annual return (%)", value=15.0, step=0.5,
+                                     key=f"optimizer_target_{portfolio_key}")
+        
+        if st.button("Apply optimal weights", key=f"optimizer_apply_{portfolio_key}"):
+            try:
+                result = fetcher.fetch_stock_data_detailed(stocks, period, interval=interval)
+                loaded = result.succeeded
+                if not loaded:
+                    st.error("❌ No price data to optimise on")
+                    return
+                analyzer = PortfolioAnalyzer(loaded, {stock: 1 for stock in loaded}, result.data,
+                                             interval=result.interval, returns=result.returns)
+                optimizer = PortfolioOptimizer.from_analyzer(analyzer, risk_free_rate, max_weight=max_weight / 100)
+                
+                if objective == "Maximum Sharpe Ratio":
+                    optimal = optimizer.max_sharpe()
+                elif objective == "Minimum Volatility":
+                    optimal = optimizer.min_variance()
+                else:
+                    optimal = optimizer.target_return(target / 100)
+                
+                # Two decimals like the inputs, with the rounding remainder on the largest weight
+                weights = {stock: round(optimal['Weights'].get(stock, 0.0), 2) for stock in stocks}
+                largest = max(weights, key=weights.get)
+                weights[largest] = round(weights[largest] + 100 - sum(weights.values()), 2)
+                
+                st.session_state[f"pending_weights_{portfolio_key}"] = weights
+                st.rerun()
+            except Exception as e:
+                st.error(f"❌ Optimisation error: {str(e)}")
+
+def show_efficient_frontier(visualizer, analyzer, risk_free_rate, chart_id):
+    """Efficient frontier of the portfolio's stocks, with the chosen mix marked"""
+    if len(analyzer.stocks) < 2:
+        return
+    
+    with st.expander("📐 Efficient frontier"):
+        try:
+            optimizer = PortfolioOptimizer.from_analyzer(analyzer, risk_free_rate)
+            frontier = optimizer.efficient_frontier(n_points=50)
+            st.plotly_chart(visualizer.plot_efficient_frontier(frontier, chart_id=f"{chart_id}_frontier"), use_container_width=True, key=f"{chart_id}_frontier")
+        except Exception as e:
+            st.warning(f"⚠️ Frontier error: {str(e)}")
+
+def show_worst_drawdowns(calculator, n=5):
+    """Table of the deepest drawdowns, with how long each lasted and took to recover"""
+    with st.expander("📉 Worst drawdowns"):
+        try:
+            worst = calculator.get_worst_drawdowns(n)
+            if worst.empty:
+                st.info("No drawdowns in this period")
+                return
+            
+            metrics = calculator.calculate_metrics(['Drawdown Duration', 'Max Drawdown Duration', 'Recovery Time'])
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Average Duration", f"{metrics['Drawdown Duration']:.1f} bars")
+            with col2:
+                st.metric("Longest Duration", f"{metrics['Max Drawdown Duration']:.0f} bars")
+            with col3:
+                st.metric("Average Recovery", f"{metrics['Recovery Time']:.1f} bars")
+            
+            table = pd.DataFrame({
+                'Start': worst['Start'].astype(str),
+                'Trough': worst['Trough'].astype(str),
+                'Recovery': worst['Recovery'].astype(str).where(worst['Recovery'].notna(), 'Not yet'),
+                'Depth': (worst['Depth'] * 100).map(lambda value: f"{value:.2f}%"),
+                'Length (bars)': worst['Length'],
+            })
+            st.dataframe(table, use_container_width=True)
+        except Exception as e:
+            st.warning(f"⚠️ Drawdown table error: {str(e)}")
+
+def show_monte_carlo(visualizer, analyzer, chart_id):
+    """One-year Monte Carlo projection of a portfolio (bootstrap of its historical bars)"""
+    with st.expander("🔮 Monte Carlo projection (next 12 months)"):
+        try:
+            simulation = MonteCarloSimulator(analyzer, method='bootstrap', block_size=5, seed=42).simulate(n_paths=10000)
+            summary = simulation.summary()
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Median Value", f"₹{summary['Median Value']:,.0f}")
+            with col2:
+                st.metric("Probability of Loss", f"{summary['Probability of Loss']*100:.1f}%")
+            with col3:
+                st.metric("VaR (95%)", f"{summary['Value at Risk']*100:.2f}%")
+            with col4:
+                st.metric("Median Max Drawdown", f"{summary['Median Max Drawdown']*100:.2f}%")
+            
+            st.plotly_chart(visualizer.plot_monte_carlo_fan(simulation, chart_id=f"{chart_id}_mc_fan"), use_container_width=True, key=f"{chart_id}_mc_fan")
+            st.plotly_chart(visualizer.plot_monte_carlo_distribution(simulation, chart_id=f"{chart_id}_mc_dist"), use_container_width=True, key=f"{chart_id}_mc_dist")
+            st.caption("Simulated from resampled 5-bar blocks of this portfolio's history; not a forecast.")
+        except Exception as e:
+            st.warning(f"⚠️ Simulation error: {str(e)}")
+
 def display_metrics(metrics):
     """Display metrics"""
     
@@ -900,7 +1152,7 @@ def display_metrics(metrics):
 # SINGLE STOCK ANALYSIS
 # ============================================================================
 
-def show_single_stock_analysis(period, risk_free_rate):
+def show_single_stock_analysis(period, risk_free_rate, interval='1d'):
     """Single stock analysis"""
     
     st.markdown("""
@@ -911,16 +1163,21 @@ def show_single_stock_analysis(period, risk_free_rate):
     """, unsafe_allow_html=True)
     
     try:
-        fetcher = NiftyDataFetcher()
+        fetcher = get_data_fetcher()
         nifty_stocks = fetcher.get_nifty_50_stocks()
         
         selected_stock = st.selectbox("Select Stock", options=nifty_stocks)
         
         if st.button("🔍 Analyze", use_container_width=True, key="analyze_single_stock"):
             with st.spinner(f"Analyzing {selected_stock}..."):
-                data = fetcher.fetch_stock_data([selected_stock], period)
-                analyzer = PortfolioAnalyzer([selected_stock], {selected_stock: 100}, data)
-                metrics = MetricsCalculator(data, analyzer, risk_free_rate).calculate_all_metrics()
+                result = fetcher.fetch_stock_data_detailed([selected_stock], period, interval=interval)
+                if result.data.empty:
+                    st.error(f"❌ No data available for {selected_stock}: {result.tickers[selected_stock]['error']}")
+                    st.stop()
+                show_stale_warning(result)
+                data = result.data
+                analyzer = PortfolioAnalyzer([selected_stock], {selected_stock: 100}, data, result.benchmark, result.interval, result.returns)
+                metrics = MetricsCalculator(data, analyzer, risk_free_rate).calculate_metrics(DISPLAY_METRICS)
                 
                 display_metrics(metrics)
                 
@@ -1289,16 +1546,21 @@ def show_metrics_education():
 # ============================================================================
 
 def main():
-    mode, period, risk_free_rate = setup_sidebar()
-    
-    if mode == "Home":
-        show_landing_page()
-    elif mode == "Portfolio Analysis":
-        show_portfolio_analysis(period, risk_free_rate)
-    elif mode == "Single Stock Analysis":
-        show_single_stock_analysis(period, risk_free_rate)
-    elif mode == "Learn Metrics":
-        show_metrics_education()
+    if os.environ.get('PRICE_CACHE_WARMER', '').lower() in ('1', 'true', 'yes'):
+        start_cache_warmer()
+    
+    mode, period, interval, risk_free_rate = setup_sidebar()
+    
+    # Price requests made while rendering count against this session's share
+    with request_context(get_session_id()):
+        if mode == "Home":
+            show_landing_page()
+        elif mode == "Portfolio Analysis":
+            show_portfolio_analysis(period, risk_free_rate, interval)
+        elif mode == "Single Stock Analysis":
+            show_single_stock_analysis(period, risk_free_rate, interval)
+        elif mode == "Learn Metrics":
+            show_metrics_education()
 
 if __name__ == "__main__":
     main()
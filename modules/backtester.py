@@ -0,0 +1,168 @@
+"""
+BACKTESTER MODULE
+Portfolio returns under buy-and-hold, calendar or threshold-band rebalancing with transaction costs
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.portfolio_analyzer import PortfolioAnalyzer
+
+# Rebalancing rules and the calendar period each one rebalances at the end of
+REBALANCE_RULES = {
+    'daily': None,        # Back to target every bar (constant mix, as PortfolioAnalyzer)
+    'monthly': 'M',
+    'quarterly': 'Q',
+    'annual': 'Y',
+    'threshold': None,    # When any weight drifts more than the band from target
+    'none': None,         # Buy and hold
+}
+
+
+class RebalancingBacktester(PortfolioAnalyzer):
+    """
+    PortfolioAnalyzer whose returns follow a rebalancing rule
+
+    Between rebalances every holding drifts with its own cumulative return,
+    computed for all bars at once from the cumulative growth of each stock
+    (growth since the last rebalance = G[t] / G[last rebalance]), so there is
+    no per-bar Python loop. Rebalancing trades happen at the close of the
+    rebalance bar and cost ``cost`` times the traded fraction of the
+    portfolio, which is taken off that bar's return. portfolio_returns and
+    every inherited method keep PortfolioAnalyzer's shapes, so
+    MetricsCalculator and PortfolioVisualizer work unchanged.
+    """
+
+    def __init__(self, stocks, weights, price_data, benchmark_prices=None, interval='1d', returns=None,
+                 rebalance='daily', threshold=0.05, cost=0.0):
+        """
+        Initialize the backtester
+
+        Args:
+            stocks (list): List of stock symbols
+            weights (dict): Dictionary of {stock: weight_percentage} (the rebalancing target)
+            price_data (pd.DataFrame): Historical price data
+            benchmark_prices (pd.Series): Benchmark closes on the same dates as price_data
+            interval (str): Bar interval of price_data
+            returns (pd.DataFrame): Precomputed returns of price_data (optional)
+            rebalance (str): 'daily', 'monthly', 'quarterly', 'annual', 'threshold' or 'none'
+            threshold (float): Band for 'threshold' rebalancing (0.05 = any weight 5 points off target)
+            cost (float): Proportional cost per unit traded (0.001 = 10 bps)
+        """
+        if rebalance not in REBALANCE_RULES:
+            raise Exception(f"Unknown rebalancing rule: {rebalance} "
+                            f"(expected one of {', '.join(REBALANCE_RULES)})")
+
+        super().__init__(stocks, weights, price_data, benchmark_prices, interval, returns)
+
+        self.rebalance = rebalance
+        self.threshold = threshold
+        self.cost = cost
+
+        bar_returns = self.daily_returns.to_numpy(dtype=np.float64)
+        # Growth of each stock since the start; row 0 is the starting point
+        growth = np.vstack([np.ones(len(self.stocks)), np.cumprod(1 + bar_returns, axis=0)])
+
+        if rebalance == 'threshold':
+            resets = self._threshold_resets(growth)
+        else:
+            resets = self._scheduled_resets(len(bar_returns))
+
+        gross, drifted = self._drift(growth, resets)
+        turnover = np.where(resets, np.abs(drifted - self.weight_array).sum(axis=1), 0.0)
+        costs = turnover * cost
+
+        index = self.daily_returns.index
+        self.portfolio_returns = pd.Series((1 + gross) * (1 - costs) - 1, index=index)
+        self.weights_history = pd.DataFrame(drifted, index=index, columns=self.stocks)
+        self.turnover = pd.Series(turnover, index=index)
+        self.transaction_costs = pd.Series(costs, index=index)
+        self.rebalance_dates = index[resets]
+
+    def _scheduled_resets(self, n_bars):
+        """
+        Bars at whose close the portfolio goes back to target (fixed rules)
+
+        The final bar is never a rebalance under any rule: no return follows
+        it, so a trade there would only add turnover and cost.
+        """
+        resets = np.zeros(n_bars, dtype=bool)
+        if self.rebalance == 'none' or n_bars == 0:
+            return resets
+        if self.rebalance == 'daily':
+            resets[:-1] = True
+            return resets
+
+        # Last bar of each calendar period
+        periods = self.daily_returns.index.to_period(REBALANCE_RULES[self.rebalance])
+        resets[:-1] = periods[1:] != periods[:-1]
+        return resets
+
+    def _threshold_resets(self, growth):
+        """
+        Bars where some weight first drifts outside the band
+
+        Each step drifts the whole remaining history from the last rebalance
+        at once and jumps to the first breach, so the loop runs once per
+        rebalance rather than once per bar.
+        """
+        n_bars = len(growth) - 1
+        resets = np.zeros(n_bars, dtype=bool)
+        start = 0  # Row of growth the portfolio was last set to target at
+        while start < n_bars:
+            holdings = self.weight_array * (growth[start + 1:] / growth[start])
+            drifted = holdings / holdings.sum(axis=1, keepdims=True)
+            breached = np.flatnonzero(np.abs(drifted - self.weight_array).max(axis=1) > self.threshold)
+            if len(breached) == 0:
+                break
+            bar = start + breached[0]
+            if bar == n_bars - 1:
+                break
+            resets[bar] = True
+            start = bar + 1
+        return resets
+
+    def _drift(self, growth, resets):
+        """
+        Gross portfolio returns and pre-trade weights given the rebalance bars
+
+        Args:
+            growth (np.ndarray): Cumulative growth per stock, (bars + 1) x stocks
+            resets (np.ndarray): True where the portfolio goes back to target at the close
+
+        Returns:
+            tuple: (gross returns per bar, drifted weights per bar before any trade)
+        """
+        n_bars = len(resets)
+        # Row of growth each bar's holdings were last set to target at
+        anchor_rows = np.concatenate([[0], np.flatnonzero(resets) + 1])
+        anchors = anchor_rows[np.searchsorted(anchor_rows, np.arange(n_bars), side='right') - 1]
+
+        holdings = self.weight_array * (growth[1:] / growth[anchors])
+        value = holdings.sum(axis=1)
+
+        # Value one bar earlier in the same units (1 right after a rebalance)
+        previous = np.ones(n_bars)
+        continuing = np.arange(n_bars) != anchors
+        previous[continuing] = value[np.flatnonzero(continuing) - 1]
+
+        return value / previous - 1, holdings / value[:, None]
+
+    def append(self, prices, benchmark_price=None):
+        """Not supported: a new bar can turn the previous one into a rebalance bar"""
+        raise Exception("Rebalancing backtests cannot be extended bar by bar - rebuild the backtest instead")
+
+    def get_rebalance_summary(self):
+        """
+        Summarise rebalancing activity
+
+        Returns:
+            dict: Rule, number of rebalances, average annual turnover and annual cost drag
+        """
+        years = len(self.portfolio_returns) / self.periods_per_year if len(self.portfolio_returns) else 0
+        return {
+            'Rebalancing': self.rebalance,
+            'Rebalances': int(len(self.rebalance_dates)),
+            'Annual Turnover': float(self.turnover.sum() / years) if years else 0.0,
+            'Annual Cost Drag': float(self.transaction_costs.sum() / years) if years else 0.0,
+        }
@@ -0,0 +1,103 @@
+"""
+BATCH EVALUATOR MODULE
+Scores thousands of candidate weight vectors at once with the same 24 metrics as MetricsCalculator
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.column_metrics import metric_matrix
+from modules.intervals import bars_per_year
+from modules.metric_registry import METRIC_NAMES
+
+
+class BatchPortfolioEvaluator:
+    """
+    Vectorised portfolio scoring
+
+    Portfolio returns for every candidate are one matrix product,
+    ``returns @ weights.T``, and the metrics are column-wise reductions of
+    that (bars x portfolios) matrix (modules.column_metrics). Results match
+    MetricsCalculator for the same returns, weights, benchmark and
+    risk-free rate.
+    """
+
+    def __init__(self, returns, benchmark_returns=None, risk_free_rate=0.065, interval='1d',
+                 chunk_size=1000):
+        """
+        Initialize the batch evaluator
+
+        Args:
+            returns (pd.DataFrame): Bar returns, one column per stock, no NaNs
+                (e.g. FetchResult.returns or PortfolioAnalyzer.daily_returns)
+            benchmark_returns (pd.Series): Benchmark returns on the same index (optional)
+            risk_free_rate (float): Annual risk-free rate
+            interval (str): Bar interval, for annualisation
+            chunk_size (int): Portfolios evaluated per block (bounds memory)
+        """
+        if returns.isna().to_numpy().any():
+            raise Exception("Returns contain missing values - align the price data first")
+
+        self.returns = returns
+        self.stocks = list(returns.columns)
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = bars_per_year(interval)
+        self.bars_per_day = self.periods_per_year / 252
+        self.chunk_size = chunk_size
+
+        self._returns = returns.to_numpy(dtype=np.float64)
+        self._benchmark = None
+        if benchmark_returns is not None:
+            self._benchmark = benchmark_returns.reindex(returns.index).fillna(0).to_numpy(dtype=np.float64)
+
+    @classmethod
+    def from_analyzer(cls, analyzer, risk_free_rate=0.065, **options):
+        """
+        Build an evaluator over the same stocks, returns and benchmark as a PortfolioAnalyzer
+
+        Args:
+            analyzer (PortfolioAnalyzer): Source of returns and benchmark
+            risk_free_rate (float): Annual risk-free rate
+
+        Returns:
+            BatchPortfolioEvaluator: Evaluator
+        """
+        return cls(analyzer.daily_returns, analyzer.benchmark_returns, risk_free_rate,
+                   getattr(analyzer, 'interval', '1d'), **options)
+
+    def _weight_matrix(self, weights):
+        if isinstance(weights, pd.DataFrame):
+            index = weights.index
+            matrix = weights.reindex(columns=self.stocks).fillna(0).to_numpy(dtype=np.float64)
+        else:
+            matrix = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+            index = pd.RangeIndex(len(matrix))
+        if matrix.shape[1] != len(self.stocks):
+            raise Exception(f"Expected {len(self.stocks)} weights per portfolio, got {matrix.shape[1]}")
+
+        # Normalise each row to 100%, like PortfolioAnalyzer
+        totals = matrix.sum(axis=1, keepdims=True)
+        if (totals == 0).any():
+            raise Exception("Every portfolio needs a non-zero total weight")
+        return matrix / totals, index
+
+    def evaluate(self, weights):
+        """
+        Score many portfolios
+
+        Args:
+            weights: (n_portfolios x n_stocks) array in the column order of returns,
+                or a DataFrame with stock columns (its index labels the portfolios)
+
+        Returns:
+            pd.DataFrame: One row per portfolio, one column per metric
+        """
+        matrix, index = self._weight_matrix(weights)
+        blocks = [self._evaluate_block(matrix[i:i + self.chunk_size])
+                  for i in range(0, len(matrix), self.chunk_size)]
+        values = np.vstack(blocks) if blocks else np.zeros((0, len(METRIC_NAMES)))
+        return pd.DataFrame(values, index=index, columns=METRIC_NAMES)
+
+    def _evaluate_block(self, weights):
+        returns = self._returns @ weights.T  # bars x portfolios
+        return metric_matrix(returns, self._benchmark, self.risk_free_rate, self.periods_per_year)
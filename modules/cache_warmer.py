@@ -0,0 +1,130 @@
+"""
+CACHE WARMER MODULE
+Refreshes the Nifty 50 universe and benchmark after each NSE close so user clicks hit warm cache
+
+Run inside the app (PRICE_CACHE_WARMER=1) or as a separate process:
+
+    python -m modules.cache_warmer            # keep warming after every close
+    python -m modules.cache_warmer --once     # warm once and exit (e.g. from cron)
+"""
+
+import argparse
+import threading
+import time
+import pandas as pd
+
+from modules import market_calendar
+from modules.data_fetcher import NiftyDataFetcher
+from modules.price_store import period_start
+from modules.request_queue import request_context, BULK
+
+
+def warm_universe(fetcher, periods=None):
+    """
+    Load every period of the universe (stocks plus ^NSEI) into the caches
+
+    The longest period is loaded first so the on-disk store downloads each
+    ticker once; shorter periods are then slices of the same history.
+    Requests are queued as bulk work, so interactive users go first.
+
+    Args:
+        fetcher (NiftyDataFetcher): Fetcher whose caches should be warmed
+        periods (list): Periods to warm (default: every sidebar period)
+
+    Returns:
+        dict: {period: number of stocks loaded}
+    """
+    periods = periods or NiftyDataFetcher.PERIODS
+    ordered = sorted(periods, key=lambda period: period_start(period) or pd.Timestamp.min)
+
+    loaded = {}
+    with request_context('cache-warmer', BULK):
+        for period in ordered:
+            try:
+                loaded[period] = fetcher.get_universe_prices(period).shape[1]
+            except Exception as e:
+                print(f"⚠️ Cache warm-up failed for {period}: {str(e)}")
+                loaded[period] = 0
+    return loaded
+
+
+class CacheWarmer(threading.Thread):
+    """
+    Daemon thread that warms the universe now and again after every NSE close
+    """
+
+    def __init__(self, fetcher=None, periods=None):
+        """
+        Initialize the cache warmer
+
+        Args:
+            fetcher (NiftyDataFetcher): Fetcher to warm (default: a new one)
+            periods (list): Periods to warm (default: every sidebar period)
+        """
+        super().__init__(name='cache-warmer', daemon=True)
+        self.fetcher = fetcher or NiftyDataFetcher()
+        self.periods = periods
+        self.last_run = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            loaded = warm_universe(self.fetcher, self.periods)
+            self.last_run = pd.Timestamp.now(tz=market_calendar.IST)
+            print(f"✅ Cache warmed in {time.monotonic() - started:.1f}s: {loaded}")
+
+            wake_at = market_calendar.next_session_close(self.last_run)
+            wait_seconds = (wake_at - pd.Timestamp.now(tz=market_calendar.IST)).total_seconds()
+            self._stop_event.wait(max(wait_seconds, 1))
+
+    def stop(self):
+        """Ask the warmer to exit after its current run"""
+        self._stop_event.set()
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_background_warmer(fetcher=None, periods=None):
+    """
+    Start the process-wide warmer thread (only once per process)
+
+    Args:
+        fetcher (NiftyDataFetcher): Fetcher to warm
+        periods (list): Periods to warm
+
+    Returns:
+        CacheWarmer: Running warmer
+    """
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None or not _warmer.is_alive():
+            _warmer = CacheWarmer(fetcher, periods)
+            _warmer.start()
+        return _warmer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the Nifty 50 price cache after each NSE close")
+    parser.add_argument('--once', action='store_true', help="warm once and exit")
+    parser.add_argument('--periods', nargs='+', default=None,
+                        help=f"periods to warm (default: {' '.join(NiftyDataFetcher.PERIODS)})")
+    args = parser.parse_args()
+
+    if args.once:
+        print(warm_universe(NiftyDataFetcher(), args.periods))
+        return
+
+    warmer = CacheWarmer(periods=args.periods)
+    warmer.start()
+    try:
+        while warmer.is_alive():
+            warmer.join(timeout=1)
+    except KeyboardInterrupt:
+        warmer.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+CIRCUIT BREAKER MODULE
+Stops sending requests to a failing price provider and probes it in the background until it recovers
+"""
+
+import time
+import threading
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider while its circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker
+
+    After ``failure_threshold`` consecutive transient failures (429, 503,
+    timeouts) the circuit opens and every call fails immediately with
+    CircuitOpenError, so callers can serve cached data instead of sleeping
+    through retries. While open, a background thread probes the provider
+    after ``reset_timeout`` seconds (doubling up to ``max_reset_timeout`` on
+    each failed probe) and closes the circuit once a probe succeeds. Without a
+    probe, the first call after the timeout is let through as the probe.
+    """
+
+    def __init__(self, name='provider', failure_threshold=3, reset_timeout=30.0,
+                 max_reset_timeout=600.0, probe=None):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            name (str): Name used in messages
+            failure_threshold (int): Consecutive transient failures that open the circuit
+            reset_timeout (float): Seconds to wait before the first probe
+            max_reset_timeout (float): Longest wait between probes
+            probe (callable): probe() -> None, raising on failure (default: none)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.probe = probe
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._current_timeout = reset_timeout
+        self._probing = False
+        self._probe_running = False
+        self._lock = threading.Lock()
+        self._stats = {'opened': 0, 'rejected': 0, 'probes': 0, 'last_error': None}
+
+    @property
+    def state(self):
+        """Current state: 'closed', 'open' or 'half_open'"""
+        with self._lock:
+            return self._state
+
+    @property
+    def is_open(self):
+        """True while calls are being rejected"""
+        return self.state != CLOSED
+
+    def before_call(self):
+        """
+        Check whether a call may go to the provider
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or a probe is already in flight)
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if (self._state == OPEN and self.probe is None and not self._probing
+                    and time.monotonic() - self._opened_at >= self._current_timeout):
+                # No background probe: let this one call through as the probe
+                self._state = HALF_OPEN
+                self._probing = True
+                return
+            self._stats['rejected'] += 1
+            retry_in = max(self._current_timeout - (time.monotonic() - self._opened_at), 0)
+        raise CircuitOpenError(f"{self.name} circuit open after repeated failures; "
+                               f"next probe in {retry_in:.0f}s")
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+            self._current_timeout = self.reset_timeout
+
+    def record_failure(self, error=None):
+        """
+        Count a transient failure, opening the circuit at the threshold
+
+        Args:
+            error (Exception): The failure (kept for stats)
+        """
+        start_probe = False
+        with self._lock:
+            self._stats['last_error'] = str(error) if error is not None else None
+            if self._state == HALF_OPEN:
+                # Failed probe: wait longer before the next one
+                self._current_timeout = min(self._current_timeout * 2, self.max_reset_timeout)
+                start_probe = self._open()
+            else:
+                self._failures += 1
+                if self._state == CLOSED and self._failures >= self.failure_threshold:
+                    start_probe = self._open()
+
+        if start_probe:
+            threading.Thread(target=self._probe_loop, name=f"{self.name}-probe", daemon=True).start()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._stats['opened'] += 1
+        print(f"⚠️ {self.name} unavailable - serving cached prices for {self._current_timeout:.0f}s")
+        # At most one background probe thread per breaker
+        if self.probe is not None and not self._probe_running:
+            self._probe_running = True
+            return True
+        return False
+
+    def _probe_loop(self):
+        try:
+            while True:
+                with self._lock:
+                    wait_time = self._opened_at + self._current_timeout - time.monotonic()
+                if wait_time > 0:
+                    time.sleep(wait_time)
+                    continue
+
+                with self._lock:
+                    self._state = HALF_OPEN
+                    self._probing = True
+                    self._stats['probes'] += 1
+                try:
+                    self.probe()
+                except Exception as e:
+                    with self._lock:
+                        self._current_timeout = min(self._current_timeout * 2, self.max_reset_timeout)
+                        self._state = OPEN
+                        self._opened_at = time.monotonic()
+                        self._probing = False
+                        self._stats['last_error'] = str(e)
+                    continue
+
+                self.record_success()
+                print(f"✅ {self.name} recovered - circuit closed")
+                return
+        finally:
+            with self._lock:
+                self._probe_running = False
+
+    def stats(self):
+        """
+        Breaker statistics for monitoring
+
+        Returns:
+            dict: State, consecutive failures, times opened, rejected calls, probes, last error
+        """
+        with self._lock:
+            return dict(self._stats, state=self._state, failures=self._failures,
+                        reset_timeout=self._current_timeout)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name, **options):
+    """
+    Get the process-wide breaker for a provider, creating it on first use
+
+    Args:
+        name (str): Provider name
+        **options: CircuitBreaker arguments (used on creation only)
+
+    Returns:
+        CircuitBreaker: Shared breaker
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **options)
+        return _breakers[name]
@@ -0,0 +1,183 @@
+"""
+COLUMN METRICS MODULE
+All 24 portfolio metrics for many return series at once, reduced along the time axis in NumPy
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.intervals import bars_per_year
+from modules.metric_registry import METRIC_NAMES
+
+
+def _safe_divide(numerator, denominator, when_zero=0.0):
+    """Elementwise numerator / denominator with a fixed value where denominator == 0"""
+    out = np.full(np.broadcast(numerator, denominator).shape, when_zero, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def column_metrics(returns, benchmark_returns=None, risk_free_rate=0.065, interval='1d'):
+    """
+    Every metric for every column of a returns matrix
+
+    Each metric is one reduction along the time axis of the whole
+    (bars x series) array, so scoring all stocks of the universe, or
+    thousands of portfolios, is a single call. A column gives the same
+    values as MetricsCalculator on a portfolio with those returns.
+
+    Args:
+        returns (pd.DataFrame): Bar returns, one column per series (a Series or a
+            2-D array also work; array columns are numbered from 0)
+        benchmark_returns (pd.Series): Benchmark returns on the same dates (optional;
+            missing dates count as 0)
+        risk_free_rate (float): Annual risk-free rate
+        interval (str): Bar interval, for annualisation
+
+    Returns:
+        pd.DataFrame: One row per series, one column per metric
+    """
+    if isinstance(returns, pd.Series):
+        returns = returns.to_frame()
+    if isinstance(returns, pd.DataFrame):
+        labels = returns.columns
+        r = returns.to_numpy(dtype=np.float64)
+        if benchmark_returns is not None:
+            benchmark_returns = benchmark_returns.reindex(returns.index).fillna(0)
+    else:
+        r = np.asarray(returns, dtype=np.float64)
+        r = r[:, None] if r.ndim == 1 else r
+        labels = pd.RangeIndex(r.shape[1])
+
+    benchmark = None
+    if benchmark_returns is not None:
+        benchmark = np.asarray(benchmark_returns, dtype=np.float64)
+
+    values = metric_matrix(r, benchmark, risk_free_rate, bars_per_year(interval))
+    return pd.DataFrame(values, index=labels, columns=METRIC_NAMES)
+
+
+def metric_matrix(r, benchmark, risk_free_rate, periods_per_year):
+    """
+    Metrics of each column of r
+
+    Args:
+        r (np.ndarray): Bar returns, bars x series
+        benchmark (np.ndarray): Benchmark return per bar, or None
+        risk_free_rate (float): Annual risk-free rate
+        periods_per_year (int): Bars per year
+
+    Returns:
+        np.ndarray: series x metrics, in METRIC_NAMES order
+    """
+    n_bars, n_series = r.shape
+    ppy = periods_per_year
+    rf = risk_free_rate
+
+    if n_bars == 0:
+        return np.zeros((n_series, len(METRIC_NAMES)))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Returns and volatility
+        total_return = np.prod(1 + r, axis=0) - 1
+        mean = r.mean(axis=0)
+        std = r.std(axis=0, ddof=1) if n_bars > 1 else np.full(n_series, np.nan)
+        annual_return = mean * ppy
+        annual_vol = std * np.sqrt(ppy)
+
+        num_years = (n_bars + 1) / ppy
+        cagr = (1 + total_return) ** (1 / num_years) - 1
+
+        # Drawdowns
+        cumulative = np.cumprod(1 + r, axis=0) - 1
+        running_max = np.maximum.accumulate(cumulative, axis=0)
+        drawdown = (cumulative - running_max) / (1 + running_max)
+        max_dd = drawdown.min(axis=0)
+        in_dd = drawdown < 0
+        dd_count = in_dd.sum(axis=0)
+        avg_dd = _safe_divide(np.where(in_dd, drawdown, 0).sum(axis=0), dd_count)
+        # Episodes start on an underwater bar that follows a bar at the peak
+        episodes = in_dd[0] + (in_dd[1:] & ~in_dd[:-1]).sum(axis=0)
+        dd_duration = _safe_divide(dd_count, episodes)
+        ulcer = np.sqrt((drawdown ** 2).mean(axis=0))
+
+        # Ratios
+        sharpe = _safe_divide(annual_return - rf, annual_vol)
+        excess = annual_return - rf
+        tracking_rf = (r - rf / ppy).std(axis=0, ddof=1) * np.sqrt(ppy)
+        information = np.where((tracking_rf == 0) | (tracking_rf < 0.0001), 0, excess / tracking_rf)
+
+        down = r < 0
+        n_down = down.sum(axis=0)
+        down_mean = _safe_divide(np.where(down, r, 0).sum(axis=0), n_down)
+        down_ss = np.where(down, (r - down_mean) ** 2, 0).sum(axis=0)
+        # pandas std of a single value is NaN, which the ratio then propagates
+        down_std = np.where(n_down > 1, np.sqrt(down_ss / np.maximum(n_down - 1, 1)), np.nan)
+        down_vol = down_std * np.sqrt(ppy)
+        sortino = np.where(n_down == 0, 0, np.where(down_vol == 0, 0, excess / down_vol))
+
+        calmar = _safe_divide(cagr, np.abs(max_dd))
+
+        # Tail risk and shape
+        var = np.percentile(r, 5, axis=0)
+        tail = r <= var
+        cvar = np.where(tail, r, 0).sum(axis=0) / tail.sum(axis=0)
+        # Biased moments, as scipy.stats.skew / kurtosis (Fisher) compute them
+        centered = r - mean
+        squared = centered * centered
+        m2 = squared.mean(axis=0)
+        skew = (squared * centered).mean(axis=0) / m2 ** 1.5
+        kurt = (squared * squared).mean(axis=0) / m2 ** 2 - 3
+
+        # Benchmark-relative
+        if benchmark is not None:
+            bench = benchmark[:, None]
+            tracking = (r - bench).std(axis=0, ddof=1) * np.sqrt(ppy)
+            if n_bars < 2:
+                beta = np.zeros(n_series)
+            else:
+                market = benchmark
+                covariance = (centered * (market - market.mean())[:, None]).sum(axis=0) / (n_bars - 1)
+                beta = _safe_divide(covariance, np.var(market))
+        else:
+            tracking = (r - mean).std(axis=0, ddof=1) * np.sqrt(ppy)
+            beta = np.zeros(n_series)
+
+        # Trade statistics
+        gains = np.where(r > 0, r, 0).sum(axis=0)
+        losses = np.abs(np.where(r < 0, r, 0).sum(axis=0))
+        profit_factor = np.where(losses == 0, np.where(gains == 0, 0, np.inf), gains / losses)
+        abs_dd = np.abs(max_dd)
+        recovery = np.where(abs_dd == 0, np.where(total_return == 0, 0, np.inf), total_return / abs_dd)
+        win_rate = (r > 0).sum(axis=0) / n_bars
+
+    if n_bars + 1 < 2:
+        cagr = np.zeros(n_series)
+
+    columns = {
+        'CAGR': cagr,
+        'Total Return': total_return,
+        'Annual Return': annual_return,
+        'Monthly Return': mean * ppy / 12,
+        'Annual Volatility': annual_vol,
+        'Monthly Volatility': std * np.sqrt(ppy / 12),
+        'Daily Volatility': std * np.sqrt(ppy / 252),
+        'Sharpe Ratio': sharpe,
+        'Information Ratio': information,
+        'Sortino Ratio': sortino,
+        'Calmar Ratio': calmar,
+        'Max Drawdown': max_dd,
+        'Average Drawdown': avg_dd,
+        'Drawdown Duration': dd_duration,
+        'Ulcer Index': ulcer,
+        'Conditional Value at Risk': cvar,
+        'Value at Risk': var,
+        'Skewness': skew,
+        'Kurtosis': kurt,
+        'Tracking Error': tracking,
+        'Beta': beta,
+        'Recovery Factor': recovery,
+        'Profit Factor': profit_factor,
+        'Win Rate': win_rate,
+    }
+    return np.column_stack([columns[name] for name in METRIC_NAMES])
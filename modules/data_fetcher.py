@@ -1,15 +1,91 @@
 
 """
 DATA FETCHER MODULE
-Handles fetching real-time stock data from Yahoo Finance
+Handles fetching stock data from the configured price provider (Yahoo Finance by default)
 """
 
-import yfinance as yf
+import os
+import hashlib
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import streamlit as st
 
+from modules.price_store import PriceStore, period_start
+from modules.price_providers import get_provider, is_retryable_error, FIELDS
+from modules.fetch_scheduler import FetchScheduler
+from modules.shared_cache import get_shared_cache
+from modules.universe_store import UniverseStore
+from modules import market_calendar
+from modules import intervals
+
+class FetchResult:
+    """
+    Outcome of a multi-ticker fetch
+    
+    Attributes:
+        data (pd.DataFrame): Close prices for the successful tickers, aligned on
+            their common trading window
+        tickers (dict): {stock: {'status', 'start', 'end', 'rows', 'error', 'stale'}} where
+            status is 'ok' or 'failed', start/end give each ticker's own coverage and
+            stale marks cached data served because the refresh failed
+        benchmark (pd.Series): Nifty 50 index closes on the same dates as data
+        interval (str): Bar interval of data ('1d', '15m', ...)
+        returns (pd.DataFrame): Bar returns of data (data.index[1:]), taken from the
+            cached universe returns matrix, or None if they must be recomputed
+    """
+    
+    def __init__(self, data, tickers, benchmark=None, interval='1d', returns=None):
+        self.data = data
+        self.tickers = tickers
+        # Nifty 50 index closes on exactly the same dates as data (None if unavailable)
+        self.benchmark = benchmark
+        self.interval = interval
+        self.returns = returns
+    
+    @property
+    def succeeded(self):
+        """Stocks with usable data"""
+        return [stock for stock, info in self.tickers.items() if info['status'] == 'ok']
+    
+    @property
+    def failed(self):
+        """Stocks that could not be fetched"""
+        return [stock for stock, info in self.tickers.items() if info['status'] != 'ok']
+    
+    @property
+    def stale(self):
+        """Stocks served from the cache because the provider could not refresh them"""
+        return [stock for stock, info in self.tickers.items() if info.get('stale')]
+    
+    @property
+    def as_of(self):
+        """Date of the latest bar in data (None if empty)"""
+        return self.data.index[-1] if not self.data.empty else None
+    
+    def limiting_stocks(self):
+        """
+        Stocks whose shorter history cuts the aligned window
+        
+        Returns:
+            list: Stocks starting later than the earliest successful ticker
+        """
+        starts = {stock: self.tickers[stock]['start'] for stock in self.succeeded}
+        if not starts:
+            return []
+        earliest = min(starts.values())
+        latest = max(starts.values())
+        if latest <= earliest + pd.Timedelta(days=7):
+            return []
+        return [stock for stock, start in starts.items() if start == latest]
+
+def _covers(requested_start, start):
+    """Whether a partition downloaded from requested_start (None = full history) covers start"""
+    if requested_start is None:
+        return True
+    # A full-history request (start None) is earlier than any stored start
+    return start is not None and requested_start <= start
+
 class NiftyDataFetcher:
     """
     Fetches real-time stock data for Nifty 50 stocks from Yahoo Finance
@@ -29,9 +105,41 @@ class NiftyDataFetcher:
         'APOLLOHOSP.NS', 'BIOCON.NS', 'INFY.NS'
     ]
     
-    def __init__(self):
-        """Initialize the data fetcher"""
-        self.cache = {}
+    # Periods offered in the sidebar (and warmed by the cache warmer)
+    PERIODS = ['1y', '3y', '5y', '10y']
+    
+    # Bar intervals offered in the sidebar, and the periods offered for intraday bars
+    INTERVALS = ['1d', '60m', '15m', '5m', '1m']
+    INTRADAY_PERIODS = ['5d', '1mo', '3mo']
+    
+    # Longest history kept per symbol set; shorter periods are tail slices of it
+    HISTORY_PERIOD = '10y'
+    
+    # Field the analytics matrix is built from: split- and dividend-adjusted
+    # closes, so returns are total returns and splits do not show up as crashes.
+    # Intraday matrices read Close, which intraday bars never adjust.
+    PRICE_FIELD = 'Adj Close'
+    
+    # Nifty 50 index, cached and aligned alongside the stocks
+    BENCHMARK = '^NSEI'
+    
+    def __init__(self, cache_dir=None, provider=None):
+        """
+        Initialize the data fetcher
+        
+        Args:
+            cache_dir (str): Directory for the on-disk price store
+            provider (PriceProvider): Price source (default: from PRICE_PROVIDER config)
+        """
+        self.cache = PriceStore(cache_dir)
+        self.provider = provider or get_provider()
+        self.scheduler = FetchScheduler(self.provider)
+        
+        # Price matrices are shared by every session in the process
+        self.memory = get_shared_cache()
+        
+        # Intraday bars live in their own stores, one per native interval
+        self._intraday_stores = {}
     
     def get_nifty_50_stocks(self):
         """
@@ -42,117 +150,617 @@ class NiftyDataFetcher:
         """
         return [stock.replace('.NS', '') for stock in self.NIFTY_50]
     
-    def fetch_stock_data(self, stocks, period='1y'):
+    def get_universe_prices(self, period='1y', start=None, end=None):
+        """
+        Get the Close price matrix for the whole Nifty 50 universe
+        
+        All tickers are refreshed in one batched request and the matrix is kept
+        in memory, so every portfolio and page is served as a column slice.
+        Tickers with a shorter listing history keep their leading NaNs.
+        
+        Args:
+            period (str): Data period ('1y', '3y', '5y', '10y')
+            start (str/pd.Timestamp): First date (overrides period)
+            end (str/pd.Timestamp): Last date (default: latest bar)
+        
+        Returns:
+            pd.DataFrame: Adjusted close prices, one column per stock (without .NS suffix)
+        """
+        return self._get_window(self.NIFTY_50, period, start, end)[0]
+    
+    def get_universe_returns(self, period='1y', start=None, end=None):
+        """
+        Get the daily returns matrix for the whole Nifty 50 universe
+        
+        Returns are computed once per data refresh and shared by every
+        portfolio, so analyzers never recompute pct_change on their own copy.
+        
+        Args:
+            period (str): Data period ('1y', '3y', '5y', '10y')
+            start (str/pd.Timestamp): First date (overrides period)
+            end (str/pd.Timestamp): Last date (default: latest bar)
+        
+        Returns:
+            pd.DataFrame: Close-to-close returns, one column per stock (NaN before listing)
+        """
+        return self._get_window(self.NIFTY_50, period, start, end)[3]
+    
+    def _get_window(self, symbols, period='1y', start=None, end=None, interval='1d'):
+        """
+        Serve a date window as a tail slice of the cached long history
+        
+        One HISTORY_PERIOD matrix is loaded per symbol set and every shorter
+        period (or explicit start/end) is a slice of it, so switching periods
+        costs no download and no copy. Windows reaching further back than
+        HISTORY_PERIOD load the full history instead. Intraday windows are
+        sliced out of the shortest INTRADAY_PERIODS span that contains them.
+        
+        Args:
+            symbols (list): Yahoo symbols
+            period (str): Data period (ignored when start is given)
+            start (str/pd.Timestamp): First date
+            end (str/pd.Timestamp): Last date
+            interval (str): Bar interval
+        
+        Returns:
+            tuple: (prices, benchmark or None, {symbol: error message}, returns)
+        """
+        entry, start, end = self._get_span(symbols, period, start, end, interval)
+        prices = entry['prices'].loc[start:end]
+        benchmark = entry['benchmark']
+        if benchmark is not None:
+            benchmark = benchmark.loc[start:end]
+        return prices, benchmark, entry['failures'], entry['returns'].loc[start:end]
+    
+    def _get_span(self, symbols, period, start, end, interval='1d'):
+        """Resolve a window and load the cached history that contains it"""
+        start = pd.Timestamp(start) if start is not None else period_start(period)
+        end = pd.Timestamp(end) if end is not None else None
+        
+        if intervals.is_intraday(interval):
+            # Only reach back as far as asked; 'max' is the interval's whole lookback
+            span = next((p for p in self.INTRADAY_PERIODS
+                         if start is not None and period_start(p) <= start), 'max')
+            return self._get_prices(symbols, span, interval), start, end
+        
+        span = self.HISTORY_PERIOD
+        if start is None or start < period_start(span):
+            span = 'max'
+        
+        return self._get_prices(symbols, span), start, end
+    
+    def get_universe_bars(self, field='Close', period='1y', start=None, end=None):
+        """
+        Get any OHLCV field for the whole Nifty 50 universe
+        
+        The matrix is a read-only view of the memory-mapped universe store
+        (float32 prices, int64 volume) shared by every process on the host.
+        
+        Args:
+            field (str): 'Open', 'High', 'Low', 'Close', 'Adj Close' or 'Volume'
+            period (str): Data period ('1y', '3y', '5y', '10y')
+            start (str/pd.Timestamp): First date (overrides period)
+            end (str/pd.Timestamp): Last date (default: latest bar)
+        
+        Returns:
+            pd.DataFrame: Dates x stocks (without .NS suffix)
+        """
+        entry, start, end = self._get_span(self.NIFTY_50, period, start, end)
+        return entry['bars'].field(field, columns=list(entry['prices'].columns)).loc[start:end]
+    
+    def _get_prices(self, symbols, period, interval='1d'):
+        """
+        Get the price matrix, aligned benchmark and fetch failures for a symbol set
+        
+        Entries live in the process-wide shared cache keyed by (tickers, period,
+        interval), so concurrent sessions asking for the same data wait on a
+        single load. An entry is reused until the next NSE session close after
+        it was built (or, for intraday bars, until a new bar has formed),
+        unless it has transient failures to retry.
+        
+        Args:
+            symbols (list): Yahoo symbols
+            period (str): Data period
+            interval (str): Bar interval
+        
+        Returns:
+            dict: {'built_at', 'prices', 'returns', 'bars', 'benchmark', 'failures'}
+        """
+        key = (self.cache.cache_dir, self.provider.name, tuple(symbols), period, interval)
+        
+        def is_fresh(entry):
+            transient = any(is_retryable_error(error) for error in entry['failures'].values())
+            return intervals.is_fresh(entry['built_at'], interval) and not transient
+        
+        if intervals.is_intraday(interval):
+            loader = lambda previous: self._load_intraday(symbols, interval, period)
+        else:
+            loader = lambda previous: self._load_prices(symbols, period, previous)
+        return self.memory.get_or_load(key, loader, is_fresh)
+    
+    def _load_prices(self, symbols, period, previous=None):
         """
-        Fetch historical stock data from Yahoo Finance with robust rate limit handling
+        Refresh the store and build the matrix, benchmark and failures for a symbol set
+        
+        The Nifty 50 index is refreshed in the same batch as the stocks and
+        aligned to their trading calendar once, here. If a recent entry exists,
+        only tickers that failed with a transient error are re-requested;
+        permanent failures (e.g. delisted symbols) wait for the next full refresh.
+        
+        Args:
+            symbols (list): Yahoo symbols
+            period (str): Data period
+            previous (dict): Stale cache entry, if any
+        
+        Returns:
+            dict: {'built_at', 'prices', 'returns', 'bars', 'benchmark', 'failures'} where bars is
+                the memory-mapped UniverseView and prices its float32 PRICE_FIELD matrix
+        """
+        now = pd.Timestamp.now(tz='UTC')
+        start = period_start(period)
+        
+        if previous is not None and market_calendar.is_fresh(previous['built_at'], now):
+            built_at, failures = previous['built_at'], previous['failures']
+            transient = [symbol for symbol, error in failures.items() if is_retryable_error(error)]
+            retry_failures = self._refresh_store(transient, start)
+            failures = {symbol: error for symbol, error in failures.items()
+                        if symbol not in transient or symbol in retry_failures}
+            failures.update(retry_failures)
+        else:
+            built_at = now
+            failures = self._refresh_store(list(symbols) + [self.BENCHMARK], start)
+        
+        bars = self._universe_view(symbols, start)
+        if len(bars.index) == 0:
+            raise Exception(f"No data available for {[symbol.replace('.NS', '') for symbol in symbols]}")
+        prices = bars.field(self.PRICE_FIELD, columns=[symbol.replace('.NS', '') for symbol in bars.symbols])
+        
+        return {
+            'built_at': built_at,
+            'prices': prices,
+            'returns': self._returns_matrix(prices),
+            'bars': bars,
+            'benchmark': self._aligned_benchmark(prices.index, start),
+            'failures': failures,
+        }
+    
+    def _universe_view(self, symbols, start):
+        """
+        Open the memory-mapped OHLCV snapshot for a symbol set, rebuilding it
+        from the Parquet store when the store has newer bars
+        
+        Args:
+            symbols (list): Yahoo symbols
+            start (pd.Timestamp): First date the snapshot must cover
+        
+        Returns:
+            UniverseView: Read-only view shared with other processes
+        """
+        name = hashlib.sha1('|'.join(symbols).encode('utf-8')).hexdigest()[:12]
+        store = UniverseStore(os.path.join(self.cache.cache_dir, '_universe', name))
+        source_updated = self.cache.last_updated(symbols)
+        
+        view = store.open()
+        if view is not None and view.symbols == list(symbols) and view.meta.get('source_updated', '') >= source_updated:
+            covered_from = view.meta.get('start')
+            if covered_from is None or (start is not None and pd.Timestamp(covered_from) <= start):
+                return view
+        
+        frames = {symbol: self.cache.get(symbol, start) for symbol in symbols}
+        return store.write(frames, symbols, {
+            'start': start.isoformat() if start is not None else None,
+            'source_updated': source_updated,
+        })
+    
+    def _load_intraday(self, symbols, interval, period='max'):
+        """
+        Ingest intraday bars and build the Close matrix for an interval
+        
+        Bars are downloaded at the native interval, streamed into the store
+        one request window at a time and read back one ticker at a time, Close
+        only, resampled to the requested interval before the columns are
+        combined, so the full-resolution universe is never held in memory.
+        Only the requested period is ingested and read; a longer period later
+        backfills the stored bars instead of downloading them again.
+        
+        Args:
+            symbols (list): Yahoo symbols
+            interval (str): Requested intraday interval (e.g. '15m', '30m')
+            period (str): Span to load ('max' = the native interval's whole lookback)
+        
+        Returns:
+            dict: {'built_at', 'prices', 'returns', 'bars', 'benchmark', 'failures'}
+        """
+        built_at = pd.Timestamp.now(tz='UTC')
+        native = intervals.source_interval(interval)
+        start = pd.Timestamp.now().normalize() - intervals.MAX_LOOKBACK[native]
+        if period_start(period) is not None:
+            start = max(start, period_start(period))
+        
+        failures = self._ingest_intraday(list(symbols) + [self.BENCHMARK], native, start)
+        store = self._intraday_store(native)
+        
+        def read_close(symbol):
+            stored = store.get(symbol, start, columns=['Close'])
+            if stored is None or stored.empty:
+                return None
+            close = stored['Close']
+            return close if interval == native else intervals.resample_bars(close, interval)
+        
+        columns = {}
+        for symbol in symbols:
+            close = read_close(symbol)
+            if close is not None:
+                columns[symbol.replace('.NS', '')] = close
+        
+        prices = pd.DataFrame(columns)
+        if prices.empty:
+            raise Exception(f"No {interval} data available for {[symbol.replace('.NS', '') for symbol in symbols]}")
+        
+        benchmark = read_close(self.BENCHMARK)
+        if benchmark is not None:
+            benchmark = benchmark.reindex(prices.index).ffill().rename('NIFTY50')
+        
+        return {
+            'built_at': built_at,
+            'prices': prices,
+            'returns': self._returns_matrix(prices),
+            'bars': None,
+            'benchmark': benchmark,
+            'failures': failures,
+        }
+    
+    @staticmethod
+    def _returns_matrix(prices):
+        """
+        Bar-to-bar returns of a price matrix, computed once per refresh
+        
+        Computed in float64 from the same values portfolios receive, so a
+        portfolio's columns are identical to pct_change on its own prices.
+        A bar after a missing price is NaN rather than spanning the gap.
+        
+        Args:
+            prices (pd.DataFrame): Close prices
+        
+        Returns:
+            pd.DataFrame: Returns (float64), NaN on the first bar
+        """
+        values = prices.to_numpy(dtype=np.float64)
+        returns = np.full_like(values, np.nan)
+        returns[1:] = values[1:] / values[:-1] - 1
+        return pd.DataFrame(returns, index=prices.index, columns=prices.columns, copy=False)
+    
+    def _intraday_store(self, interval):
+        """Price store holding bars of one native intraday interval"""
+        if interval not in self._intraday_stores:
+            path = os.path.join(self.cache.cache_dir, '_intraday', interval)
+            self._intraday_stores[interval] = PriceStore(path, keep_in_memory=False)
+        return self._intraday_stores[interval]
+    
+    def _ingest_intraday(self, symbols, interval, start):
+        """
+        Stream intraday bars from the provider into the store
+        
+        The window is split into request-sized spans (Yahoo serves at most a
+        week of 1m bars per request) and each span is written to disk as soon
+        as it arrives. Cached tickers resume from their last stored bar, and
+        tickers cached for a shorter window only download the missing head.
+        
+        Args:
+            symbols (list): Yahoo symbols
+            interval (str): Native intraday interval
+            start (pd.Timestamp): First date needed
+        
+        Returns:
+            dict: {symbol: error message} for tickers that could not be refreshed
+        """
+        store = self._intraday_store(interval)
+        now = pd.Timestamp.now()
+        requests = {}
+        
+        for symbol in symbols:
+            coverage = store.coverage(symbol)
+            if coverage is None:
+                requests.setdefault((start, None), []).append(symbol)
+                continue
+            if not _covers(coverage['requested_start'], start):
+                # Backfill up to the first stored bar
+                requests.setdefault((start, coverage['first'].normalize()), []).append(symbol)
+            if not intervals.is_fresh(coverage['checked_at'], interval):
+                requests.setdefault((coverage['last'].normalize(), None), []).append(symbol)
+        
+        failures = {}
+        for (fetch_start, fetch_end), group in requests.items():
+            received = set()
+            stop = now if fetch_end is None else fetch_end
+            window_start = fetch_start
+            while window_start <= stop and group:
+                window_end = min(window_start + intervals.REQUEST_SPAN[interval], stop.normalize())
+                data, window_failures = self.scheduler.download(group, start=window_start, end=window_end,
+                                                                interval=interval)
+                for symbol in group:
+                    if symbol in window_failures:
+                        continue
+                    bars = data.xs(symbol, axis=1, level=1).dropna(how='all')
+                    bars.columns.name = None
+                    if not bars.empty:
+                        store.append(symbol, bars, requested_start=fetch_start)
+                        received.add(symbol)
+                
+                # A ticker that fails mid-stream keeps what it has and resumes next time
+                for symbol, error in window_failures.items():
+                    if error != "No data returned":
+                        failures[symbol] = error
+                group = [symbol for symbol in group if symbol not in failures]
+                window_start = window_end + pd.Timedelta(days=1)
+            
+            for symbol in group:
+                if symbol in received:
+                    continue
+                if store.coverage(symbol) is None:
+                    failures[symbol] = "No data returned"
+                else:
+                    store.touch(symbol)
+        
+        return failures
+    
+    def _aligned_benchmark(self, index, start):
+        """
+        Nifty 50 index closes reindexed to a trading calendar
+        
+        Args:
+            index (pd.DatetimeIndex): Calendar to align to
+            start (pd.Timestamp): First date
+        
+        Returns:
+            pd.Series: Index closes (forward-filled over missing days), or None
+        """
+        stored = self.cache.get(self.BENCHMARK, start)
+        if stored is None or stored.empty:
+            return None
+        return stored[self.PRICE_FIELD].reindex(index).ffill().rename('NIFTY50')
+    
+    def fetch_stock_data(self, stocks, period='1y', start=None, end=None, interval='1d'):
+        """
+        Fetch historical stock data, serving cached bars from the price store
+        and downloading only the missing tail from Yahoo Finance
+        
+        Stocks that cannot be fetched are left out (with a warning) instead of
+        failing the whole request; use fetch_stock_data_detailed to see why.
         
         Args:
             stocks (list): List of stock symbols (without .NS suffix)
             period (str): Data period ('1y', '3y', '5y', '10y')
+            start (str/pd.Timestamp): First date (overrides period)
+            end (str/pd.Timestamp): Last date (default: latest bar)
+            interval (str): Bar interval ('1d', or intraday such as '5m', '15m', '60m')
         
         Returns:
-            pd.DataFrame: Close prices for all stocks
+            pd.DataFrame: Close prices for all stocks that could be fetched
         """
-        import time
+        result = self.fetch_stock_data_detailed(stocks, period, start, end, interval)
+        
+        if result.data.empty:
+            errors = '; '.join(f"{stock}: {info['error']}" for stock, info in result.tickers.items() if info['error'])
+            raise Exception(f"Failed to fetch data for {stocks}: {errors or 'No valid data retrieved'}")
+        
+        for stock in result.failed:
+            print(f"⚠️ Skipping {stock}: {result.tickers[stock]['error']}")
+        if result.stale:
+            print(f"⚠️ Serving cached prices as of {result.as_of:%Y-%m-%d} for {result.stale}")
+        
+        return result.data
+    
+    def fetch_stock_data_detailed(self, stocks, period='1y', start=None, end=None, interval='1d'):
+        """
+        Fetch historical stock data and report the outcome for every ticker
+        
+        Nifty 50 stocks are sliced out of the shared universe matrix; any other
+        symbol is fetched on its own. Calling this again only re-requests the
+        tickers that failed, because successes are already in the price store.
         
+        Args:
+            stocks (list): List of stock symbols (without .NS suffix)
+            period (str): Data period ('1y', '3y', '5y', '10y')
+            start (str/pd.Timestamp): First date (overrides period)
+            end (str/pd.Timestamp): Last date (default: latest bar)
+            interval (str): Bar interval ('1d', or intraday such as '5m', '15m', '60m')
+        
+        Returns:
+            FetchResult: Aligned prices for the successes plus per-ticker status
+        """
         # Add .NS suffix for Yahoo Finance
         stock_symbols = [f"{stock}.NS" if not stock.endswith('.NS') else stock for stock in stocks]
         
-        try:
-            # Retry logic with exponential backoff
-            max_retries = 3
-            base_wait = 10  # Start with 10 seconds
-            
-            for attempt in range(max_retries):
-                try:
-                    # Download data with extended timeout
-                    data = yf.download(
-                        stock_symbols,
-                        period=period,
-                        progress=False,
-                        interval='1d',
-                        timeout=60
-                    )
-                    
-                    # Handle single stock case - ensure it's a DataFrame with proper index
-                    if len(stock_symbols) == 1:
-                        # yfinance returns different structures for single vs multiple stocks
-                        if isinstance(data, pd.DataFrame) and 'Close' in data.columns:
-                            # If it's already a DataFrame with Close column
-                            close_data = data[['Close']].copy()
-                            close_data.columns = [stocks[0]]
-                        elif isinstance(data, pd.Series):
-                            # If it's a Series (single column)
-                            close_data = pd.DataFrame({stocks[0]: data}, index=data.index)
-                        elif isinstance(data, pd.DataFrame):
-                            # If it's a DataFrame without explicit Close column
-                            close_data = pd.DataFrame({stocks[0]: data.iloc[:, 0]}, index=data.index)
-                        else:
-                            raise Exception(f"Unexpected data structure for {stocks[0]}")
-                        
-                        data = close_data
-                    else:
-                        # Multiple stocks - extract Close prices
-                        if 'Close' in data.columns:
-                            data = data[['Close']].copy()
-                            data.columns = stocks
-                        else:
-                            # Fallback: assume first columns are Close
-                            data = data.iloc[:, :len(stocks)].copy()
-                            data.columns = stocks
-                    
-                    # Ensure index is DatetimeIndex
-                    data.index = pd.to_datetime(data.index)
-                    
-                    # Drop NaN values
-                    data = data.dropna()
-                    
-                    if data.empty:
-                        raise Exception(f"No valid data retrieved for {stocks}")
-                    
-                    return data
-                
-                except Exception as e:
-                    error_str = str(e).lower()
-                    is_rate_limit = any(keyword in error_str for keyword in 
-                                       ['rate', 'too many', 'throttle', '429', '503', 'timeout'])
-                    
-                    if is_rate_limit and attempt < max_retries - 1:
-                        # Exponential backoff: 10s, 20s, 40s
-                        wait_time = base_wait * (2 ** attempt)
-                        print(f"⏳ Rate limited. Waiting {wait_time} seconds before retry {attempt + 1}/{max_retries - 1}...")
-                        print(f"   Stocks: {', '.join(stock_symbols)}")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        raise Exception(f"Error fetching data for {stocks}: {str(e)}")
+        # Intraday bars are only ingested for the stocks asked for
+        universe = stock_symbols
+        if not intervals.is_intraday(interval) and all(symbol in self.NIFTY_50 for symbol in stock_symbols):
+            universe = self.NIFTY_50
+        matrix, benchmark, failures, universe_returns = self._get_window(universe, period, start, end, interval)
         
-        except Exception as e:
-            raise Exception(f"Failed to fetch data for {stocks}: {str(e)}")
+        tickers = {}
+        columns = {}
+        for stock, symbol in zip(stocks, stock_symbols):
+            key = symbol.replace('.NS', '')
+            series = matrix[key].dropna() if key in matrix.columns else None
+            if series is None or series.empty:
+                tickers[stock] = {
+                    'status': 'failed',
+                    'start': None,
+                    'end': None,
+                    'rows': 0,
+                    'error': failures.get(symbol, 'No data available'),
+                    'stale': False,
+                }
+            else:
+                tickers[stock] = {
+                    'status': 'ok',
+                    'start': series.index[0],
+                    'end': series.index[-1],
+                    'rows': len(series),
+                    'error': failures.get(symbol),
+                    # Refresh failed (e.g. provider outage), so these are the last cached bars
+                    'stale': symbol in failures,
+                }
+                columns[stock] = matrix[key]
+        
+        # Portfolio math runs in float64 on the few selected columns
+        data = pd.DataFrame(columns).astype('float64')
+        
+        # Align the successes on their common window
+        data = data.dropna()
+        if benchmark is not None:
+            benchmark = benchmark.reindex(data.index)
+        
+        # Reuse the cached returns when the aligned rows are consecutive bars of the
+        # matrix; if a stock is missing a day inside the window they would differ
+        returns = None
+        positions = universe_returns.index.get_indexer(data.index)
+        if len(data) > 1 and (positions >= 0).all() and (np.diff(positions) == 1).all():
+            keys = {stock: stock.replace('.NS', '') for stock in data.columns}
+            returns = universe_returns.iloc[positions[1:]][list(keys.values())]
+            returns.columns = list(keys)
+        
+        return FetchResult(data, tickers, benchmark, interval, returns)
     
-    def get_benchmark_data(self, period='1y'):
+    def _refresh_store(self, symbols, start):
+        """
+        Bring the price store up to date for the requested window
+        
+        Tickers never seen (or cached only for a shorter window) are downloaded
+        from ``start``; cached tickers only download from their last stored bar,
+        and only once a new NSE session has closed since they were last checked.
+        Tickers sharing a download start are batched into one request.
+        
+        Args:
+            symbols (list): Yahoo symbols
+            start (pd.Timestamp): First date needed (None for full history)
+        
+        Returns:
+            dict: {symbol: error message} for tickers that could not be refreshed
+        """
+        now = pd.Timestamp.now(tz='UTC')
+        requests = {}
+        backfilled = []
+        
+        for symbol in symbols:
+            coverage = self.cache.coverage(symbol)
+            if (coverage is None
+                    or not _covers(coverage['requested_start'], start)
+                    or not set(FIELDS) <= set(coverage['fields'])):
+                # Never seen, cached for a shorter window, or cached before full OHLCV was kept
+                fetch_start = start
+                if coverage is not None:
+                    backfilled.append(symbol)
+            elif market_calendar.is_fresh(coverage['checked_at'], now):
+                # No NSE session has closed since the last check, so no new bar exists
+                continue
+            else:
+                # Re-request the last stored bar so a partial session is corrected
+                fetch_start = coverage['last']
+            requests.setdefault(fetch_start, []).append(symbol)
+        
+        failures = {}
+        for fetch_start, group in requests.items():
+            bars, group_failures = self._download_bars(group, start=fetch_start)
+            failures.update(group_failures)
+            for symbol in group:
+                if symbol in bars and not bars[symbol].empty:
+                    self.cache.append(symbol, bars[symbol], requested_start=fetch_start,
+                                      full_history=fetch_start is None)
+                elif symbol not in group_failures:
+                    self.cache.touch(symbol)
+        
+        # Matrices built before the backfill stop short of the new history
+        backfilled = [symbol for symbol in backfilled if symbol not in failures]
+        if backfilled:
+            self._invalidate_span(backfilled, start)
+        
+        return failures
+    
+    def _invalidate_span(self, symbols, start):
+        """
+        Drop the shared-cache entries for a span that includes backfilled symbols
+        
+        Universe snapshots need no extra step: the backfill moves the tickers'
+        last_updated stamp, so _universe_view rebuilds every snapshot holding them.
+        
+        Args:
+            symbols (list): Yahoo symbols whose stored history now starts earlier
+            start (pd.Timestamp): Start of the backfilled window (None for full history)
+        """
+        symbols = set(symbols)
+        span = self.HISTORY_PERIOD if start is not None else 'max'
+        self.memory.invalidate_matching(
+            lambda key: (key[:2] == (self.cache.cache_dir, self.provider.name)
+                         and key[3] == span and bool(symbols & set(key[2]))))
+    
+    def _download_bars(self, symbols, start=None):
+        """
+        Download full OHLCV bars from the configured price provider
+        
+        Large symbol lists are split into chunks and fetched concurrently by the
+        scheduler; only chunks that hit a transient error are retried.
+        
+        Args:
+            symbols (list): Yahoo symbols
+            start (pd.Timestamp): First date to download (None for full history)
+        
+        Returns:
+            tuple: ({symbol: DataFrame of OHLCV bars}, {symbol: error message})
+        """
+        data, failures = self.scheduler.download(symbols, start=start)
+        
+        bars = {}
+        for symbol in symbols:
+            if symbol in failures:
+                continue
+            frame = data.xs(symbol, axis=1, level=1)
+            frame = frame[[field for field in FIELDS if field in frame.columns]].dropna(how='all')
+            frame.index = pd.to_datetime(frame.index)
+            frame.columns.name = None
+            bars[symbol] = frame
+        
+        return bars, failures
+    
+    def get_benchmark_data(self, period='1y', start=None, end=None):
         """
         Fetch Nifty 50 benchmark data
         
+        The index is cached with the universe and aligned to its trading calendar.
+        
         Args:
             period (str): Data period
+            start (str/pd.Timestamp): First date (overrides period)
+            end (str/pd.Timestamp): Last date (default: latest bar)
         
         Returns:
             pd.DataFrame: Nifty 50 index close prices
         """
         try:
-            data = yf.download(
-                '^NSEI',  # Nifty 50 index
-                period=period,
-                progress=False,
-                interval='1d'
-            )
+            _, benchmark, failures, _ = self._get_window(self.NIFTY_50, period, start, end)
+            if benchmark is None:
+                raise Exception(failures.get(self.BENCHMARK, 'No data available'))
             
-            return data[['Close']].rename(columns={'Close': 'NIFTY50'})
+            return benchmark.to_frame('NIFTY50')
         
         except Exception as e:
             raise Exception(f"Error fetching benchmark data: {str(e)}")
     
+    def get_service_stats(self):
+        """
+        Operational metrics of the data layer for monitoring
+        
+        Returns:
+            dict: {'memory': shared cache stats, 'circuit': provider breaker stats,
+                'queue': request queue depth, wait times and per-session usage}
+        """
+        return {
+            'memory': self.memory.stats(),
+            'circuit': self.scheduler.breaker.stats(),
+            'queue': self.scheduler.request_queue.stats(),
+        }
+    
     def validate_data(self, data):
         """
         Validate fetched data quality
@@ -0,0 +1,81 @@
+"""
+DRAWDOWNS MODULE
+Index of drawdown episodes (start, trough, recovery, depth, length) built in one vectorised pass
+"""
+
+import numpy as np
+import pandas as pd
+
+EPISODE_COLUMNS = ['Start', 'Trough', 'Recovery', 'Depth', 'Length', 'Recovery Time']
+
+
+def drawdown_episodes(drawdown):
+    """
+    Every drawdown episode of a drawdown series
+
+    An episode is a run of consecutive bars below the previous peak
+    (drawdown < 0); it ends on the first bar back at a peak. Run boundaries,
+    depths and troughs come from whole-array operations, so the cost is O(n)
+    with no loop over episodes.
+
+    Args:
+        drawdown (pd.Series): Drawdown from peak (e.g. PortfolioAnalyzer.get_drawdown())
+
+    Returns:
+        pd.DataFrame: One row per episode in time order with Start (first bar
+            below the peak), Trough (deepest bar), Recovery (first bar back at
+            the peak, NaT while still under water), Depth (drawdown at the
+            trough, negative), Length (bars below the peak) and Recovery Time
+            (bars from trough to recovery, NaN while still under water)
+    """
+    values = drawdown.to_numpy(dtype=np.float64)
+    underwater = values < 0
+
+    # +1 where a run of underwater bars begins, -1 on the bar after it ends
+    edges = np.diff(np.concatenate([[0], underwater.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+
+    if len(starts):
+        # Underwater bars packed together, each episode a contiguous segment
+        positions = np.flatnonzero(underwater)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        depths = np.minimum.reduceat(values[positions], offsets)
+
+        # Trough = first bar of each episode that reaches its depth
+        episode = np.repeat(np.arange(len(starts)), lengths)
+        at_depth = values[positions] == depths[episode]
+        hits = episode[at_depth]  # Sorted, so the first hit of an episode is where the id changes
+        troughs = positions[at_depth][np.flatnonzero(np.diff(hits, prepend=-1))]
+    else:
+        depths = np.zeros(0)
+        troughs = starts
+
+    # The last episode has no recovery bar if the series ends under water
+    recovered = ends < len(values)
+    recovery = drawdown.index[np.minimum(ends, len(values) - 1)].where(recovered)
+
+    return pd.DataFrame({
+        'Start': drawdown.index[starts],
+        'Trough': drawdown.index[troughs],
+        'Recovery': recovery,
+        'Depth': depths,
+        'Length': lengths,
+        'Recovery Time': np.where(recovered, ends - troughs, np.nan),
+    }, columns=EPISODE_COLUMNS)
+
+
+def worst_drawdowns(episodes, n=5):
+    """
+    Deepest episodes of a drawdown index
+
+    Args:
+        episodes (pd.DataFrame): Output of drawdown_episodes
+        n (int): Number of episodes
+
+    Returns:
+        pd.DataFrame: Up to n episodes, deepest first, numbered from 1
+    """
+    worst = episodes.sort_values('Depth', kind='stable').head(n)
+    return worst.set_axis(pd.RangeIndex(1, len(worst) + 1))
@@ -0,0 +1,254 @@
+"""
+FETCH SCHEDULER MODULE
+Concurrent, chunked price downloads paced by a shared token-bucket rate limiter
+"""
+
+import time
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from modules.price_providers import is_retryable_error
+from modules.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from modules.request_queue import RequestQueue, current_context
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``.
+    A rate-limit response from the provider pauses the whole bucket, so every
+    worker backs off together instead of each sleeping on its own.
+    """
+
+    def __init__(self, rate=5.0, capacity=50):
+        """
+        Initialize the token bucket
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now < self._paused_until:
+            self._updated = now
+            return
+        elapsed = now - max(self._updated, self._paused_until)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Take tokens, waiting until they are available
+
+        Args:
+            tokens (int): Tokens needed (capped at capacity)
+            timeout (float): Maximum seconds to wait (None waits forever)
+
+        Returns:
+            bool: True if the tokens were taken
+        """
+        tokens = min(tokens, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_time = max(self._paused_until - now, (tokens - self._tokens) / self.rate)
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(max(wait_time, 0.001))
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for a while (shared backoff after a 429)
+
+        Args:
+            seconds (float): Pause length
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+# One budget for the whole process: Yahoo limits our egress IP, not a session
+_DEFAULT_RATE_LIMITER = TokenBucket()
+
+# Every session queues for that budget in one fair-share queue
+_DEFAULT_REQUEST_QUEUE = RequestQueue(_DEFAULT_RATE_LIMITER)
+
+
+def get_rate_limiter():
+    """
+    Get the process-wide rate limiter
+
+    Returns:
+        TokenBucket: Shared token bucket
+    """
+    return _DEFAULT_RATE_LIMITER
+
+
+def get_request_queue():
+    """
+    Get the process-wide request queue in front of the rate limiter
+
+    Returns:
+        RequestQueue: Shared fair-share queue
+    """
+    return _DEFAULT_REQUEST_QUEUE
+
+
+class FetchScheduler:
+    """
+    Splits large symbol lists into chunks and downloads them concurrently
+
+    Each chunk spends one token per symbol before hitting the provider,
+    queueing for them in the fair-share request queue under the caller's
+    session and priority (see request_queue.request_context). Only chunks
+    that fail with a transient error are retried; symbols the provider
+    could not serve are reported back rather than failing the batch.
+    Calls go through the provider's circuit breaker, so once it opens every
+    chunk fails at once instead of waiting out its retries.
+    """
+
+    # Symbol requested by the breaker's background probe
+    PROBE_SYMBOL = '^NSEI'
+
+    def __init__(self, provider, chunk_size=10, max_workers=4, rate_limiter=None,
+                 max_retries=3, base_backoff=2.0, breaker=None, request_queue=None):
+        """
+        Initialize the fetch scheduler
+
+        Args:
+            provider (PriceProvider): Price source
+            chunk_size (int): Symbols per request chunk
+            max_workers (int): Concurrent chunks
+            rate_limiter (TokenBucket): Shared budget (default: process-wide bucket)
+            max_retries (int): Attempts per chunk
+            base_backoff (float): First shared pause in seconds after a transient error
+            breaker (CircuitBreaker): Breaker for the provider (default: process-wide one per provider)
+            request_queue (RequestQueue): Queue for rate_limiter (default: process-wide queue,
+                or a private one when a private rate_limiter is given)
+        """
+        self.provider = provider
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        if request_queue is None:
+            request_queue = get_request_queue() if rate_limiter is None else RequestQueue(rate_limiter)
+        self.request_queue = request_queue
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        self.breaker = breaker or get_circuit_breaker(getattr(provider, 'name', 'provider'))
+        if self.breaker.probe is None:
+            self.breaker.probe = self._probe
+
+    def _probe(self):
+        """Tiny request used by the breaker to check whether the provider is back"""
+        if getattr(self.provider, 'rate_limited', False):
+            self.request_queue.acquire(1, session='circuit-probe')
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=7)
+        self.provider.download([self.PROBE_SYMBOL], start=start)
+
+    def _chunks(self, symbols):
+        return [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+
+    def _run_chunk(self, chunk, start, end, interval, context):
+        self.breaker.before_call()
+        if getattr(self.provider, 'rate_limited', False):
+            # Stop queueing as soon as the circuit opens
+            session, priority = context
+            self.request_queue.acquire(len(chunk), session=session, priority=priority,
+                                       check=self.breaker.before_call)
+            self.breaker.before_call()
+
+        try:
+            data = self.provider.download(chunk, start=start, end=end, interval=interval)
+        except Exception as e:
+            if is_retryable_error(e):
+                self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        return data
+
+    def download(self, symbols, start=None, end=None, interval='1d'):
+        """
+        Download bars for many symbols
+
+        Args:
+            symbols (list): Yahoo symbols
+            start (pd.Timestamp): First date (None for full history)
+            end (pd.Timestamp): Last date (None for latest)
+            interval (str): Bar interval
+
+        Returns:
+            tuple: (DataFrame with (field, ticker) columns, {symbol: error message})
+        """
+        symbols = list(dict.fromkeys(symbols))
+        chunks = self._chunks(symbols)
+        if not chunks:
+            return pd.DataFrame(), {}
+
+        results = []
+        failures = {}
+
+        # Worker threads do not inherit the caller's request context
+        context = current_context()
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            pending = {
+                executor.submit(self._run_chunk, chunk, start, end, interval, context): (chunk, 0)
+                for chunk in chunks
+            }
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk, attempt = pending.pop(future)
+                    try:
+                        results.append(future.result())
+                    except CircuitOpenError as e:
+                        for symbol in chunk:
+                            failures[symbol] = str(e)
+                    except Exception as e:
+                        if is_retryable_error(e) and attempt < self.max_retries - 1 and not self.breaker.is_open:
+                            backoff = self.base_backoff * (2 ** attempt)
+                            print(f"⏳ Rate limited. Retrying {len(chunk)} stocks after {backoff:.0f}s "
+                                  f"(attempt {attempt + 2}/{self.max_retries})...")
+                            self.rate_limiter.pause(backoff)
+                            retry = executor.submit(self._run_chunk, chunk, start, end, interval, context)
+                            pending[retry] = (chunk, attempt + 1)
+                        else:
+                            for symbol in chunk:
+                                failures[symbol] = str(e)
+
+        results = [frame for frame in results if not frame.empty]
+        data = pd.concat(results, axis=1) if results else pd.DataFrame()
+
+        # Symbols the provider silently left out are failures too
+        if isinstance(data.columns, pd.MultiIndex):
+            returned = set(data.columns.get_level_values(1))
+        else:
+            returned = set()
+        for symbol in symbols:
+            if symbol not in returned and symbol not in failures:
+                failures[symbol] = "No data returned"
+
+        return data, failures
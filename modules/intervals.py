@@ -0,0 +1,178 @@
+"""
+INTERVALS MODULE
+Bar intervals: annualisation factors, provider lookback limits and OHLCV resampling
+"""
+
+import pandas as pd
+
+from modules import market_calendar
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Minutes in the regular NSE session (09:15-15:30)
+SESSION_MINUTES = 375
+
+# Intraday intervals the providers can download natively, finest first
+NATIVE_INTRADAY = ['1m', '5m', '15m', '60m']
+
+# How far back Yahoo serves each intraday interval, and the span of one request
+MAX_LOOKBACK = {
+    '1m': pd.Timedelta(days=29),
+    '5m': pd.Timedelta(days=59),
+    '15m': pd.Timedelta(days=59),
+    '60m': pd.Timedelta(days=729),
+}
+REQUEST_SPAN = {
+    '1m': pd.Timedelta(days=7),
+    '5m': pd.Timedelta(days=30),
+    '15m': pd.Timedelta(days=30),
+    '60m': pd.Timedelta(days=180),
+}
+
+# Aggregation for each OHLCV field when bars are combined
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+}
+
+
+def interval_minutes(interval):
+    """
+    Length of an intraday interval in minutes
+
+    Args:
+        interval (str): Interval such as '1m', '15m', '60m', '90m' or '1h'
+
+    Returns:
+        int: Minutes per bar (None for daily and longer intervals)
+    """
+    interval = str(interval).strip().lower()
+    if interval.endswith('m') and not interval.endswith('mo'):
+        return int(interval[:-1])
+    if interval.endswith('h'):
+        return int(interval[:-1]) * 60
+    return None
+
+
+def is_intraday(interval):
+    """Check whether an interval is shorter than one session"""
+    return interval_minutes(interval) is not None
+
+
+def bars_per_year(interval='1d'):
+    """
+    Number of bars in a trading year, used to annualise returns and volatility
+
+    Intraday bars are counted per NSE session (a trailing partial bar counts
+    as a bar, e.g. seven 60m bars from 09:15 to 15:30).
+
+    Args:
+        interval (str): Bar interval ('1m', '5m', '15m', '60m', '1d', '1wk', '1mo')
+
+    Returns:
+        int: Bars per year
+    """
+    minutes = interval_minutes(interval)
+    if minutes is not None:
+        bars_per_session = -(-SESSION_MINUTES // minutes)
+        return bars_per_session * TRADING_DAYS_PER_YEAR
+
+    interval = str(interval).strip().lower()
+    if interval == '1d':
+        return TRADING_DAYS_PER_YEAR
+    if interval in ('1wk', '5d'):
+        return 52
+    if interval == '1mo':
+        return 12
+    if interval == '3mo':
+        return 4
+    raise ValueError(f"Unsupported interval: {interval}")
+
+
+def source_interval(interval):
+    """
+    Native interval to download when serving an interval
+
+    Intervals the provider does not serve directly (e.g. '30m', '2h') are
+    built by resampling the coarsest native interval that divides them.
+
+    Args:
+        interval (str): Requested intraday interval
+
+    Returns:
+        str: Native interval to ingest
+    """
+    minutes = interval_minutes(interval)
+    if minutes is None:
+        raise ValueError(f"Not an intraday interval: {interval}")
+    for native in reversed(NATIVE_INTRADAY):
+        if minutes % interval_minutes(native) == 0:
+            return native
+    raise ValueError(f"Unsupported interval: {interval}")
+
+
+def _rule(interval):
+    minutes = interval_minutes(interval)
+    if minutes is not None:
+        return f"{minutes}min"
+    return {'1d': '1D', '1wk': 'W-FRI', '5d': 'W-FRI', '1mo': 'ME', '3mo': 'QE'}[str(interval).lower()]
+
+
+def resample_bars(frame, interval):
+    """
+    Downsample bars to a coarser interval
+
+    Intraday buckets are anchored at the 09:15 session open so 15m bars are
+    09:15, 09:30, ... exactly like the exchange's own bars. Frames with OHLCV
+    columns are aggregated field by field; any other frame (e.g. a Close
+    matrix) keeps the last value in each bucket.
+
+    Args:
+        frame (pd.DataFrame/pd.Series): Bars indexed by timestamp
+        interval (str): Target interval
+
+    Returns:
+        pd.DataFrame/pd.Series: Resampled bars without empty buckets
+    """
+    if frame.empty:
+        return frame
+
+    if is_intraday(interval):
+        offset = pd.Timedelta(hours=market_calendar.MARKET_OPEN.hour, minutes=market_calendar.MARKET_OPEN.minute)
+        resampler = frame.resample(_rule(interval), origin='start_day', offset=offset, label='left', closed='left')
+    else:
+        resampler = frame.resample(_rule(interval))
+
+    if isinstance(frame, pd.DataFrame) and set(frame.columns) <= set(OHLCV_AGGREGATION):
+        resampled = resampler.agg({column: OHLCV_AGGREGATION[column] for column in frame.columns})
+        return resampled.dropna(subset=['Close'] if 'Close' in frame.columns else None, how='all')
+
+    resampled = resampler.last()
+    return resampled.dropna(how='all') if isinstance(resampled, pd.DataFrame) else resampled.dropna()
+
+
+def is_fresh(checked_at, interval='1d', now=None):
+    """
+    Check whether bars of an interval fetched at ``checked_at`` can still be served
+
+    Daily bars stay fresh until the next session close. Intraday bars also
+    expire during market hours once a new bar has had time to form.
+
+    Args:
+        checked_at: When the data was last fetched (None means never)
+        interval (str): Bar interval
+        now: Reference moment (default: now)
+
+    Returns:
+        bool: True if no newer bar can exist yet
+    """
+    if not market_calendar.is_fresh(checked_at, now):
+        return False
+    minutes = interval_minutes(interval)
+    if minutes is None or not market_calendar.is_market_open(now):
+        return True
+    return market_calendar.to_ist(now) - market_calendar.to_ist(checked_at) < pd.Timedelta(minutes=minutes)
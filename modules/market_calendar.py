@@ -0,0 +1,169 @@
+"""
+MARKET CALENDAR MODULE
+NSE trading calendar (weekends, exchange holidays, market hours in IST) for cache freshness
+"""
+
+import os
+import pandas as pd
+from datetime import datetime, time as dtime
+
+IST = 'Asia/Kolkata'
+
+# Regular NSE equity session
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+# Time after the close before the day's bar is treated as final on Yahoo
+SETTLE_DELAY = pd.Timedelta(minutes=15)
+
+# NSE trading holidays (weekday closures). Extend each year from the NSE
+# circular, or list extra dates (YYYY-MM-DD, one per line) in NSE_HOLIDAYS_FILE.
+NSE_HOLIDAYS = {
+    # 2024
+    '2024-01-22', '2024-01-26', '2024-03-08', '2024-03-25', '2024-03-29',
+    '2024-04-11', '2024-04-17', '2024-05-01', '2024-05-20', '2024-06-17',
+    '2024-07-17', '2024-08-15', '2024-10-02', '2024-11-01', '2024-11-15',
+    '2024-11-20', '2024-12-25',
+    # 2025
+    '2025-02-26', '2025-03-14', '2025-03-31', '2025-04-10', '2025-04-14',
+    '2025-04-18', '2025-05-01', '2025-08-15', '2025-08-27', '2025-10-02',
+    '2025-10-21', '2025-10-22', '2025-11-05', '2025-12-25',
+    # 2026
+    '2026-01-26', '2026-03-03', '2026-03-26', '2026-03-31', '2026-04-03',
+    '2026-04-14', '2026-05-01', '2026-05-28', '2026-06-26', '2026-09-14',
+    '2026-10-02', '2026-10-20', '2026-11-10', '2026-11-24', '2026-12-25',
+}
+
+
+def _load_holidays():
+    holidays = {pd.Timestamp(day).date() for day in NSE_HOLIDAYS}
+    path = os.environ.get('NSE_HOLIDAYS_FILE')
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    holidays.add(pd.Timestamp(line).date())
+    return holidays
+
+
+_HOLIDAYS = _load_holidays()
+
+
+def to_ist(timestamp=None):
+    """
+    Convert a timestamp to IST
+
+    Naive timestamps are taken to be in the server's local time zone.
+
+    Args:
+        timestamp: datetime, string or pd.Timestamp (default: now)
+
+    Returns:
+        pd.Timestamp: Timezone-aware IST timestamp
+    """
+    if timestamp is None:
+        return pd.Timestamp.now(tz=IST)
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(datetime.now().astimezone().tzinfo)
+    return timestamp.tz_convert(IST)
+
+
+def is_trading_day(day):
+    """
+    Check whether NSE holds a regular session on a date
+
+    Args:
+        day: Date-like value (interpreted as an IST calendar date)
+
+    Returns:
+        bool: True on weekdays that are not exchange holidays
+    """
+    day = pd.Timestamp(day).date()
+    return day.weekday() < 5 and day not in _HOLIDAYS
+
+
+def _session_close(day):
+    return pd.Timestamp.combine(day, MARKET_CLOSE).tz_localize(IST) + SETTLE_DELAY
+
+
+def previous_session_close(now=None):
+    """
+    Most recent settled session close at or before a moment
+
+    Args:
+        now: Reference moment (default: now)
+
+    Returns:
+        pd.Timestamp: IST close time (plus settle delay) of the last completed session
+    """
+    now = to_ist(now)
+    day = now.date()
+    while not (is_trading_day(day) and _session_close(day) <= now):
+        day = (pd.Timestamp(day) - pd.Timedelta(days=1)).date()
+    return _session_close(day)
+
+
+def next_session_close(after=None):
+    """
+    First settled session close strictly after a moment
+
+    Args:
+        after: Reference moment (default: now)
+
+    Returns:
+        pd.Timestamp: IST close time (plus settle delay) of the next session
+    """
+    after = to_ist(after)
+    day = after.date()
+    while not (is_trading_day(day) and _session_close(day) > after):
+        day = (pd.Timestamp(day) + pd.Timedelta(days=1)).date()
+    return _session_close(day)
+
+
+def last_trading_day(now=None):
+    """
+    Date of the most recent completed session
+
+    Args:
+        now: Reference moment (default: now)
+
+    Returns:
+        pd.Timestamp: Session date (naive, midnight)
+    """
+    return pd.Timestamp(previous_session_close(now).date())
+
+
+def is_fresh(checked_at, now=None):
+    """
+    Check whether data fetched at ``checked_at`` can still be served
+
+    Daily bars only change when a session closes, so data stays fresh until
+    the next settled close after it was fetched. Over weekends and holidays
+    nothing expires.
+
+    Args:
+        checked_at: When the data was last fetched (None means never)
+        now: Reference moment (default: now)
+
+    Returns:
+        bool: True if no session has closed since ``checked_at``
+    """
+    if checked_at is None:
+        return False
+    return to_ist(checked_at) >= previous_session_close(now)
+
+
+def is_market_open(now=None):
+    """
+    Check whether the regular NSE session is in progress
+
+    Args:
+        now: Reference moment (default: now)
+
+    Returns:
+        bool: True between 09:15 and 15:30 IST on trading days
+    """
+    now = to_ist(now)
+    return is_trading_day(now.date()) and MARKET_OPEN <= now.time() < MARKET_CLOSE
@@ -0,0 +1,335 @@
+"""
+METRIC REGISTRY MODULE
+Portfolio metrics declared with their inputs, computed on demand and invalidated selectively
+"""
+
+import numpy as np
+from scipy import stats
+
+from modules.drawdowns import drawdown_episodes
+
+# Same keys and order as MetricsCalculator.calculate_all_metrics
+METRIC_NAMES = [
+    'CAGR', 'Total Return', 'Annual Return', 'Monthly Return',
+    'Annual Volatility', 'Monthly Volatility', 'Daily Volatility',
+    'Sharpe Ratio', 'Information Ratio', 'Sortino Ratio', 'Calmar Ratio',
+    'Max Drawdown', 'Average Drawdown', 'Drawdown Duration', 'Ulcer Index',
+    'Conditional Value at Risk', 'Value at Risk', 'Skewness', 'Kurtosis',
+    'Tracking Error', 'Beta', 'Recovery Factor', 'Profit Factor', 'Win Rate',
+]
+
+# Also available on request: 'Max Drawdown Duration', 'Recovery Time' and 'Alpha'
+
+# Values supplied from outside the graph
+INPUTS = ['returns', 'drawdown', 'price_rows', 'periods_per_year', 'risk_free_rate', 'benchmark', 'confidence']
+
+
+class MetricRegistry:
+    """
+    Named computations and the inputs each one reads
+
+    A node's inputs are either registry inputs or nodes registered before
+    it, so registration order is a valid evaluation order and the graph can
+    never contain a cycle.
+    """
+
+    def __init__(self, inputs):
+        self.inputs = list(inputs)
+        self.nodes = {}
+        self._dependents = None
+
+    def register(self, name, *inputs):
+        """
+        Decorator adding a node computed from the given inputs or nodes
+
+        Args:
+            name (str): Node name (metric names are the calculate_all_metrics keys)
+            *inputs (str): Names whose values are passed to the function, in order
+        """
+        def decorator(function):
+            for source in inputs:
+                if source not in self.nodes and source not in self.inputs:
+                    raise Exception(f"Metric '{name}' depends on unknown '{source}'")
+            self.nodes[name] = (function, inputs)
+            self._dependents = None
+            return function
+        return decorator
+
+    def dependents(self, name):
+        """Every node that reads ``name``, directly or through other nodes"""
+        if self._dependents is None:
+            direct = {}
+            for node, (_, inputs) in self.nodes.items():
+                for source in inputs:
+                    direct.setdefault(source, []).append(node)
+            # Dependents are registered later, so walking backwards finds their closures ready
+            self._dependents = {}
+            for source in [*reversed(list(self.nodes)), *self.inputs]:
+                closure = []
+                for node in direct.get(source, []):
+                    closure.append(node)
+                    closure.extend(self._dependents[node])
+                self._dependents[source] = list(dict.fromkeys(closure))
+        return self._dependents.get(name, [])
+
+
+class LazyMetrics:
+    """
+    Cached evaluation of a MetricRegistry
+
+    Nodes are computed the first time they are requested (together with the
+    nodes they read) and kept until one of their inputs changes; set() then
+    drops only the nodes downstream of the changed inputs.
+    """
+
+    def __init__(self, registry, **inputs):
+        """
+        Initialize the evaluator
+
+        Args:
+            registry (MetricRegistry): Node definitions
+            **inputs: A value for every registry input
+        """
+        missing = [name for name in registry.inputs if name not in inputs]
+        if missing:
+            raise Exception(f"Missing metric inputs: {', '.join(missing)}")
+        self.registry = registry
+        self.inputs = {}
+        self._cache = {}
+        self.set(**inputs)
+
+    def set(self, **inputs):
+        """
+        Change inputs and invalidate the nodes that depend on them
+
+        Args:
+            **inputs: New input values by name
+        """
+        for name, value in inputs.items():
+            if name not in self.registry.inputs:
+                raise Exception(f"Unknown metric input: {name}")
+            self.inputs[name] = value
+            for node in self.registry.dependents(name):
+                self._cache.pop(node, None)
+
+    def is_cached(self, name):
+        """Whether a node currently holds a computed value"""
+        return name in self._cache
+
+    def get(self, names):
+        """
+        Values of the requested nodes, computing only what is missing
+
+        Args:
+            names (list): Node names
+
+        Returns:
+            dict: {name: value} in the requested order
+        """
+        return {name: self._value(name) for name in names}
+
+    def _value(self, name):
+        if name in self._cache:
+            return self._cache[name]
+        if name in self.inputs:
+            return self.inputs[name]
+        if name not in self.registry.nodes:
+            raise Exception(f"Unknown metric: {name}")
+        function, sources = self.registry.nodes[name]
+        value = function(*[self._value(source) for source in sources])
+        self._cache[name] = value
+        return value
+
+
+METRICS = MetricRegistry(INPUTS)
+register = METRICS.register
+
+# Shared primitives. Each uses the same operations as the matching
+# MetricsCalculator.calculate_* method, so the metrics are identical to it.
+
+register('r', 'returns')(lambda returns: returns.to_numpy(dtype=np.float64))
+register('dd', 'drawdown')(lambda drawdown: drawdown.to_numpy(dtype=np.float64))
+register('total_return', 'r')(lambda r: np.prod(1 + r) - 1)
+register('mean', 'r')(lambda r: r.mean() if len(r) else np.nan)
+register('std', 'r')(lambda r: r.std(ddof=1) if len(r) > 1 else np.nan)
+register('annual_return', 'mean', 'periods_per_year')(lambda mean, ppy: mean * ppy)
+register('annual_vol', 'std', 'periods_per_year')(lambda std, ppy: std * np.sqrt(ppy))
+register('excess_return', 'annual_return', 'risk_free_rate')(lambda annual_return, rf: annual_return - rf)
+register('max_dd', 'dd')(lambda dd: dd.min() if len(dd) else 0)
+register('positive', 'r')(lambda r: r[r > 0])
+register('negative', 'r')(lambda r: r[r < 0])
+register('underwater', 'dd')(lambda dd: dd[dd < 0])
+register('episodes', 'drawdown')(drawdown_episodes)
+
+
+@register('cagr', 'total_return', 'price_rows', 'periods_per_year')
+def _cagr(total_return, price_rows, ppy):
+    num_years = price_rows / ppy
+    if price_rows < 2 or num_years <= 0:
+        return 0
+    return (1 + total_return) ** (1 / num_years) - 1
+
+
+@register('tracking_rf', 'r', 'risk_free_rate', 'periods_per_year')
+def _tracking_rf(r, rf, ppy):
+    """Volatility of returns over the risk-free rate (the Information Ratio's tracking error)"""
+    return (r - rf / ppy).std(ddof=1) * np.sqrt(ppy) if len(r) > 1 else np.nan
+
+
+@register('var', 'r', 'confidence')
+def _var(r, confidence):
+    return np.quantile(r, 1 - confidence)
+
+
+@register('tail', 'r', 'var')
+def _tail(r, var):
+    return r[r <= var]
+
+
+@register('moments', 'r', 'mean')
+def _moments(r, mean):
+    """Skewness and excess kurtosis as scipy.stats.skew / kurtosis compute them"""
+    if not len(r):
+        return stats.skew(r), stats.kurtosis(r)
+    centered = r - mean
+    squared = centered ** 2
+    m2 = squared.mean()
+    m3 = (squared * centered).mean()
+    m4 = (squared ** 2).mean()
+    if m2 <= (np.finfo(np.float64).eps * mean) ** 2:
+        return np.nan, np.nan
+    return m3 / m2 ** 1.5, m4 / m2 ** 2.0 - 3
+
+
+@register('market', 'returns', 'r', 'benchmark')
+def _market(returns, r, benchmark):
+    """Portfolio and benchmark returns on their common dates (None without a benchmark)"""
+    if benchmark is None:
+        return None
+    if benchmark.index.equals(returns.index):
+        return r, benchmark.to_numpy(dtype=np.float64)
+    common_index = returns.index.intersection(benchmark.index)
+    return (returns.loc[common_index].to_numpy(dtype=np.float64),
+            benchmark.loc[common_index].to_numpy(dtype=np.float64))
+
+
+# Metrics
+
+register('CAGR', 'cagr')(lambda cagr: cagr)
+register('Total Return', 'total_return')(lambda total_return: total_return)
+register('Annual Return', 'annual_return')(lambda annual_return: annual_return)
+register('Monthly Return', 'annual_return')(lambda annual_return: annual_return / 12)
+register('Annual Volatility', 'annual_vol')(lambda annual_vol: annual_vol)
+register('Monthly Volatility', 'std', 'periods_per_year')(lambda std, ppy: std * np.sqrt(ppy / 12))
+register('Daily Volatility', 'std', 'periods_per_year')(lambda std, ppy: std * np.sqrt(ppy / 252))
+register('Max Drawdown', 'max_dd')(lambda max_dd: max_dd)
+register('Value at Risk', 'var')(lambda var: var)
+register('Skewness', 'moments')(lambda moments: moments[0])
+register('Kurtosis', 'moments')(lambda moments: moments[1])
+
+
+@register('Sharpe Ratio', 'excess_return', 'annual_vol')
+def _sharpe(excess_return, annual_vol):
+    return 0 if annual_vol == 0 else excess_return / annual_vol
+
+
+@register('Information Ratio', 'excess_return', 'tracking_rf')
+def _information(excess_return, tracking_rf):
+    return 0 if tracking_rf == 0 or tracking_rf < 0.0001 else excess_return / tracking_rf
+
+
+@register('Sortino Ratio', 'excess_return', 'negative', 'periods_per_year')
+def _sortino(excess_return, negative, ppy):
+    if len(negative) == 0:
+        return 0
+    downside_vol = (negative.std(ddof=1) if len(negative) > 1 else np.nan) * np.sqrt(ppy)
+    return 0 if downside_vol == 0 else excess_return / downside_vol
+
+
+@register('Calmar Ratio', 'cagr', 'max_dd')
+def _calmar(cagr, max_dd):
+    return 0 if max_dd == 0 else cagr / abs(max_dd)
+
+
+@register('Average Drawdown', 'underwater')
+def _average_drawdown(underwater):
+    return underwater.mean() if len(underwater) else 0
+
+
+@register('Drawdown Duration', 'episodes')
+def _drawdown_duration(episodes):
+    """Average bars spent below the peak per episode"""
+    return episodes['Length'].mean() if len(episodes) else 0
+
+
+@register('Max Drawdown Duration', 'episodes')
+def _max_drawdown_duration(episodes):
+    return episodes['Length'].max() if len(episodes) else 0
+
+
+@register('Recovery Time', 'episodes')
+def _recovery_time(episodes):
+    """Average bars from trough back to the peak, over recovered episodes"""
+    recovered = episodes['Recovery Time'].dropna()
+    return recovered.mean() if len(recovered) else 0
+
+
+@register('Ulcer Index', 'dd')
+def _ulcer(dd):
+    return np.sqrt((dd ** 2).mean()) if len(dd) else np.nan
+
+
+@register('Conditional Value at Risk', 'tail')
+def _cvar(tail):
+    return tail.mean() if len(tail) else np.nan
+
+
+@register('Tracking Error', 'returns', 'market', 'mean', 'periods_per_year')
+def _tracking_error(returns, market, mean, ppy):
+    """Against the benchmark, or the portfolio's own mean without one"""
+    if market is None:
+        return (returns - mean).std() * np.sqrt(ppy)
+    r, b = market
+    return (r - b).std(ddof=1) * np.sqrt(ppy) if len(r) > 1 else np.nan
+
+
+@register('Beta', 'market')
+def _beta(market):
+    """Beta against the benchmark (0 without one, as PortfolioAnalyzer.get_portfolio_beta)"""
+    if market is None:
+        return 0
+    r, b = market
+    market_variance = np.var(b)
+    if len(r) < 2 or market_variance == 0:
+        return 0
+    return np.cov(r, b)[0, 1] / market_variance
+
+
+@register('Recovery Factor', 'total_return', 'max_dd')
+def _recovery(total_return, max_dd):
+    if max_dd == 0:
+        return 0 if total_return == 0 else float('inf')
+    return total_return / abs(max_dd)
+
+
+@register('Profit Factor', 'positive', 'negative')
+def _profit_factor(positive, negative):
+    gains = positive.sum()
+    losses = abs(negative.sum())
+    if losses == 0:
+        return 0 if gains == 0 else float('inf')
+    return gains / losses
+
+
+@register('Win Rate', 'positive', 'r')
+def _win_rate(positive, r):
+    return len(positive) / len(r) if len(r) > 0 else 0
+
+
+@register('Alpha', 'annual_return', 'Beta', 'benchmark', 'risk_free_rate', 'periods_per_year')
+def _alpha(annual_return, beta, benchmark, rf, ppy):
+    """Jensen's alpha against the benchmark (0 without one)"""
+    if benchmark is None:
+        return 0
+    benchmark_return = benchmark.mean() * ppy
+    return annual_return - (rf + beta * (benchmark_return - rf))
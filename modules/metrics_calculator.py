@@ -8,11 +8,20 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 
+from modules.drawdowns import worst_drawdowns
+from modules.metric_registry import METRICS, METRIC_NAMES, LazyMetrics
+from modules.row_buffer import BufferedRows
+from modules.running_metrics import RunningMetrics
+
 class MetricsCalculator:
     """
     Calculates comprehensive performance and risk metrics
     """
     
+    # Series that append() grows in place (see modules.row_buffer)
+    cumulative_returns = BufferedRows()
+    drawdown = BufferedRows()
+    
     def __init__(self, price_data, portfolio_analyzer, risk_free_rate=0.065):
         """
         Initialize metrics calculator
@@ -22,54 +31,168 @@ class MetricsCalculator:
             portfolio_analyzer (PortfolioAnalyzer): Portfolio analyzer instance
             risk_free_rate (float): Annual risk-free rate (default: 6.5%)
         """
-        self.price_data = price_data
+        self._price_data = price_data
         self.analyzer = portfolio_analyzer
-        self.risk_free_rate = risk_free_rate
         
-        self.daily_returns = portfolio_analyzer.portfolio_returns
+        # Bars per year for the analyzer's interval (252 for daily bars)
+        self.periods_per_year = getattr(portfolio_analyzer, 'periods_per_year', 252)
+        self.bars_per_day = self.periods_per_year / 252
+        
         self.cumulative_returns = portfolio_analyzer.get_cumulative_returns()
         self.drawdown = portfolio_analyzer.get_drawdown()
+        
+        # Metrics are computed on request and cached until an input they read changes
+        self._metrics = LazyMetrics(
+            METRICS,
+            returns=self.daily_returns,
+            drawdown=self.drawdown,
+            price_rows=len(price_data),
+            periods_per_year=self.periods_per_year,
+            risk_free_rate=risk_free_rate,
+            benchmark=getattr(portfolio_analyzer, 'benchmark_returns', None),
+            confidence=0.95
+        )
+        
+        # Running state for append(), built from the history on first use
+        self._running = None
+        
+        # Set by append(): the registry inputs are refreshed on the next read
+        self._stale = False
+    
+    @property
+    def price_data(self):
+        """Price history (the analyzer's once bars have been appended)"""
+        return self.analyzer.price_data if self._price_data is None else self._price_data
+    
+    @property
+    def daily_returns(self):
+        """Portfolio returns per bar"""
+        return self.analyzer.portfolio_returns
+    
+    def append(self, prices, benchmark_price=None):
+        """
+        Add one new bar and update the metrics incrementally
+        
+        The analyzer appends the bar's returns; the running state (online
+        moments, running peak, quantile heaps) absorbs it in O(log n), so
+        current_metrics() is up to date without rescanning the history. No
+        pandas object is rebuilt here: the series are materialised from
+        their buffers, and the registry refreshed, when next read.
+        
+        Args:
+            prices (pd.Series): Closes of the new bar indexed by stock, named by its date
+            benchmark_price (float): Benchmark close of the new bar (optional)
+        
+        Returns:
+            dict: Current metrics (see current_metrics)
+        """
+        running = self._get_running()
+        portfolio_return, benchmark_return = self.analyzer.append(prices, benchmark_price)
+        running.update(portfolio_return, benchmark_return)
+        
+        date = pd.Timestamp(prices.name)
+        self._price_data = None
+        self._cumulative_returns.append(date, running.growth - 1)
+        self._drawdown.append(date, running.drawdown)
+        self._stale = True
+        
+        return running.metrics(self.risk_free_rate)
+    
+    def current_metrics(self):
+        """
+        All metrics from the running state, without rescanning the history
+        
+        Returns:
+            dict: Same keys as calculate_all_metrics (equal up to floating-point rounding)
+        """
+        return self._get_running().metrics(self.risk_free_rate)
+    
+    def _get_running(self):
+        if self._running is None:
+            self._running = RunningMetrics.from_returns(self.daily_returns, self.benchmark_returns,
+                                                        self.periods_per_year, self.confidence)
+        return self._running
     
     def calculate_all_metrics(self):
         """
         Calculate all metrics at once
         
+        Evaluates every metric of the registry (modules.metric_registry): the
+        shared primitives (mean, standard deviation, total return, drawdown
+        extremes, downside returns, VaR, central moments) are computed once on
+        plain numpy arrays and every metric is derived from them. Each
+        primitive uses the same operations as the individual calculate_*
+        method, so the values are identical.
+        
         Returns:
             dict: All calculated metrics
         """
-        return {
-            'CAGR': self.calculate_cagr(),
-            'Total Return': self.calculate_total_return(),
-            'Annual Return': self.calculate_annual_return(),
-            'Monthly Return': self.calculate_monthly_return(),
-            'Annual Volatility': self.calculate_annual_volatility(),
-            'Monthly Volatility': self.calculate_monthly_volatility(),
-            'Daily Volatility': self.calculate_daily_volatility(),
-            'Sharpe Ratio': self.calculate_sharpe_ratio(),
-            'Information Ratio': self.calculate_information_ratio(),
-            'Sortino Ratio': self.calculate_sortino_ratio(),
-            'Calmar Ratio': self.calculate_calmar_ratio(),
-            'Max Drawdown': self.calculate_max_drawdown(),
-            'Average Drawdown': self.calculate_average_drawdown(),
-            'Drawdown Duration': self.calculate_drawdown_duration(),
-            'Ulcer Index': self.calculate_ulcer_index(),
-            'Conditional Value at Risk': self.calculate_cvar(),
-            'Value at Risk': self.calculate_var(),
-            'Skewness': self.calculate_skewness(),
-            'Kurtosis': self.calculate_kurtosis(),
-            'Tracking Error': self.calculate_tracking_error(),
-            'Beta': self.calculate_beta(),
-            'Recovery Factor': self.calculate_recovery_factor(),
-            'Profit Factor': self.calculate_profit_factor(),
-            'Win Rate': self.calculate_win_rate(),
-        }
+        return self.calculate_metrics(METRIC_NAMES)
+    
+    def calculate_metrics(self, names):
+        """
+        Calculate only the requested metrics
+        
+        Only the primitives those metrics read are computed, and results are
+        cached: after the risk-free rate, benchmark or confidence level
+        changes, only the metrics that depend on it are recomputed.
+        
+        Args:
+            names (list): Metric names (calculate_all_metrics keys, 'Max Drawdown Duration',
+                'Recovery Time' or 'Alpha')
+        
+        Returns:
+            dict: {name: value} in the requested order
+        """
+        self._sync()
+        return self._metrics.get(names)
+    
+    def _sync(self):
+        """Hand the series appended since the last read to the registry"""
+        if self._stale:
+            self._stale = False
+            # The running state already holds these bars, so the benchmark bypasses its setter
+            self._metrics.set(returns=self.daily_returns, drawdown=self.drawdown,
+                              price_rows=len(self.price_data), benchmark=self.analyzer.benchmark_returns)
+    
+    @property
+    def risk_free_rate(self):
+        """Annual risk-free rate (setting it invalidates only the metrics that use it)"""
+        return self._metrics.inputs['risk_free_rate']
+    
+    @risk_free_rate.setter
+    def risk_free_rate(self, rate):
+        self._metrics.set(risk_free_rate=rate)
+    
+    @property
+    def benchmark_returns(self):
+        """Benchmark returns, or None (setting them invalidates only the metrics that use them)"""
+        self._sync()
+        return self._metrics.inputs['benchmark']
+    
+    @benchmark_returns.setter
+    def benchmark_returns(self, returns):
+        self._sync()
+        self._metrics.set(benchmark=returns)
+        # The running beta and tracking error were built against the old benchmark
+        self._running = None
+    
+    @property
+    def confidence(self):
+        """Confidence level of the VaR / CVaR in the metrics (default 0.95)"""
+        return self._metrics.inputs['confidence']
+    
+    @confidence.setter
+    def confidence(self, level):
+        self._metrics.set(confidence=level)
+        self._running = None
     
     def calculate_cagr(self):
         """Calculate Compound Annual Growth Rate"""
         if len(self.price_data) < 2:
             return 0
         total_return = self.calculate_total_return()
-        num_years = len(self.price_data) / 252
+        num_years = len(self.price_data) / self.periods_per_year
         if num_years <= 0:
             return 0
         cagr = (1 + total_return) ** (1 / num_years) - 1
@@ -81,23 +204,23 @@ class MetricsCalculator:
     
     def calculate_annual_return(self):
         """Calculate annualized return"""
-        return self.daily_returns.mean() * 252
+        return self.daily_returns.mean() * self.periods_per_year
     
     def calculate_monthly_return(self):
         """Calculate average monthly return"""
-        return self.daily_returns.mean() * 21
+        return self.daily_returns.mean() * self.periods_per_year / 12
     
     def calculate_annual_volatility(self):
         """Calculate annualized volatility"""
-        return self.daily_returns.std() * np.sqrt(252)
+        return self.daily_returns.std() * np.sqrt(self.periods_per_year)
     
     def calculate_monthly_volatility(self):
         """Calculate monthly volatility"""
-        return self.daily_returns.std() * np.sqrt(21)
+        return self.daily_returns.std() * np.sqrt(self.periods_per_year / 12)
     
     def calculate_daily_volatility(self):
         """Calculate daily volatility"""
-        return self.daily_returns.std()
+        return self.daily_returns.std() * np.sqrt(self.bars_per_day)
     
     def calculate_sharpe_ratio(self):
         """Calculate Sharpe Ratio"""
@@ -117,9 +240,9 @@ class MetricsCalculator:
         
         # Calculate tracking error relative to risk-free rate
         # Risk-free daily return
-        daily_rf_return = self.risk_free_rate / 252
+        daily_rf_return = self.risk_free_rate / self.periods_per_year
         active_returns = self.daily_returns - daily_rf_return
-        tracking_error = active_returns.std() * np.sqrt(252)
+        tracking_error = active_returns.std() * np.sqrt(self.periods_per_year)
         
         if tracking_error == 0 or tracking_error < 0.0001:
             return 0
@@ -133,7 +256,7 @@ class MetricsCalculator:
         downside_returns = self.daily_returns[self.daily_returns < 0]
         if len(downside_returns) == 0:
             return 0
-        downside_volatility = downside_returns.std() * np.sqrt(252)
+        downside_volatility = downside_returns.std() * np.sqrt(self.periods_per_year)
         if downside_volatility == 0:
             return 0
         return excess_return / downside_volatility
@@ -160,16 +283,47 @@ class MetricsCalculator:
         return drawdowns.mean()
     
     def calculate_drawdown_duration(self):
-        """Calculate average drawdown duration in days"""
-        in_drawdown = (self.drawdown < 0).astype(int)
-        drawdown_groups = (in_drawdown.diff() != 0).cumsum()
-        durations = []
-        for group in drawdown_groups.unique():
-            if in_drawdown[drawdown_groups == group].iloc[0] < 0:
-                durations.append(len(drawdown_groups[drawdown_groups == group]))
-        if len(durations) == 0:
+        """Calculate average drawdown duration in bars"""
+        episodes = self.get_drawdown_episodes()
+        if len(episodes) == 0:
+            return 0
+        return episodes['Length'].mean()
+    
+    def calculate_max_drawdown_duration(self):
+        """Calculate the longest drawdown duration in bars"""
+        episodes = self.get_drawdown_episodes()
+        if len(episodes) == 0:
+            return 0
+        return episodes['Length'].max()
+    
+    def calculate_recovery_time(self):
+        """Calculate average bars from trough back to the previous peak"""
+        recovery_times = self.get_drawdown_episodes()['Recovery Time'].dropna()
+        if len(recovery_times) == 0:
             return 0
-        return np.mean(durations)
+        return recovery_times.mean()
+    
+    def get_drawdown_episodes(self):
+        """
+        Index of drawdown episodes (see modules.drawdowns.drawdown_episodes)
+        
+        Returns:
+            pd.DataFrame: One row per episode with Start, Trough, Recovery, Depth,
+                Length and Recovery Time
+        """
+        return self.calculate_metrics(['episodes'])['episodes'].copy()
+    
+    def get_worst_drawdowns(self, n=5):
+        """
+        Deepest drawdown episodes
+        
+        Args:
+            n (int): Number of episodes
+        
+        Returns:
+            pd.DataFrame: Up to n episodes, deepest first
+        """
+        return worst_drawdowns(self.calculate_metrics(['episodes'])['episodes'], n)
     
     def calculate_ulcer_index(self):
         """Calculate Ulcer Index"""
@@ -177,12 +331,14 @@ class MetricsCalculator:
         ui = np.sqrt(squared_drawdowns.mean())
         return ui
     
-    def calculate_var(self, confidence=0.95):
-        """Calculate Value at Risk (VaR)"""
-        return np.percentile(self.daily_returns, (1 - confidence) * 100)
+    def calculate_var(self, confidence=None):
+        """Calculate Value at Risk (VaR) at confidence (default: self.confidence)"""
+        if confidence is None:
+            confidence = self.confidence
+        return np.quantile(self.daily_returns, 1 - confidence)
     
-    def calculate_cvar(self, confidence=0.95):
-        """Calculate Conditional Value at Risk (CVaR)"""
+    def calculate_cvar(self, confidence=None):
+        """Calculate Conditional Value at Risk (CVaR) at confidence (default: self.confidence)"""
         var = self.calculate_var(confidence)
         return self.daily_returns[self.daily_returns <= var].mean()
     
@@ -195,31 +351,42 @@ class MetricsCalculator:
         return stats.kurtosis(self.daily_returns)
     
     def calculate_tracking_error(self, benchmark_daily_return=None):
-        """Calculate Tracking Error"""
+        """Calculate Tracking Error against the benchmark (or the portfolio mean if none)"""
+        if benchmark_daily_return is None:
+            benchmark_daily_return = self.benchmark_returns
         if benchmark_daily_return is None:
             benchmark_daily_return = self.daily_returns.mean()
         active_returns = self.daily_returns - benchmark_daily_return
-        te = active_returns.std() * np.sqrt(252)
+        te = active_returns.std() * np.sqrt(self.periods_per_year)
         return te
     
     def calculate_beta(self, market_returns=None):
-        """Calculate Beta relative to market"""
+        """Calculate Beta relative to market (0 without a benchmark)"""
         if market_returns is None:
-            market_returns = pd.Series(
-                [self.daily_returns.mean()] * len(self.daily_returns),
-                index=self.daily_returns.index
-            )
-        common_index = self.daily_returns.index.intersection(market_returns.index)
-        if len(common_index) < 2:
-            return 0
-        portfolio_ret = self.daily_returns.loc[common_index]
-        market_ret = market_returns.loc[common_index]
+            market_returns = self.benchmark_returns
+        if market_returns is None:
+            return 0
+        if market_returns.index.equals(self.daily_returns.index):
+            portfolio_ret = self.daily_returns
+            market_ret = market_returns
+        else:
+            common_index = self.daily_returns.index.intersection(market_returns.index)
+            portfolio_ret = self.daily_returns.loc[common_index]
+            market_ret = market_returns.loc[common_index]
+        if len(portfolio_ret) < 2:
+            return 0
         covariance = np.cov(portfolio_ret, market_ret)[0, 1]
         market_variance = np.var(market_ret)
         if market_variance == 0:
             return 0
         return covariance / market_variance
     
+    def calculate_alpha(self):
+        """Calculate Jensen's Alpha against the benchmark"""
+        if self.benchmark_returns is None:
+            return 0
+        return self.analyzer.get_portfolio_alpha(self.benchmark_returns, self.risk_free_rate)
+    
     def calculate_recovery_factor(self):
         """Calculate Recovery Factor"""
         total_profit = self.calculate_total_return()
@@ -0,0 +1,287 @@
+"""
+MONTE CARLO MODULE
+Simulates forward portfolio value paths from historical returns (parametric or bootstrap)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+METHODS = ['parametric', 'bootstrap']
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Fan-chart histograms: bins per step, spanning this many standard deviations
+# of log growth either side of its expected value (outliers land in the end bins)
+FAN_BINS = 4096
+FAN_RANGE = 8.0
+
+
+def _fan_grid(log_mean, log_std, horizon):
+    """
+    Histogram bins of log growth for each step of the fan chart
+
+    Args:
+        log_mean (float): Expected log return per bar
+        log_std (float): Standard deviation of the log return per bar
+        horizon (int): Bars per path
+
+    Returns:
+        tuple: (lower edge, bin width) per step, each of length horizon
+    """
+    steps = np.arange(1, horizon + 1)
+    half_width = FAN_RANGE * max(log_std, 1e-8) * np.sqrt(steps)
+    return log_mean * steps - half_width, 2 * half_width / FAN_BINS
+
+
+def _fan_percentiles(counts, lower, width, percentiles):
+    """
+    Percentiles of growth per step from merged log-growth histograms
+
+    Values inside a bin are taken as evenly spread across it and ranks are
+    interpolated linearly, as numpy.percentile does, so each percentile is
+    within half a bin of the exact one.
+
+    Args:
+        counts (np.ndarray): Paths per step and bin (horizon x FAN_BINS)
+        lower (np.ndarray): Lower edge per step
+        width (np.ndarray): Bin width per step
+        percentiles (tuple): Percentiles to read
+
+    Returns:
+        np.ndarray: Growth per percentile and step (len(percentiles) x horizon)
+    """
+    cumulative = np.cumsum(counts, axis=1)
+    n_paths = cumulative[:, -1]
+    rows = np.arange(len(counts))
+    fan = []
+    for p in percentiles:
+        rank = p / 100 * (n_paths - 1)
+        bins = (cumulative <= rank[:, None]).sum(axis=1)
+        in_bin = counts[rows, bins]
+        before = cumulative[rows, bins] - in_bin
+        fan.append(np.exp(lower + width * (bins + (rank - before + 0.5) / in_bin)))
+    return np.array(fan)
+
+
+def _simulate_chunk(method, params, n_paths, horizon, grid, seed):
+    """
+    Simulate one block of paths (module-level so process pools can pickle it)
+
+    Only the block's fan histogram and per-path outcomes are returned, so
+    neither the caller nor a process pool ever holds a block's paths.
+
+    Args:
+        method (str): 'parametric' or 'bootstrap'
+        params (tuple): (mean, std) for parametric, (returns, block_size) for bootstrap
+        n_paths (int): Paths in this block
+        horizon (int): Bars per path
+        grid (tuple): (lower edge, bin width) per step, from _fan_grid
+        seed (np.random.SeedSequence): Seed of this block
+
+    Returns:
+        tuple: (log-growth histogram (horizon x FAN_BINS), terminal growth, max drawdowns)
+    """
+    rng = np.random.default_rng(seed)
+
+    if method == 'parametric':
+        mean, std = params
+        returns = rng.normal(mean, std, (n_paths, horizon))
+    else:
+        history, block_size = params
+        # Moving-block bootstrap, wrapping around the end of history
+        n_blocks = -(-horizon // block_size)
+        starts = rng.integers(0, len(history), (n_paths, n_blocks))
+        index = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :horizon]
+        returns = history[index % len(history)]
+
+    # Reuse the returns array for growth and then for the scratch arrays below
+    growth = np.cumprod(np.add(returns, 1, out=returns), axis=1, out=returns)
+    terminal = growth[:, -1].copy()
+    peak = np.maximum(np.maximum.accumulate(growth, axis=1), 1.0)
+    max_drawdown = np.divide(growth, peak, out=peak).min(axis=1) - 1
+    del peak
+
+    lower, width = grid
+    scaled = np.log(growth, out=growth)
+    scaled -= lower
+    scaled /= width
+    bins = scaled.astype(np.int64)
+    del growth, scaled, returns
+    np.clip(bins, 0, FAN_BINS - 1, out=bins)
+    bins += np.arange(horizon) * FAN_BINS
+    counts = np.bincount(bins.ravel(), minlength=horizon * FAN_BINS).reshape(horizon, FAN_BINS)
+    return counts, terminal, max_drawdown
+
+
+def _merge_blocks(blocks, horizon):
+    """
+    Combine chunk results as they arrive, so only one histogram is held at a time
+
+    Args:
+        blocks (iterable): _simulate_chunk results
+        horizon (int): Bars per path
+
+    Returns:
+        tuple: (summed histogram, terminal growth, max drawdowns)
+    """
+    counts = np.zeros((horizon, FAN_BINS), dtype=np.int64)
+    terminal_growth, max_drawdowns = [], []
+    for block_counts, block_terminal, block_drawdowns in blocks:
+        counts += block_counts
+        terminal_growth.append(block_terminal)
+        max_drawdowns.append(block_drawdowns)
+    return counts, np.concatenate(terminal_growth), np.concatenate(max_drawdowns)
+
+
+class SimulationResult:
+    """
+    Output of a Monte Carlo run
+
+    Attributes:
+        fan (pd.DataFrame): Portfolio value percentiles per step (rows 0..horizon,
+            one column per percentile, e.g. 'P5', 'P50'), read from histograms
+            of all paths and within half a bin of the exact percentiles
+        terminal_values (np.ndarray): Portfolio value at the horizon, one per path
+        max_drawdowns (np.ndarray): Worst drawdown along each path (negative)
+    """
+
+    def __init__(self, fan, terminal_values, max_drawdowns, initial_investment, method, horizon):
+        self.fan = fan
+        self.terminal_values = terminal_values
+        self.max_drawdowns = max_drawdowns
+        self.initial_investment = initial_investment
+        self.method = method
+        self.horizon = horizon
+
+    @property
+    def n_paths(self):
+        """Number of simulated paths"""
+        return len(self.terminal_values)
+
+    def summary(self, confidence=0.95):
+        """
+        Headline statistics of the simulated distribution
+
+        Args:
+            confidence (float): Confidence level for VaR / CVaR of the terminal return
+
+        Returns:
+            dict: Expected and median terminal value, probability of loss, VaR, CVaR
+                and median / worst-case maximum drawdown
+        """
+        terminal_returns = self.terminal_values / self.initial_investment - 1
+        var = np.percentile(terminal_returns, (1 - confidence) * 100)
+        return {
+            'Expected Value': float(self.terminal_values.mean()),
+            'Median Value': float(np.median(self.terminal_values)),
+            'Probability of Loss': float((terminal_returns < 0).mean()),
+            'Value at Risk': float(var),
+            'Conditional Value at Risk': float(terminal_returns[terminal_returns <= var].mean()),
+            'Median Max Drawdown': float(np.median(self.max_drawdowns)),
+            'Worst Max Drawdown': float(np.percentile(self.max_drawdowns, (1 - confidence) * 100)),
+        }
+
+
+class MonteCarloSimulator:
+    """
+    Vectorised Monte Carlo simulation of a PortfolioAnalyzer's portfolio
+
+    Weights are held constant (rebalanced every bar, as PortfolioAnalyzer
+    computes its returns), so the portfolio return of a simulated bar is
+    ``stock returns @ weights``. For the parametric model that is exactly
+    normal with mean ``w . mu`` and variance ``w' Sigma w``, so paths are drawn
+    from that projection of the multivariate normal instead of per stock. The
+    bootstrap resamples whole historical bars (block_size=1) or blocks of
+    consecutive bars, which keeps cross-stock correlation, fat tails and, for
+    longer blocks, volatility clustering.
+
+    Paths are generated in chunks and each chunk is reduced to a histogram
+    of log growth per step (FAN_BINS counts per bar, 8 MB for a one-year
+    daily horizon) plus each path's terminal value and maximum drawdown, so
+    memory is bounded by chunk_size whatever the number of paths. The
+    histograms add up across chunks and the fan is read from their sum.
+    Each chunk gets its own child of one SeedSequence, so a seeded run gives
+    the same result whether the chunks run in this process or in a process
+    pool.
+    """
+
+    def __init__(self, analyzer, method='parametric', block_size=1, seed=None, chunk_size=10000, n_jobs=1):
+        """
+        Initialize the simulator
+
+        Args:
+            analyzer (PortfolioAnalyzer): Portfolio whose returns drive the simulation
+            method (str): 'parametric' (multivariate normal) or 'bootstrap'
+            block_size (int): Bars per bootstrap block (1 = plain historical bootstrap)
+            seed (int): Random seed (None for a fresh run each time)
+            chunk_size (int): Paths simulated per block
+            n_jobs (int): Worker processes (1 runs in this process)
+        """
+        if method not in METHODS:
+            raise Exception(f"Unknown simulation method: {method} (expected one of {', '.join(METHODS)})")
+
+        returns = analyzer.daily_returns
+        if len(returns) < 2:
+            raise Exception("Not enough history to simulate from")
+
+        self.analyzer = analyzer
+        self.method = method
+        self.block_size = max(int(block_size), 1)
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.periods_per_year = getattr(analyzer, 'periods_per_year', 252)
+
+        weights = analyzer.weight_array
+        if method == 'parametric':
+            mean = returns.mean().to_numpy() @ weights
+            covariance = returns.cov().to_numpy()
+            self._params = (float(mean), float(np.sqrt(max(weights @ covariance @ weights, 0.0))))
+            # Log return of a normal return, to second order
+            self._log_moments = (np.log1p(self._params[0]) - self._params[1] ** 2 / 2, self._params[1])
+        else:
+            self._params = (analyzer.portfolio_returns.to_numpy(dtype=np.float64), self.block_size)
+            log_returns = np.log1p(self._params[0])
+            self._log_moments = (float(log_returns.mean()), float(log_returns.std()))
+
+    def simulate(self, n_paths=10000, horizon=None, initial_investment=100000,
+                 percentiles=DEFAULT_PERCENTILES):
+        """
+        Simulate forward portfolio value paths
+
+        Args:
+            n_paths (int): Number of paths
+            horizon (int): Bars to simulate (default: one year of the analyzer's interval)
+            initial_investment (float): Starting portfolio value
+            percentiles (tuple): Percentiles for the fan chart
+
+        Returns:
+            SimulationResult: Fan chart, terminal values and drawdowns
+        """
+        if n_paths < 1:
+            raise Exception("Simulate at least one path")
+        horizon = int(horizon or self.periods_per_year)
+        percentiles = tuple(percentiles)
+        sizes = [min(self.chunk_size, n_paths - i) for i in range(0, n_paths, self.chunk_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        grid = _fan_grid(*self._log_moments, horizon)
+        jobs = [(self.method, self._params, size, horizon, grid, seed) for size, seed in zip(sizes, seeds)]
+
+        if self.n_jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(jobs))) as executor:
+                counts, terminal_growth, max_drawdowns = _merge_blocks(
+                    executor.map(_simulate_chunk, *zip(*jobs)), horizon)
+        else:
+            counts, terminal_growth, max_drawdowns = _merge_blocks(
+                (_simulate_chunk(*job) for job in jobs), horizon)
+
+        # Percentiles of all paths together, read from the summed histograms
+        fan = _fan_percentiles(counts, *grid, percentiles)
+        fan = np.hstack([np.ones((len(percentiles), 1)), fan]) * initial_investment
+        fan = pd.DataFrame(fan.T, index=pd.RangeIndex(horizon + 1, name='Step'),
+                           columns=[f"P{p:g}" for p in percentiles])
+
+        terminal_values = terminal_growth * initial_investment
+        return SimulationResult(fan, terminal_values, max_drawdowns, initial_investment, self.method, horizon)
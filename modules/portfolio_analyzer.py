@@ -7,12 +7,22 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from modules.column_metrics import column_metrics
+from modules.intervals import bars_per_year
+from modules.row_buffer import BufferedRows
+
 class PortfolioAnalyzer:
     """
     Analyzes portfolio performance and characteristics
     """
     
-    def __init__(self, stocks, weights, price_data):
+    # Series that append() grows in place (see modules.row_buffer)
+    price_data = BufferedRows()
+    daily_returns = BufferedRows()
+    portfolio_returns = BufferedRows()
+    benchmark_returns = BufferedRows()
+    
+    def __init__(self, stocks, weights, price_data, benchmark_prices=None, interval='1d', returns=None):
         """
         Initialize portfolio analyzer
         
@@ -20,11 +30,19 @@ class PortfolioAnalyzer:
             stocks (list): List of stock symbols
             weights (dict): Dictionary of {stock: weight_percentage}
             price_data (pd.DataFrame): Historical price data
+            benchmark_prices (pd.Series): Benchmark closes on the same dates as price_data
+            interval (str): Bar interval of price_data ('1d', '15m', ...)
+            returns (pd.DataFrame): Precomputed returns of price_data (e.g. FetchResult.returns,
+                sliced from the shared universe returns matrix); computed here if None
         """
         self.stocks = stocks
         self.weights = weights
         self.price_data = price_data
         
+        # Bars in a trading year, used for every annualisation
+        self.interval = interval
+        self.periods_per_year = bars_per_year(interval)
+        
         # Normalize weights (ensure they sum to 100%)
         total_weight = sum(weights.values())
         self.weights_normalized = {k: v/total_weight for k, v in weights.items()}
@@ -32,9 +50,77 @@ class PortfolioAnalyzer:
         # Convert to array for calculations
         self.weight_array = np.array([self.weights_normalized[stock] for stock in stocks])
         
-        # Calculate returns
-        self.daily_returns = price_data.pct_change().dropna()
-        self.portfolio_returns = (self.daily_returns * self.weight_array).sum(axis=1)
+        # Calculate returns (or reuse the shared matrix's columns)
+        if returns is not None:
+            self.daily_returns = returns[stocks] if list(returns.columns) != list(stocks) else returns
+        else:
+            self.daily_returns = price_data[stocks].pct_change().dropna()
+        
+        # One matrix-vector product for the portfolio series
+        self.portfolio_returns = pd.Series(
+            self.daily_returns.to_numpy() @ self.weight_array,
+            index=self.daily_returns.index
+        )
+        
+        # Benchmark returns share the portfolio's index, so beta/alpha need no re-alignment
+        self.benchmark_returns = None
+        self._last_benchmark_price = None
+        if benchmark_prices is not None:
+            if not benchmark_prices.index.equals(price_data.index):
+                benchmark_prices = benchmark_prices.reindex(price_data.index).ffill()
+            self.benchmark_returns = benchmark_prices.pct_change().reindex(self.portfolio_returns.index).fillna(0)
+            if len(benchmark_prices):
+                self._last_benchmark_price = benchmark_prices.iloc[-1]
+    
+    def append(self, prices, benchmark_price=None):
+        """
+        Add one new bar without recomputing the history
+        
+        Only the new bar's returns are computed; they are written into the
+        preallocated buffers behind price_data, daily_returns,
+        portfolio_returns and benchmark_returns, so the history is not copied.
+        
+        Args:
+            prices (pd.Series): Closes of the new bar indexed by stock, named by its date
+            benchmark_price (float): Benchmark close of the new bar (optional)
+        
+        Returns:
+            tuple: (portfolio return, benchmark return or None) of the new bar
+        """
+        date = pd.Timestamp(prices.name)
+        price_rows = self._price_data
+        if len(price_rows) == 0:
+            raise Exception("Cannot append to a portfolio without price history")
+        if date <= price_rows.last_date:
+            raise Exception(f"New bar {date} is not after the last bar {price_rows.last_date}")
+        
+        # Work on numpy rows: pandas alignment would cost more than the update itself
+        last_row = np.asarray(price_rows.last(), dtype=np.float64)
+        row = prices.reindex(price_rows.columns).to_numpy(dtype=np.float64)
+        positions = price_rows.columns.get_indexer(self.stocks)
+        missing = [stock for stock, price in zip(self.stocks, row[positions]) if np.isnan(price)]
+        if missing:
+            raise Exception(f"New bar has no price for {', '.join(missing)}")
+        
+        stock_returns = row[positions] / last_row[positions] - 1
+        portfolio_return = float(stock_returns @ self.weight_array)
+        
+        # Other columns of price_data carry their last price forward
+        row = np.where(np.isnan(row), last_row, row)
+        price_rows.append(date, row)
+        self._daily_returns.append(date, stock_returns)
+        self._portfolio_returns.append(date, portfolio_return)
+        
+        benchmark_return = None
+        if self._benchmark_returns is not None:
+            benchmark_return = 0.0
+            if benchmark_price is not None and self._last_benchmark_price:
+                benchmark_return = float(benchmark_price / self._last_benchmark_price - 1)
+            if benchmark_price is not None:
+                self._last_benchmark_price = benchmark_price
+            self._benchmark_returns.append(date, benchmark_return)
+        
+        return portfolio_return, benchmark_return
     
     def get_portfolio_value(self, initial_investment=100000):
         """
@@ -115,28 +201,43 @@ class PortfolioAnalyzer:
         Returns:
             pd.DataFrame: Performance metrics for each stock
         """
-        performances = []
-        
-        for stock in self.stocks:
-            returns = self.price_data[stock].pct_change().dropna()
-            
-            # CAGR
-            total_return = (self.price_data[stock].iloc[-1] / self.price_data[stock].iloc[0]) - 1
-            num_years = len(self.price_data) / 252  # Trading days in a year
-            cagr = (1 + total_return) ** (1 / num_years) - 1
-            
-            # Volatility
-            volatility = returns.std() * np.sqrt(252)
-            
-            performances.append({
-                'Stock': stock,
-                'CAGR': cagr,
-                'Volatility': volatility,
-                'Total Return': total_return,
-                'Sharpe Ratio': (cagr - 0.065) / volatility if volatility > 0 else 0
-            })
-        
-        return pd.DataFrame(performances).sort_values('CAGR', ascending=False)
+        # Every stock at once: each figure is one column-wise operation
+        prices = self.price_data[self.stocks]
+        
+        # CAGR
+        total_return = (prices.iloc[-1] / prices.iloc[0]).to_numpy() - 1
+        num_years = len(self.price_data) / self.periods_per_year
+        cagr = (1 + total_return) ** (1 / num_years) - 1
+        
+        # Volatility
+        volatility = self.daily_returns[self.stocks].std().to_numpy() * np.sqrt(self.periods_per_year)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sharpe = np.where(volatility > 0, (cagr - 0.065) / volatility, 0)
+        
+        performances = pd.DataFrame({
+            'Stock': self.stocks,
+            'CAGR': cagr,
+            'Volatility': volatility,
+            'Total Return': total_return,
+            'Sharpe Ratio': sharpe
+        })
+        
+        return performances.sort_values('CAGR', ascending=False)
+    
+    def get_stock_metrics(self, risk_free_rate=0.065):
+        """
+        All portfolio metrics for each stock on its own, in one vectorised call
+        
+        Args:
+            risk_free_rate (float): Annual risk-free rate
+        
+        Returns:
+            pd.DataFrame: One row per stock, one column per metric
+                (the MetricsCalculator.calculate_all_metrics keys)
+        """
+        return column_metrics(self.daily_returns[self.stocks], self.benchmark_returns,
+                              risk_free_rate, self.interval)
     
     def get_portfolio_concentration(self):
         """
@@ -152,21 +253,29 @@ class PortfolioAnalyzer:
         
         return max(0, min(1, hhi))  # Ensure 0-1 range
     
-    def get_portfolio_beta(self, benchmark_returns):
+    def get_portfolio_beta(self, benchmark_returns=None):
         """
         Calculate portfolio beta relative to benchmark
         
         Args:
-            benchmark_returns (pd.Series): Benchmark returns
+            benchmark_returns (pd.Series): Benchmark returns (default: the aligned benchmark)
         
         Returns:
             float: Portfolio beta
         """
-        # Ensure same length
-        common_index = self.portfolio_returns.index.intersection(benchmark_returns.index)
+        if benchmark_returns is None:
+            benchmark_returns = self.benchmark_returns
+        if benchmark_returns is None:
+            return 0
         
-        portfolio_ret = self.portfolio_returns.loc[common_index]
-        bench_ret = benchmark_returns.loc[common_index]
+        # Ensure same length (the aligned benchmark already matches)
+        if benchmark_returns.index.equals(self.portfolio_returns.index):
+            portfolio_ret = self.portfolio_returns
+            bench_ret = benchmark_returns
+        else:
+            common_index = self.portfolio_returns.index.intersection(benchmark_returns.index)
+            portfolio_ret = self.portfolio_returns.loc[common_index]
+            bench_ret = benchmark_returns.loc[common_index]
         
         # Calculate covariance
         covariance = np.cov(portfolio_ret, bench_ret)[0, 1]
@@ -176,20 +285,25 @@ class PortfolioAnalyzer:
         
         return beta
     
-    def get_portfolio_alpha(self, benchmark_returns, risk_free_rate=0.065):
+    def get_portfolio_alpha(self, benchmark_returns=None, risk_free_rate=0.065):
         """
         Calculate Jensen's Alpha
         
         Args:
-            benchmark_returns (pd.Series): Benchmark returns
+            benchmark_returns (pd.Series): Benchmark returns (default: the aligned benchmark)
             risk_free_rate (float): Risk-free rate for CAPM
         
         Returns:
             float: Annual alpha
         """
+        if benchmark_returns is None:
+            benchmark_returns = self.benchmark_returns
+        if benchmark_returns is None:
+            return 0
+        
         # Calculate returns
-        portfolio_return = self.portfolio_returns.mean() * 252  # Annualized
-        benchmark_return = benchmark_returns.mean() * 252
+        portfolio_return = self.portfolio_returns.mean() * self.periods_per_year  # Annualized
+        benchmark_return = benchmark_returns.mean() * self.periods_per_year
         
         # Calculate beta
         beta = self.get_portfolio_beta(benchmark_returns)
@@ -0,0 +1,202 @@
+"""
+PORTFOLIO OPTIMIZER MODULE
+Mean-variance optimisation (minimum variance, maximum Sharpe, target return) and the efficient frontier
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from modules.intervals import bars_per_year
+
+
+class PortfolioOptimizer:
+    """
+    Long-only mean-variance optimiser
+
+    Expected returns and the covariance matrix are annualised once from the
+    bar returns; every solve is a small SLSQP problem over them with
+    analytic gradients, weights bounded to [min_weight, max_weight] and
+    summing to 100%. Frontier points are solved in order of target return,
+    each starting from the previous point's weights, so successive solves
+    only take a few iterations.
+    """
+
+    def __init__(self, returns, risk_free_rate=0.065, interval='1d', min_weight=0.0, max_weight=1.0):
+        """
+        Initialize the optimizer
+
+        Args:
+            returns (pd.DataFrame): Bar returns, one column per stock
+                (e.g. PortfolioAnalyzer.daily_returns)
+            risk_free_rate (float): Annual risk-free rate
+            interval (str): Bar interval, for annualisation
+            min_weight (float): Lowest weight per stock (fraction, 0 = long-only)
+            max_weight (float): Highest weight per stock (fraction, e.g. 0.2 caps each at 20%)
+        """
+        self.stocks = list(returns.columns)
+        n_stocks = len(self.stocks)
+        if n_stocks == 0:
+            raise Exception("No stocks to optimise")
+        if min_weight < 0 or min_weight * n_stocks > 1 or max_weight * n_stocks < 1:
+            raise Exception(f"Weight limits {min_weight:.0%}-{max_weight:.0%} cannot add up to 100% "
+                            f"over {n_stocks} stocks")
+
+        self.risk_free_rate = risk_free_rate
+        self.min_weight = min_weight
+        self.max_weight = max_weight
+
+        periods_per_year = bars_per_year(interval)
+        clean = returns.dropna()
+        self.expected_returns = clean.mean().to_numpy() * periods_per_year
+        self.covariance = clean.cov().to_numpy() * periods_per_year
+        self._bounds = [(min_weight, max_weight)] * n_stocks
+        self._budget = {'type': 'eq', 'fun': lambda w: w.sum() - 1, 'jac': lambda w: np.ones_like(w)}
+
+    @classmethod
+    def from_analyzer(cls, analyzer, risk_free_rate=0.065, **options):
+        """
+        Build an optimizer over a PortfolioAnalyzer's stocks and returns
+
+        Args:
+            analyzer (PortfolioAnalyzer): Source of returns
+            risk_free_rate (float): Annual risk-free rate
+
+        Returns:
+            PortfolioOptimizer: Optimizer
+        """
+        return cls(analyzer.daily_returns, risk_free_rate, getattr(analyzer, 'interval', '1d'), **options)
+
+    def _variance(self, w):
+        grad = 2 * self.covariance @ w
+        return w @ grad / 2, grad
+
+    def _negative_sharpe(self, w):
+        cov_w = self.covariance @ w
+        vol = np.sqrt(max(w @ cov_w, 1e-18))
+        excess = w @ self.expected_returns - self.risk_free_rate
+        sharpe = excess / vol
+        grad = -(self.expected_returns / vol - excess * cov_w / vol ** 3)
+        return -sharpe, grad
+
+    def _start(self, x0=None):
+        if x0 is not None:
+            return np.asarray(x0, dtype=np.float64)
+        return np.full(len(self.stocks), 1 / len(self.stocks))
+
+    def _solve(self, objective, x0, constraints=()):
+        solution = minimize(objective, x0, jac=True, method='SLSQP', bounds=self._bounds,
+                            constraints=[self._budget, *constraints],
+                            options={'ftol': 1e-10, 'maxiter': 500})
+        if not solution.success:
+            raise Exception(f"Optimisation failed: {solution.message}")
+        weights = np.clip(solution.x, self.min_weight, self.max_weight)
+        return weights / weights.sum()
+
+    def _describe(self, weights):
+        expected = float(weights @ self.expected_returns)
+        volatility = float(np.sqrt(max(weights @ self.covariance @ weights, 0.0)))
+        return {
+            'Weights': {stock: float(w * 100) for stock, w in zip(self.stocks, weights)},
+            'Expected Return': expected,
+            'Volatility': volatility,
+            'Sharpe Ratio': (expected - self.risk_free_rate) / volatility if volatility > 0 else 0,
+        }
+
+    def min_variance(self, x0=None):
+        """
+        Lowest-volatility portfolio
+
+        Args:
+            x0 (array): Starting weights (fractions, default equal weight)
+
+        Returns:
+            dict: Weights ({stock: %}), Expected Return, Volatility and Sharpe Ratio (annual)
+        """
+        return self._describe(self._solve(self._variance, self._start(x0)))
+
+    def max_sharpe(self, x0=None):
+        """
+        Tangency portfolio (highest Sharpe ratio)
+
+        Args:
+            x0 (array): Starting weights (fractions, default equal weight)
+
+        Returns:
+            dict: Weights ({stock: %}), Expected Return, Volatility and Sharpe Ratio (annual)
+        """
+        return self._describe(self._solve(self._negative_sharpe, self._start(x0)))
+
+    def target_return(self, target, x0=None):
+        """
+        Lowest-volatility portfolio with a given expected return
+
+        Args:
+            target (float): Annual expected return (e.g. 0.15)
+            x0 (array): Starting weights (fractions, default equal weight)
+
+        Returns:
+            dict: Weights ({stock: %}), Expected Return, Volatility and Sharpe Ratio (annual)
+        """
+        low, high = self.return_range()
+        if not low - 1e-9 <= target <= high + 1e-9:
+            raise Exception(f"Target return {target:.2%} is outside the achievable "
+                            f"{low:.2%} to {high:.2%}")
+        return self._describe(self._solve(self._variance, self._start(x0), [self._target(target)]))
+
+    def _target(self, target):
+        mu = self.expected_returns
+        return {'type': 'eq', 'fun': lambda w: w @ mu - target, 'jac': lambda w: mu}
+
+    def _extreme_weights(self, highest):
+        """Weights with the highest (or lowest) expected return within the limits"""
+        weights = np.full(len(self.stocks), self.min_weight)
+        remaining = 1 - weights.sum()
+        order = np.argsort(-self.expected_returns if highest else self.expected_returns)
+        for i in order:
+            step = min(self.max_weight - self.min_weight, remaining)
+            weights[i] += step
+            remaining -= step
+            if remaining <= 0:
+                break
+        return weights
+
+    def return_range(self):
+        """
+        Lowest and highest expected return achievable within the weight limits
+
+        Returns:
+            tuple: (lowest, highest) annual expected return
+        """
+        mu = self.expected_returns
+        return float(self._extreme_weights(False) @ mu), float(self._extreme_weights(True) @ mu)
+
+    def efficient_frontier(self, n_points=50):
+        """
+        Minimum-volatility portfolios from the minimum-variance return up to the highest achievable return
+
+        Args:
+            n_points (int): Number of frontier points
+
+        Returns:
+            pd.DataFrame: One row per point with Expected Return, Volatility and
+                Sharpe Ratio columns followed by each stock's weight (%)
+        """
+        weights = self._solve(self._variance, self._start())
+        low = float(weights @ self.expected_returns)
+        high = self.return_range()[1]
+
+        rows = []
+        targets = np.linspace(low, high, n_points)
+        for i, target in enumerate(targets):
+            if i == len(targets) - 1 and i > 0:
+                # The highest return has a single portfolio; SLSQP struggles on that vertex
+                weights = self._extreme_weights(True)
+            elif i > 0:
+                # Warm start from the previous point
+                weights = self._solve(self._variance, weights, [self._target(target)])
+            point = self._describe(weights)
+            rows.append({'Expected Return': point['Expected Return'], 'Volatility': point['Volatility'],
+                         'Sharpe Ratio': point['Sharpe Ratio'], **point['Weights']})
+
+        return pd.DataFrame(rows)
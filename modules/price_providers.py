@@ -0,0 +1,324 @@
+"""
+PRICE PROVIDERS MODULE
+Interchangeable sources of historical prices (Yahoo Finance, local mirror, synthetic)
+"""
+
+import os
+import zlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Fields every provider returns, matching yfinance's column layout
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+
+def _to_yahoo_layout(frames):
+    """
+    Combine per-symbol OHLCV frames into yfinance's (field, ticker) layout
+
+    Args:
+        frames (dict): {symbol: DataFrame with FIELDS columns}
+
+    Returns:
+        pd.DataFrame: MultiIndex columns (Price, Ticker)
+    """
+    if not frames:
+        columns = pd.MultiIndex.from_tuples([], names=['Price', 'Ticker'])
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='Date'))
+
+    combined = pd.concat(frames, axis=1)  # (ticker, field)
+    combined = combined.swaplevel(0, 1, axis=1).sort_index(axis=1)
+    combined.columns.names = ['Price', 'Ticker']
+    combined.index.name = 'Date'
+    return combined
+
+
+def is_retryable_error(error):
+    """
+    Check whether a download error is transient (rate limit, outage, timeout)
+
+    Args:
+        error (Exception): Error raised by a provider
+
+    Returns:
+        bool: True if the same request may succeed later
+    """
+    if type(error).__name__ in ('YFRateLimitError', 'CircuitOpenError'):
+        return True
+    error_str = str(error).lower()
+    return any(keyword in error_str for keyword in
+               ['rate', 'too many', 'throttle', '429', '503', 'timeout', 'timed out', 'circuit open'])
+
+
+class PriceProvider:
+    """
+    Base class for price sources
+
+    Providers return frames in yfinance's (field, ticker) column layout so the
+    rest of the data layer does not care where prices came from.
+    """
+
+    name = 'base'
+
+    # Whether requests count against a remote rate limit
+    rate_limited = False
+
+    def download(self, symbols, start=None, end=None, interval='1d'):
+        """
+        Download bars for a list of symbols
+
+        Args:
+            symbols (list): Yahoo symbols (e.g. ['TCS.NS', '^NSEI'])
+            start (pd.Timestamp): First date (None for full history)
+            end (pd.Timestamp): Last date (None for latest)
+            interval (str): Bar interval
+
+        Returns:
+            pd.DataFrame: Bars with (field, ticker) MultiIndex columns
+        """
+        raise NotImplementedError
+
+
+class YahooProvider(PriceProvider):
+    """
+    Live prices from Yahoo Finance
+
+    Each symbol is requested with ``Ticker.history`` (which is what
+    ``yf.download`` does internally) because ``yf.download`` keeps its results
+    in module-level globals and is not safe to call from several threads.
+    Retries and pacing are left to the FetchScheduler.
+
+    Bars are downloaded unadjusted, so Close is the traded close and Adj Close
+    the split- and dividend-adjusted close Yahoo reports next to it.
+    """
+
+    name = 'yahoo'
+    rate_limited = True
+
+    def __init__(self, timeout=60):
+        """
+        Initialize the Yahoo provider
+
+        Args:
+            timeout (int): Request timeout in seconds
+        """
+        self.timeout = timeout
+
+    def download(self, symbols, start=None, end=None, interval='1d'):
+        import yfinance as yf
+
+        kwargs = {}
+        if start is not None:
+            kwargs['start'] = pd.Timestamp(start).strftime('%Y-%m-%d')
+        else:
+            kwargs['period'] = 'max'
+        if end is not None:
+            kwargs['end'] = (pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+        frames = {}
+        for symbol in symbols:
+            try:
+                history = yf.Ticker(symbol).history(
+                    interval=interval,
+                    auto_adjust=False,
+                    actions=False,
+                    timeout=self.timeout,
+                    raise_errors=True,
+                    **kwargs
+                )
+            except Exception as e:
+                if is_retryable_error(e):
+                    raise
+                # Delisted or unknown symbols are left out; the caller sees them as missing
+                print(f"⚠️ No data for {symbol}: {str(e)}")
+                continue
+
+            if history.empty:
+                continue
+            history.index = history.index.tz_localize(None) if history.index.tz is not None else history.index
+            if 'Adj Close' not in history.columns:
+                # Intraday bars carry no adjustment
+                history['Adj Close'] = history['Close']
+            frames[symbol] = history[FIELDS]
+
+        return _to_yahoo_layout(frames)
+
+
+class LocalDirectoryProvider(PriceProvider):
+    """
+    Prices read from a local mirror directory
+
+    The directory holds one file per symbol named ``<SYMBOL>.parquet`` or
+    ``<SYMBOL>.csv`` with a date index (or ``Date`` column) and at least a
+    ``Close`` column. Missing OHLC fields are filled from Close.
+    """
+
+    name = 'local'
+
+    def __init__(self, root):
+        """
+        Initialize the local provider
+
+        Args:
+            root (str): Mirror directory
+        """
+        if not root or not os.path.isdir(root):
+            raise ValueError(f"Local price directory not found: {root}")
+        self.root = root
+
+    def _read(self, symbol):
+        for ext in ('.parquet', '.csv'):
+            path = os.path.join(self.root, f"{symbol}{ext}")
+            if not os.path.exists(path):
+                continue
+            if ext == '.parquet':
+                frame = pd.read_parquet(path)
+            else:
+                frame = pd.read_csv(path)
+            if 'Date' in frame.columns:
+                frame = frame.set_index('Date')
+            frame.index = pd.to_datetime(frame.index)
+            return frame.sort_index()
+        return None
+
+    def download(self, symbols, start=None, end=None, interval='1d'):
+        if interval != '1d':
+            raise ValueError(f"Local mirror only holds daily bars, not {interval}")
+
+        frames = {}
+        for symbol in symbols:
+            frame = self._read(symbol)
+            if frame is None or 'Close' not in frame.columns:
+                continue
+            frame = frame.loc[start:end]
+            for field in FIELDS:
+                if field not in frame.columns:
+                    frame[field] = 0 if field == 'Volume' else frame['Close']
+            frames[symbol] = frame[FIELDS]
+
+        return _to_yahoo_layout(frames)
+
+
+class SyntheticProvider(PriceProvider):
+    """
+    Deterministic geometric Brownian motion prices for offline benchmarking
+
+    Each symbol's path is generated from a fixed origin date with a seed
+    derived from the symbol, so any date window returns the same prices on
+    every run and machine.
+    """
+
+    name = 'synthetic'
+
+    ORIGIN = pd.Timestamp('2000-01-03')
+
+    def __init__(self, seed=42, annual_drift=0.10, annual_volatility=0.25, start_price=1000.0):
+        """
+        Initialize the synthetic provider
+
+        Args:
+            seed (int): Base random seed
+            annual_drift (float): Expected annual log return
+            annual_volatility (float): Annual volatility
+            start_price (float): Price on the origin date
+        """
+        self.seed = seed
+        self.annual_drift = annual_drift
+        self.annual_volatility = annual_volatility
+        self.start_price = start_price
+
+    def _path(self, symbol, dates):
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode('utf-8'))])
+        dt = 1 / 252
+        vol = self.annual_volatility * rng.uniform(0.6, 1.4)
+        drift = (self.annual_drift - 0.5 * vol ** 2) * dt
+        log_returns = rng.normal(drift, vol * np.sqrt(dt), len(dates))
+        log_returns[0] = 0.0
+        close = self.start_price * np.exp(np.cumsum(log_returns))
+
+        spread = np.abs(rng.normal(0, vol * np.sqrt(dt) / 2, len(dates)))
+        open_ = close * np.exp(rng.normal(0, vol * np.sqrt(dt) / 4, len(dates)))
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Adj Close': close,
+            'Volume': rng.integers(100_000, 5_000_000, len(dates)),
+        }, index=dates)
+
+    def download(self, symbols, start=None, end=None, interval='1d'):
+        if interval != '1d':
+            raise ValueError(f"Synthetic provider only generates daily bars, not {interval}")
+
+        last = pd.Timestamp(end if end is not None else datetime.now()).normalize()
+        dates = pd.bdate_range(self.ORIGIN, last)
+
+        frames = {symbol: self._path(symbol, dates).loc[start:end] for symbol in symbols}
+        return _to_yahoo_layout(frames)
+
+
+class FailoverProvider(PriceProvider):
+    """
+    Tries each provider in turn, e.g. Yahoo first and a local mirror when throttled
+    """
+
+    name = 'failover'
+
+    def __init__(self, providers):
+        """
+        Initialize the failover chain
+
+        Args:
+            providers (list): PriceProvider instances in priority order
+        """
+        self.providers = providers
+        self.rate_limited = any(provider.rate_limited for provider in providers)
+
+    def download(self, symbols, start=None, end=None, interval='1d'):
+        errors = []
+        for provider in self.providers:
+            try:
+                return provider.download(symbols, start=start, end=end, interval=interval)
+            except Exception as e:
+                errors.append(f"{provider.name}: {str(e)}")
+                print(f"⚠️ {provider.name} provider failed, trying next source...")
+        raise Exception(f"All price providers failed: {'; '.join(errors)}")
+
+
+def get_provider(name=None, **options):
+    """
+    Build a price provider from explicit arguments or environment config
+
+    Environment variables:
+        PRICE_PROVIDER: 'yahoo' (default), 'local' or 'synthetic'
+        PRICE_PROVIDER_DIR: Mirror directory for the local provider
+        PRICE_PROVIDER_SEED: Seed for the synthetic provider
+        PRICE_PROVIDER_FALLBACK: Provider to fall back to when the first fails
+
+    Args:
+        name (str): Provider name (overrides PRICE_PROVIDER)
+        **options: Provider constructor arguments
+
+    Returns:
+        PriceProvider: Configured provider
+    """
+    name = (name or os.environ.get('PRICE_PROVIDER', 'yahoo')).lower()
+
+    if name == 'yahoo':
+        provider = YahooProvider(**options)
+    elif name == 'local':
+        options.setdefault('root', os.environ.get('PRICE_PROVIDER_DIR'))
+        provider = LocalDirectoryProvider(**options)
+    elif name == 'synthetic':
+        options.setdefault('seed', int(os.environ.get('PRICE_PROVIDER_SEED', 42)))
+        provider = SyntheticProvider(**options)
+    else:
+        raise ValueError(f"Unknown price provider: {name}")
+
+    fallback = os.environ.get('PRICE_PROVIDER_FALLBACK')
+    if fallback and fallback.lower() != name:
+        provider = FailoverProvider([provider, get_provider(fallback)])
+
+    return provider
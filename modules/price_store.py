@@ -0,0 +1,277 @@
+"""
+PRICE STORE MODULE
+Persistent on-disk cache of daily OHLCV bars, one Parquet partition per ticker
+"""
+
+import os
+import json
+import threading
+import pandas as pd
+from datetime import datetime
+
+# Default cache location (inside the project, ignored by git)
+DEFAULT_CACHE_DIR = os.environ.get(
+    'PRICE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'prices')
+)
+
+
+def period_start(period, today=None):
+    """
+    Convert a Yahoo style period string into a start date
+
+    Args:
+        period (str): Period such as '5d', '6mo', '1y', '10y' or 'max'
+        today (pd.Timestamp): Reference date (default: today)
+
+    Returns:
+        pd.Timestamp: First calendar date covered by the period (None for 'max')
+    """
+    today = pd.Timestamp(today if today is not None else datetime.now()).normalize()
+    period = str(period).strip().lower()
+
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return pd.Timestamp(year=today.year, month=1, day=1)
+
+    for suffix, unit in (('mo', 'months'), ('y', 'years'), ('wk', 'weeks'), ('d', 'days')):
+        if period.endswith(suffix):
+            count = int(period[:-len(suffix)])
+            return today - pd.DateOffset(**{unit: count})
+
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class PriceStore:
+    """
+    Restart-surviving price cache
+
+    Each ticker is stored as its own Parquet file so that a portfolio only
+    reads the columns it needs. A small JSON manifest records, per ticker,
+    the earliest date ever requested from the provider and when the tail
+    was last checked, so the fetcher can ask only for missing bars.
+    """
+
+    MANIFEST = '_manifest.json'
+
+    def __init__(self, cache_dir=None, keep_in_memory=True):
+        """
+        Initialize the price store
+
+        Args:
+            cache_dir (str): Directory holding the Parquet partitions
+            keep_in_memory (bool): Keep loaded partitions in memory (turn off for
+                large intraday partitions that are streamed from disk)
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.keep_in_memory = keep_in_memory
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._frames = {}
+        self._lock = threading.RLock()
+        self._manifest = self._read_manifest()
+
+    # ------------------------------------------------------------------
+    # Paths and manifest
+    # ------------------------------------------------------------------
+
+    def _path(self, ticker):
+        """Parquet file for a ticker (symbols like M&M.NS are made file-safe)"""
+        safe = ''.join(c if c.isalnum() or c in '.-_' else '_' for c in ticker)
+        return os.path.join(self.cache_dir, f"{safe}.parquet")
+
+    def _read_manifest(self):
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        # Other processes share the directory: keep their newer entries
+        for ticker, meta in self._read_manifest().items():
+            ours = self._manifest.get(ticker)
+            if ours is None or meta.get('checked_at', '') > ours.get('checked_at', ''):
+                self._manifest[ticker] = meta
+                self._frames.pop(ticker, None)
+
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def load(self, ticker, columns=None):
+        """
+        Load all stored bars for a ticker
+
+        Args:
+            ticker (str): Yahoo symbol (e.g. 'TCS.NS')
+            columns (list): Fields to read (default: all)
+
+        Returns:
+            pd.DataFrame: Stored bars, or None if the ticker is not cached
+        """
+        with self._lock:
+            if ticker in self._frames:
+                frame = self._frames[ticker]
+                return frame if columns is None else frame[columns]
+
+            path = self._path(ticker)
+            if not os.path.exists(path):
+                return None
+
+            try:
+                frame = pd.read_parquet(path, columns=columns)
+            except Exception:
+                # A corrupt partition is treated as a cache miss
+                return None
+
+            frame.index = pd.to_datetime(frame.index)
+            if self.keep_in_memory and columns is None:
+                self._frames[ticker] = frame
+            return frame
+
+    def get(self, ticker, start=None, end=None, columns=None):
+        """
+        Get stored bars for a ticker within a date range
+
+        Args:
+            ticker (str): Yahoo symbol
+            start (pd.Timestamp): First date (inclusive)
+            end (pd.Timestamp): Last date (inclusive)
+            columns (list): Fields to read (default: all)
+
+        Returns:
+            pd.DataFrame: Bars in range, or None if the ticker is not cached
+        """
+        frame = self.load(ticker, columns)
+        if frame is None:
+            return None
+        return frame.loc[start:end]
+
+    def coverage(self, ticker):
+        """
+        Describe what the store already knows about a ticker
+
+        Args:
+            ticker (str): Yahoo symbol
+
+        Returns:
+            dict: {'first', 'last', 'fields', 'requested_start', 'checked_at'} or None;
+                requested_start is None once the full history has been downloaded
+        """
+        frame = self.load(ticker)
+        if frame is None or frame.empty:
+            return None
+
+        meta = self._manifest.get(ticker, {})
+        requested_start = meta.get('requested_start')
+        checked_at = meta.get('checked_at')
+
+        return {
+            'first': frame.index[0],
+            'last': frame.index[-1],
+            'fields': list(frame.columns),
+            'requested_start': (None if meta.get('full_history')
+                                else pd.Timestamp(requested_start) if requested_start else frame.index[0]),
+            'checked_at': pd.Timestamp(checked_at) if checked_at else None,
+        }
+
+    def tickers(self):
+        """
+        List tickers present in the store
+
+        Returns:
+            list: Yahoo symbols with a stored partition
+        """
+        return sorted(self._manifest.keys())
+
+    def last_updated(self, tickers):
+        """
+        Latest time any of the tickers received new bars
+
+        Args:
+            tickers (list): Yahoo symbols
+
+        Returns:
+            str: ISO timestamp ('' if none of them were ever written)
+        """
+        return max((self._manifest.get(ticker, {}).get('updated_at', '') for ticker in tickers), default='')
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(self, ticker, frame, requested_start=None, full_history=False):
+        """
+        Merge newly downloaded bars into a ticker's partition
+
+        Overlapping dates are replaced by the new values so that a partial
+        bar fetched during market hours is corrected on the next refresh.
+
+        Args:
+            ticker (str): Yahoo symbol
+            frame (pd.DataFrame): New bars indexed by date
+            requested_start (pd.Timestamp): Start date that was asked for
+            full_history (bool): Whether the download asked for the whole history ('max')
+        """
+        with self._lock:
+            existing = self.load(ticker)
+            frame = frame.dropna(how='all')
+            frame.index = pd.to_datetime(frame.index)
+
+            if existing is not None and not existing.empty:
+                merged = pd.concat([existing, frame])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            else:
+                merged = frame.sort_index()
+
+            meta = self._manifest.setdefault(ticker, {})
+            if not merged.empty:
+                merged.to_parquet(self._path(ticker))
+                if self.keep_in_memory:
+                    self._frames[ticker] = merged
+                meta['updated_at'] = pd.Timestamp.now(tz='UTC').isoformat()
+
+            if requested_start is not None:
+                previous = meta.get('requested_start')
+                requested_start = pd.Timestamp(requested_start)
+                if previous is None or requested_start < pd.Timestamp(previous):
+                    meta['requested_start'] = requested_start.isoformat()
+            if full_history:
+                meta['full_history'] = True
+            meta['checked_at'] = pd.Timestamp.now(tz='UTC').isoformat()
+            self._write_manifest()
+
+    def touch(self, ticker):
+        """Record that a ticker was checked even though no new bars arrived"""
+        with self._lock:
+            if ticker in self._manifest:
+                self._manifest[ticker]['checked_at'] = pd.Timestamp.now(tz='UTC').isoformat()
+                self._write_manifest()
+
+    def clear(self, ticker=None):
+        """
+        Remove cached data
+
+        Args:
+            ticker (str): Ticker to remove (default: everything)
+        """
+        with self._lock:
+            targets = [ticker] if ticker else list(self._manifest.keys())
+            for symbol in targets:
+                path = self._path(symbol)
+                if os.path.exists(path):
+                    os.remove(path)
+                self._frames.pop(symbol, None)
+                self._manifest.pop(symbol, None)
+            self._write_manifest()
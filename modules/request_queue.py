@@ -0,0 +1,207 @@
+"""
+REQUEST QUEUE MODULE
+Process-wide fair-share queue in front of the provider rate limit, with per-session quotas and priorities
+"""
+
+import os
+import time
+import threading
+import itertools
+import contextvars
+from collections import deque, defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+# Priority classes (lower is served first)
+INTERACTIVE = 0
+BULK = 1
+
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+
+# Tokens one session may take per minute before other sessions go first
+DEFAULT_SESSION_QUOTA = int(os.environ.get('PRICE_SESSION_QUOTA', 120))
+
+_context = contextvars.ContextVar('price_request_context', default=('default', INTERACTIVE))
+
+
+@contextmanager
+def request_context(session_id, priority=INTERACTIVE):
+    """
+    Tag provider requests made in this block with a session and priority
+
+    Args:
+        session_id (str): Caller identity (e.g. the Streamlit session id)
+        priority (int): INTERACTIVE or BULK
+    """
+    token = _context.set((str(session_id), priority))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context():
+    """
+    Session and priority of the calling thread
+
+    Returns:
+        tuple: (session_id, priority)
+    """
+    return _context.get()
+
+
+class _Ticket:
+    """One waiting request"""
+
+    def __init__(self, seq, session, priority, tokens):
+        self.seq = seq
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+
+
+class RequestQueue:
+    """
+    Fair-share gate in front of a TokenBucket
+
+    Every provider request waits here for its tokens. When tokens free up
+    they go to the waiting request with the best (priority, over quota,
+    recent usage, arrival) key: interactive before bulk, then the session
+    that has used the least of the shared budget in the last minute. A heavy
+    session's chunks are therefore interleaved with everyone else's instead of
+    holding the whole budget until its batch is done.
+    """
+
+    USAGE_WINDOW = 60.0
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, rate_limiter, session_quota=DEFAULT_SESSION_QUOTA, history=1000):
+        """
+        Initialize the request queue
+
+        Args:
+            rate_limiter (TokenBucket): Shared token budget
+            session_quota (int): Tokens per minute a session may take before yielding to others
+            history (int): Number of recent waits kept for wait-time metrics
+        """
+        self.rate_limiter = rate_limiter
+        self.session_quota = session_quota
+
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._usage = {}  # session -> deque of (time, tokens) within USAGE_WINDOW
+        self._waits = {INTERACTIVE: deque(maxlen=history), BULK: deque(maxlen=history)}
+        self._granted = 0  # tokens granted since start
+        self._peak_depth = 0
+
+    def _recent_usage(self, session, now):
+        usage = self._usage.get(session, ())
+        return sum(tokens for granted_at, tokens in usage if now - granted_at <= self.USAGE_WINDOW)
+
+    def _expire(self, now):
+        """Drop grants older than USAGE_WINDOW, and sessions left without any"""
+        for session in list(self._usage):
+            usage = self._usage[session]
+            while usage and now - usage[0][0] > self.USAGE_WINDOW:
+                usage.popleft()
+            if not usage:
+                del self._usage[session]
+
+    def _next(self, now):
+        usage = {}
+        for ticket in self._waiting:
+            if ticket.session not in usage:
+                usage[ticket.session] = self._recent_usage(ticket.session, now)
+
+        def key(ticket):
+            used = usage[ticket.session]
+            return (ticket.priority, used >= self.session_quota, used, ticket.seq)
+
+        return min(self._waiting, key=key)
+
+    def acquire(self, tokens=1, session=None, priority=None, check=None, timeout=None):
+        """
+        Wait for this request's turn and take its tokens
+
+        Args:
+            tokens (int): Tokens needed (one per symbol)
+            session (str): Session id (default: from request_context)
+            priority (int): INTERACTIVE or BULK (default: from request_context)
+            check (callable): Called while waiting; an exception it raises abandons the request
+            timeout (float): Maximum seconds to wait (None waits forever)
+
+        Returns:
+            bool: True if the tokens were taken, False on timeout
+        """
+        default_session, default_priority = current_context()
+        ticket = _Ticket(next(self._seq), session or default_session,
+                         default_priority if priority is None else priority, tokens)
+        deadline = None if timeout is None else ticket.enqueued_at + timeout
+
+        with self._cond:
+            self._waiting.append(ticket)
+            self._peak_depth = max(self._peak_depth, len(self._waiting))
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._next(now) is ticket and self.rate_limiter.acquire(tokens, timeout=0):
+                        self._grant(ticket, now)
+                        return True
+                    if deadline is not None and now >= deadline:
+                        return False
+                    self._cond.wait(self.POLL_INTERVAL)
+                    if check is not None:
+                        check()
+            finally:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def _grant(self, ticket, now):
+        self._waiting.remove(ticket)
+        self._expire(now)
+        self._usage.setdefault(ticket.session, deque()).append((now, ticket.tokens))
+        self._waits[ticket.priority].append(now - ticket.enqueued_at)
+        self._granted += ticket.tokens
+
+    def stats(self):
+        """
+        Queue metrics for monitoring
+
+        Returns:
+            dict: Current depth (total and per priority), peak depth, wait times in
+                seconds per priority (count, mean, p95, max over recent requests),
+                tokens used per session in the last minute and tokens granted in total
+        """
+        with self._cond:
+            now = time.monotonic()
+            depth = defaultdict(int)
+            for ticket in self._waiting:
+                depth[PRIORITY_NAMES[ticket.priority]] += 1
+
+            waits = {}
+            for priority, samples in self._waits.items():
+                samples = np.array(samples) if samples else np.zeros(0)
+                waits[PRIORITY_NAMES[priority]] = {
+                    'count': int(len(samples)),
+                    'mean': float(samples.mean()) if len(samples) else 0.0,
+                    'p95': float(np.percentile(samples, 95)) if len(samples) else 0.0,
+                    'max': float(samples.max()) if len(samples) else 0.0,
+                }
+
+            self._expire(now)
+            sessions = {session: self._recent_usage(session, now) for session in self._usage}
+
+            return {
+                'depth': len(self._waiting),
+                'depth_by_priority': dict(depth),
+                'peak_depth': self._peak_depth,
+                'wait_seconds': waits,
+                'session_usage_last_minute': sessions,
+                'session_quota': self.session_quota,
+                'tokens_granted': self._granted,
+            }
+
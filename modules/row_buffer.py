@@ -0,0 +1,128 @@
+"""
+ROW BUFFER MODULE
+Time series that grow one bar at a time in preallocated arrays, turned into pandas objects only when read
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class RowBuffer:
+    """
+    A DataFrame or Series that new bars are appended to in amortised O(1)
+
+    Rows live in numpy arrays whose capacity doubles when full, so an
+    append writes one row instead of copying the history. The pandas object
+    is built from views of the filled part the first time it is read after
+    an append and reused until the next one.
+    """
+
+    def __init__(self, data):
+        """
+        Initialize the buffer
+
+        Args:
+            data (pd.DataFrame or pd.Series): Initial rows, indexed by date
+        """
+        self._data = data
+        self._values = None
+        self._dates = None
+        self._length = len(data)
+        self.columns = getattr(data, 'columns', None)  # None for a Series
+        self._name = getattr(data, 'name', None)
+        self._index_name = data.index.name
+        self._tz = getattr(data.index, 'tz', None)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def last_date(self):
+        """Date of the last row"""
+        if self._data is not None:
+            return self._data.index[-1]
+        date = pd.Timestamp(self._dates[self._length - 1])
+        return date if self._tz is None else date.tz_localize('UTC').tz_convert(self._tz)
+
+    def last(self):
+        """Values of the last row (a scalar for a Series)"""
+        if self._values is None:
+            return self._data.to_numpy()[-1]
+        return self._values[self._length - 1]
+
+    @property
+    def data(self):
+        """The rows as a pandas object"""
+        if self._data is None:
+            index = pd.DatetimeIndex(self._dates[:self._length], name=self._index_name)
+            if self._tz is not None:
+                index = index.tz_localize('UTC').tz_convert(self._tz)
+            values = self._values[:self._length]
+            if self.columns is None:
+                self._data = pd.Series(values, index=index, name=self._name, copy=False)
+            else:
+                self._data = pd.DataFrame(values, index=index, columns=self.columns, copy=False)
+        return self._data
+
+    def append(self, date, values):
+        """
+        Add one row
+
+        Args:
+            date (pd.Timestamp): Date of the row
+            values: Row values (a scalar for a Series)
+        """
+        if self._values is None:
+            self._allocate()
+        if self._length == len(self._values):
+            self._grow()
+        date = pd.Timestamp(date)
+        if self._tz is not None:
+            date = date.tz_convert('UTC').tz_localize(None)
+        self._dates[self._length] = date.to_datetime64().astype(self._dates.dtype)
+        self._values[self._length] = values
+        self._length += 1
+        self._data = None
+
+    def _allocate(self):
+        data = self._data
+        capacity = max(2 * len(data), 16)
+        values = data.to_numpy()
+        if values.dtype.kind not in 'fiub':
+            values = values.astype(np.float64)
+        dates = data.index.tz_convert(None) if self._tz is not None else data.index
+        dates = np.asarray(dates)
+
+        self._values = np.empty((capacity,) + values.shape[1:], dtype=values.dtype)
+        self._values[:len(values)] = values
+        self._dates = np.empty(capacity, dtype=dates.dtype)
+        self._dates[:len(dates)] = dates
+
+    def _grow(self):
+        capacity = 2 * len(self._values)
+        values = np.empty((capacity,) + self._values.shape[1:], dtype=self._values.dtype)
+        values[:self._length] = self._values[:self._length]
+        dates = np.empty(capacity, dtype=self._dates.dtype)
+        dates[:self._length] = self._dates[:self._length]
+        self._values, self._dates = values, dates
+
+
+class BufferedRows:
+    """
+    Attribute holding a RowBuffer: reads give the pandas object, writes replace it
+
+    The buffer itself is reachable as the attribute name with a leading
+    underscore, for appending.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        buffer = obj.__dict__.get(self.name)
+        return None if buffer is None else buffer.data
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = None if value is None else RowBuffer(value)
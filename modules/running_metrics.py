@@ -0,0 +1,310 @@
+"""
+RUNNING METRICS MODULE
+Exact portfolio metrics maintained bar by bar (online moments, running peak, order-statistic heaps)
+"""
+
+import heapq
+import math
+
+
+class Moments:
+    """Count, mean and central moment sums M2..M4, updated one value at a time (Welford / Pebay)"""
+
+    def __init__(self, higher=False):
+        self.higher = higher
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    def update(self, x):
+        n1 = self.n
+        self.n += 1
+        n = self.n
+        delta = x - self.mean
+        delta_n = delta / n
+        term = delta * delta_n * n1
+        self.mean += delta_n
+        if self.higher:
+            delta_n2 = delta_n * delta_n
+            self.m4 += term * delta_n2 * (n * n - 3 * n + 3) + 6 * delta_n2 * self.m2 - 4 * delta_n * self.m3
+            self.m3 += term * delta_n * (n - 2) - 3 * delta_n * self.m2
+        self.m2 += term
+
+    def merge(self, other):
+        """Absorb another accumulator's values (pairwise combination, Chan / Pebay)"""
+        if other.n == 0:
+            return
+        n_a, n_b = self.n, other.n
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+        if self.higher:
+            self.m4 += (other.m4 + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+                        + 6 * delta_n * delta_n * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+                        + 4 * delta_n * (n_a * other.m3 - n_b * self.m3))
+            self.m3 += (other.m3 + delta * delta_n * delta_n * n_a * n_b * (n_a - n_b)
+                        + 3 * delta_n * (n_a * other.m2 - n_b * self.m2))
+        self.m2 += other.m2 + delta * delta_n * n_a * n_b
+        self.mean += delta_n * n_b
+        self.n = n
+
+    def std(self):
+        """Sample standard deviation (ddof=1, NaN below two values, as pandas)"""
+        if self.n < 2:
+            return float('nan')
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1))
+
+
+class _LowerQuantile:
+    """
+    Linear-interpolated lower quantile with O(log n) updates
+
+    A max-heap holds the smallest floor(index) + 1 values and a min-heap the
+    rest, so the two order statistics numpy.quantile interpolates between
+    are always the two heap tops.
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.lower = []  # max-heap (negated)
+        self.upper = []  # min-heap
+        self.lower_sum = 0.0
+
+    def _index(self, n):
+        # numpy.quantile's default 'linear' index, computed the same way so it rounds identically
+        return (n - 1) * self.q
+
+    def update(self, x):
+        if self.lower and x <= -self.lower[0]:
+            heapq.heappush(self.lower, -x)
+            self.lower_sum += x
+        else:
+            heapq.heappush(self.upper, x)
+
+        target = math.floor(self._index(len(self.lower) + len(self.upper))) + 1
+        while len(self.lower) > target:
+            moved = -heapq.heappop(self.lower)
+            self.lower_sum -= moved
+            heapq.heappush(self.upper, moved)
+        while len(self.lower) < target and self.upper:
+            moved = heapq.heappop(self.upper)
+            self.lower_sum += moved
+            heapq.heappush(self.lower, -moved)
+
+    def value(self):
+        """Current quantile"""
+        n = len(self.lower) + len(self.upper)
+        if n == 0:
+            return float('nan')
+        index = self._index(n)
+        below = -self.lower[0]
+        if not self.upper:
+            return below
+        above = self.upper[0]
+        t = index - math.floor(index)
+        diff = above - below
+        return above - diff * (1 - t) if t >= 0.5 else below + diff * t
+
+    def tail_mean(self):
+        """Mean of the values at or below the current quantile"""
+        var = self.value()
+        if math.isnan(var):
+            return var
+        # Every value in the lower heap is <= var; values in the upper heap can only tie with it
+        ties = []
+        while self.upper and self.upper[0] <= var:
+            ties.append(heapq.heappop(self.upper))
+        for tie in ties:
+            heapq.heappush(self.upper, tie)
+        return (self.lower_sum + sum(ties)) / (len(self.lower) + len(ties))
+
+
+class RunningMetrics:
+    """
+    Portfolio metrics updated in O(log n) per bar
+
+    Mirrors MetricsCalculator: moments, downside deviation, tracking error and
+    beta come from online (Welford) updates, drawdowns from the running
+    peak (Drawdown Duration counts bars below the peak and the episodes
+    they form), and VaR / CVaR from two heaps around the quantile. Results
+    match the full recalculation up to floating-point rounding.
+    """
+
+    def __init__(self, periods_per_year=252, confidence=0.95, has_benchmark=False):
+        """
+        Initialize empty running metrics
+
+        Args:
+            periods_per_year (int): Bars per year for annualisation
+            confidence (float): Confidence level for VaR / CVaR
+            has_benchmark (bool): Whether benchmark returns will be supplied
+        """
+        self.periods_per_year = periods_per_year
+        self.bars_per_day = periods_per_year / 252
+        self.confidence = confidence
+        self.has_benchmark = has_benchmark
+
+        self.returns = Moments(higher=True)
+        self.downside = Moments()
+        self.benchmark = Moments()
+        self.active = Moments()
+        self.co_moment = 0.0
+        self.quantile = _LowerQuantile(1 - confidence)
+
+        self.growth = 1.0
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.drawdown = 0.0
+        self.drawdown_sum = 0.0
+        self.drawdown_bars = 0
+        self.drawdown_squares = 0.0
+        self.episodes = 0
+
+        self.gains = 0.0
+        self.losses = 0.0
+        self.wins = 0
+
+    @classmethod
+    def from_returns(cls, returns, benchmark_returns=None, periods_per_year=252, confidence=0.95):
+        """
+        Seed running metrics from an existing history (one O(n log n) pass)
+
+        Args:
+            returns (pd.Series): Portfolio bar returns
+            benchmark_returns (pd.Series): Benchmark returns on the same index (optional)
+            periods_per_year (int): Bars per year
+            confidence (float): Confidence level for VaR / CVaR
+
+        Returns:
+            RunningMetrics: State after the last bar
+        """
+        running = cls(periods_per_year, confidence, benchmark_returns is not None)
+        bench = benchmark_returns.to_numpy() if benchmark_returns is not None else [None] * len(returns)
+        for value, bench_value in zip(returns.to_numpy(), bench):
+            running.update(float(value), bench_value)
+        return running
+
+    def update(self, value, benchmark_value=None):
+        """
+        Add one bar return
+
+        Args:
+            value (float): Portfolio return of the bar
+            benchmark_value (float): Benchmark return of the bar (0 if missing)
+        """
+        self.returns.update(value)
+        self.quantile.update(value)
+
+        if value < 0:
+            self.downside.update(value)
+            self.losses += value
+        elif value > 0:
+            self.gains += value
+            self.wins += 1
+
+        if self.has_benchmark:
+            bench = 0.0 if benchmark_value is None or math.isnan(benchmark_value) else float(benchmark_value)
+            # Co-moment for the sample covariance, using the benchmark mean before this bar
+            self.co_moment += (bench - self.benchmark.mean) * (value - self.returns.mean)
+            self.benchmark.update(bench)
+            self.active.update(value - bench)
+
+        # Drawdown from the running peak of cumulative return, as PortfolioAnalyzer.get_drawdown
+        self.growth *= 1 + value
+        cumulative = self.growth - 1
+        self.peak = cumulative if self.peak is None else max(self.peak, cumulative)
+        drawdown = (cumulative - self.peak) / (1 + self.peak)
+        if drawdown < 0:
+            if self.drawdown >= 0:
+                self.episodes += 1
+            self.drawdown_sum += drawdown
+            self.drawdown_bars += 1
+        self.drawdown = drawdown
+        self.drawdown_squares += drawdown * drawdown
+        self.max_drawdown = min(self.max_drawdown, drawdown)
+
+    def metrics(self, risk_free_rate=0.065):
+        """
+        Current values of every metric
+
+        Args:
+            risk_free_rate (float): Annual risk-free rate
+
+        Returns:
+            dict: Same keys as MetricsCalculator.calculate_all_metrics
+        """
+        n = self.returns.n
+        ppy = self.periods_per_year
+        std = self.returns.std()
+
+        total_return = self.growth - 1
+        annual_return = self.returns.mean * ppy if n else float('nan')
+        annual_vol = std * math.sqrt(ppy)
+        excess = annual_return - risk_free_rate
+
+        num_years = (n + 1) / ppy
+        cagr = (1 + total_return) ** (1 / num_years) - 1 if n + 1 >= 2 else 0
+
+        max_dd = self.max_drawdown if n else 0
+        if self.downside.n == 0:
+            sortino = 0
+        else:
+            downside_vol = self.downside.std() * math.sqrt(ppy)
+            sortino = 0 if downside_vol == 0 else excess / downside_vol
+
+        # Tracking error against the risk-free rate is the volatility (a constant shift)
+        information = 0 if annual_vol == 0 or annual_vol < 0.0001 else excess / annual_vol
+
+        m2 = self.returns.m2
+        if n and m2 > 0:
+            skew = math.sqrt(n) * self.returns.m3 / m2 ** 1.5
+            kurt = n * self.returns.m4 / (m2 * m2) - 3
+        else:
+            skew = kurt = float('nan')
+
+        if self.has_benchmark:
+            tracking = self.active.std() * math.sqrt(ppy)
+            bench_var = self.benchmark.m2 / n if n else 0
+            beta = 0 if n < 2 or bench_var == 0 else self.co_moment / (n - 1) / bench_var
+        else:
+            tracking = annual_vol
+            beta = 0
+
+        losses = abs(self.losses)
+        if losses == 0:
+            profit_factor = 0 if self.gains == 0 else float('inf')
+        else:
+            profit_factor = self.gains / losses
+        if max_dd == 0:
+            recovery = 0 if total_return == 0 else float('inf')
+        else:
+            recovery = total_return / abs(max_dd)
+
+        return {
+            'CAGR': cagr,
+            'Total Return': total_return,
+            'Annual Return': annual_return,
+            'Monthly Return': annual_return / 12,
+            'Annual Volatility': annual_vol,
+            'Monthly Volatility': std * math.sqrt(ppy / 12),
+            'Daily Volatility': std * math.sqrt(self.bars_per_day),
+            'Sharpe Ratio': 0 if annual_vol == 0 else excess / annual_vol,
+            'Information Ratio': information,
+            'Sortino Ratio': sortino,
+            'Calmar Ratio': 0 if max_dd == 0 else cagr / abs(max_dd),
+            'Max Drawdown': max_dd,
+            'Average Drawdown': self.drawdown_sum / self.drawdown_bars if self.drawdown_bars else 0,
+            'Drawdown Duration': self.drawdown_bars / self.episodes if self.episodes else 0,
+            'Ulcer Index': math.sqrt(self.drawdown_squares / n) if n else float('nan'),
+            'Conditional Value at Risk': self.quantile.tail_mean(),
+            'Value at Risk': self.quantile.value(),
+            'Skewness': skew,
+            'Kurtosis': kurt,
+            'Tracking Error': tracking,
+            'Beta': beta,
+            'Recovery Factor': recovery,
+            'Profit Factor': profit_factor,
+            'Win Rate': self.wins / n if n else 0,
+        }
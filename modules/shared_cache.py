@@ -0,0 +1,221 @@
+"""
+SHARED CACHE MODULE
+Process-wide, thread-safe in-memory cache with single-flight loading and LRU eviction
+"""
+
+import os
+import sys
+import threading
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+
+# Memory budget for cached price data (override with PRICE_MEMORY_BUDGET_MB)
+DEFAULT_MAX_BYTES = int(float(os.environ.get('PRICE_MEMORY_BUDGET_MB', 512)) * 1024 * 1024)
+
+
+def estimate_size(value):
+    """
+    Rough in-memory size of a cached value
+
+    Args:
+        value: DataFrame, Series, ndarray, dict/list/tuple of those, or any object
+
+    Returns:
+        int: Size in bytes
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=False)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + estimate_size(vars(value))
+    return sys.getsizeof(value)
+
+
+class _Flight:
+    """A load in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SharedCache:
+    """
+    Thread-safe LRU cache shared by every Streamlit session in the process
+
+    Concurrent callers asking for the same key while it is being loaded wait
+    for that one load instead of starting their own ("single flight"), so 30
+    users clicking Analyze at once cause a single download.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize the shared cache
+
+        Args:
+            max_bytes (int): Memory budget; least recently used entries are evicted beyond it
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    def get(self, key):
+        """
+        Get a cached value without loading
+
+        Args:
+            key (hashable): Cache key
+
+        Returns:
+            Cached value, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Store a value, evicting least recently used entries to stay within budget
+
+        Args:
+            key (hashable): Cache key
+            value: Value to cache
+        """
+        size = estimate_size(value)
+        with self._lock:
+            self._store(key, value, size)
+
+    def _store(self, key, value, size):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._stats['evictions'] += 1
+
+    def get_or_load(self, key, loader, is_fresh=None):
+        """
+        Get a value, loading it once even if many threads ask at the same time
+
+        Args:
+            key (hashable): Cache key, e.g. (tickers, period, interval)
+            loader (callable): loader(previous) -> value; ``previous`` is the stale
+                cached value (or None) so loaders can refresh incrementally
+            is_fresh (callable): is_fresh(value) -> bool; stale values are reloaded
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            previous = entry[0] if entry is not None else None
+            if entry is not None and (is_fresh is None or is_fresh(previous)):
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return previous
+
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._inflight[key] = flight
+                leader = True
+                self._stats['misses'] += 1
+            else:
+                leader = False
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader(previous)
+            flight.value = value
+            size = estimate_size(value)
+            with self._lock:
+                self._store(key, value, size)
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry (or everything)
+
+        Args:
+            key (hashable): Key to drop (default: all)
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[1]
+
+    def invalidate_matching(self, predicate):
+        """
+        Drop every entry whose key satisfies a predicate
+
+        Args:
+            predicate (callable): predicate(key) -> bool
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        """
+        Cache statistics for monitoring
+
+        Returns:
+            dict: Entries, bytes used, budget, hits, misses, coalesced waits, evictions
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes,
+                        max_bytes=self.max_bytes, inflight=len(self._inflight))
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """
+    Get the process-wide cache, creating it on first use
+
+    Returns:
+        SharedCache: Shared instance
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SharedCache()
+        return _shared_cache
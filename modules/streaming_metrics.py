@@ -0,0 +1,415 @@
+"""
+STREAMING METRICS MODULE
+Constant-memory metric accumulators for bar-by-bar data, mergeable across workers
+"""
+
+import math
+
+import numpy as np
+
+from modules.running_metrics import Moments
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate in constant memory (the P-square algorithm)
+
+    Five markers track the minimum, the q/2, q and (1+q)/2 quantiles and the
+    maximum; each new value shifts the marker positions and moves the inner
+    markers along a piecewise-parabolic fit of the distribution (Jain &
+    Chlamtac, 1985). Until five values have arrived the quantile is exact.
+    """
+
+    def __init__(self, q):
+        """
+        Initialize an empty estimator
+
+        Args:
+            q (float): Quantile to track (0.05 = 5th percentile)
+        """
+        self.q = q
+        self.probabilities = [0.0, q / 2, q, (1 + q) / 2, 1.0]
+        self.n = 0
+        self.heights = []    # Sorted values until there are five, then marker heights
+        self.positions = []  # Marker positions (1-based ranks)
+        self.desired = []    # Where each marker should be
+
+    def _start(self):
+        self.heights.sort()
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1 + 4 * p for p in self.probabilities]
+
+    def update(self, x):
+        """
+        Add one value
+
+        Args:
+            x (float): New value
+        """
+        self.n += 1
+        if self.n <= 5:
+            self.heights.append(x)
+            if self.n == 5:
+                self._start()
+            return
+
+        q, n = self.heights, self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.probabilities[i]
+
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # Piecewise-parabolic prediction, or linear if it would leave the neighbours' range
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def merge(self, other):
+        """
+        Absorb another estimator of the same quantile
+
+        The extreme markers combine exactly (overall minimum and maximum);
+        the inner markers become count-weighted averages of the two
+        estimates, placed at the combined desired ranks. This approximates
+        what one estimator over all values would hold, and stays close when
+        the workers' values come from similar distributions.
+
+        Args:
+            other (P2Quantile): Estimator over other values
+        """
+        if other.n < 5:
+            for x in other.heights:
+                self.update(x)
+            return
+        if self.n < 5:
+            pending = list(self.heights)
+            self.n = other.n
+            self.heights = list(other.heights)
+            self.positions = list(other.positions)
+            self.desired = list(other.desired)
+            for x in pending:
+                self.update(x)
+            return
+
+        n = self.n + other.n
+        inner = [(self.n * a + other.n * b) / n for a, b in zip(self.heights[1:4], other.heights[1:4])]
+        self.desired = [1 + (n - 1) * p for p in self.probabilities]
+
+        positions = [1]
+        for i, target in enumerate(self.desired[1:4], start=1):
+            # Distinct ranks, leaving room for the markers above
+            positions.append(min(max(int(round(target)), positions[-1] + 1), n - 4 + i))
+        positions.append(n)
+
+        self.n = n
+        self.heights = [min(self.heights[0], other.heights[0]), *inner, max(self.heights[4], other.heights[4])]
+        self.positions = positions
+
+    def value(self):
+        """Current estimate of the quantile (NaN before any value)"""
+        if self.n == 0:
+            return float('nan')
+        if self.n < 5:
+            return float(np.percentile(self.heights, self.q * 100))
+        return self.heights[2]
+
+
+class DrawdownTracker:
+    """
+    Running peak, current drawdown and maximum drawdown of a return stream
+
+    Follows PortfolioAnalyzer.get_drawdown (the peak starts at the first
+    bar). Two trackers over consecutive stretches of bars merge exactly: the
+    later stretch's drawdowns against the earlier peak only need its lowest
+    cumulative return.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.growth = 1.0
+        self.peak = None     # Highest cumulative return so far
+        self.trough = None   # Lowest cumulative return so far
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+
+    def update(self, value):
+        """
+        Add one bar return
+
+        Args:
+            value (float): Return of the bar
+        """
+        self.n += 1
+        self.growth *= 1 + value
+        cumulative = self.growth - 1
+        self.peak = cumulative if self.peak is None else max(self.peak, cumulative)
+        self.trough = cumulative if self.trough is None else min(self.trough, cumulative)
+        self.drawdown = (cumulative - self.peak) / (1 + self.peak)
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+
+    def merge(self, other):
+        """
+        Append the bars another tracker has seen after this one's
+
+        Args:
+            other (DrawdownTracker): Tracker over the bars that follow
+        """
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return
+
+        growth = self.growth
+        peak = 1 + self.peak
+        # The later bars' worst point measured from this stretch's peak
+        crossing = growth * (1 + other.trough) / peak - 1
+
+        self.n += other.n
+        self.growth = growth * other.growth
+        self.peak = max(peak, growth * (1 + other.peak)) - 1
+        self.trough = min(self.trough, growth * (1 + other.trough) - 1)
+        self.drawdown = (self.growth - 1 - self.peak) / (1 + self.peak)
+        self.max_drawdown = min(self.max_drawdown, other.max_drawdown, crossing)
+
+
+class StreamingMetrics:
+    """
+    Portfolio metrics over a stream of bar returns in O(1) memory
+
+    Mirrors MetricsCalculator's calculate_* methods for the metrics that can
+    be kept without the history: return and volatility ratios from online
+    moments (exact up to floating-point rounding), drawdowns from a running
+    peak (exact), win rate and profit factor from running sums (exact), and
+    VaR / CVaR from a P-square quantile estimate (approximate). CVaR is the
+    VaR plus the average shortfall below the estimate each bar saw
+    (Rockafellar-Uryasev).
+
+    Left out on purpose: Average Drawdown, Drawdown Duration and Ulcer Index
+    depend on every bar's drawdown from the final peaks, which two merged
+    halves cannot reconstruct exactly; Tracking Error and Beta need a
+    benchmark return alongside each bar.
+
+    Accumulators built by separate workers combine with merge(); for the
+    drawdowns the merged-in accumulator must hold the later bars.
+    """
+
+    def __init__(self, periods_per_year=252, confidence=0.95):
+        """
+        Initialize empty accumulators
+
+        Args:
+            periods_per_year (int): Bars per year for annualisation
+            confidence (float): Confidence level for VaR / CVaR
+        """
+        self.periods_per_year = periods_per_year
+        self.bars_per_day = periods_per_year / 252
+        self.confidence = confidence
+
+        self.returns = Moments(higher=True)
+        self.downside = Moments()
+        self.drawdowns = DrawdownTracker()
+        self.quantile = P2Quantile(1 - confidence)
+        self.shortfall = 0.0
+
+        self.gains = 0.0
+        self.losses = 0.0
+        self.wins = 0
+
+    def update(self, value):
+        """
+        Add one bar return
+
+        Args:
+            value (float): Portfolio return of the bar
+        """
+        self.returns.update(value)
+        self.drawdowns.update(value)
+        self.quantile.update(value)
+        self.shortfall += min(value - self.quantile.value(), 0.0)
+
+        if value < 0:
+            self.downside.update(value)
+            self.losses += value
+        elif value > 0:
+            self.gains += value
+            self.wins += 1
+
+    def update_many(self, values):
+        """
+        Add several bar returns in order
+
+        Args:
+            values (iterable): Bar returns
+        """
+        for value in values:
+            self.update(float(value))
+
+    def merge(self, other):
+        """
+        Absorb another accumulator (built over the bars that follow this one's)
+
+        Args:
+            other (StreamingMetrics): Accumulator with the same settings
+        """
+        if other.periods_per_year != self.periods_per_year or other.confidence != self.confidence:
+            raise Exception("Cannot merge streaming metrics with different intervals or confidence levels")
+
+        self.returns.merge(other.returns)
+        self.downside.merge(other.downside)
+        self.drawdowns.merge(other.drawdowns)
+        self.quantile.merge(other.quantile)
+        self.shortfall += other.shortfall
+        self.gains += other.gains
+        self.losses += other.losses
+        self.wins += other.wins
+
+    def calculate_total_return(self):
+        """Calculate total return from start to end"""
+        return self.drawdowns.growth - 1
+
+    def calculate_cagr(self):
+        """Calculate Compound Annual Growth Rate"""
+        if self.returns.n + 1 < 2:
+            return 0
+        num_years = (self.returns.n + 1) / self.periods_per_year
+        return (1 + self.calculate_total_return()) ** (1 / num_years) - 1
+
+    def calculate_annual_return(self):
+        """Calculate annualized return"""
+        return self.returns.mean * self.periods_per_year if self.returns.n else float('nan')
+
+    def calculate_annual_volatility(self):
+        """Calculate annualized volatility"""
+        return self.returns.std() * math.sqrt(self.periods_per_year)
+
+    def calculate_sharpe_ratio(self, risk_free_rate=0.065):
+        """Calculate Sharpe Ratio"""
+        volatility = self.calculate_annual_volatility()
+        if volatility == 0:
+            return 0
+        return (self.calculate_annual_return() - risk_free_rate) / volatility
+
+    def calculate_information_ratio(self, risk_free_rate=0.065):
+        """Calculate Information Ratio"""
+        # Tracking error against the risk-free rate is the volatility (a constant shift)
+        volatility = self.calculate_annual_volatility()
+        if volatility == 0 or volatility < 0.0001:
+            return 0
+        return (self.calculate_annual_return() - risk_free_rate) / volatility
+
+    def calculate_sortino_ratio(self, risk_free_rate=0.065):
+        """Calculate Sortino Ratio"""
+        if self.downside.n == 0:
+            return 0
+        downside_volatility = self.downside.std() * math.sqrt(self.periods_per_year)
+        if downside_volatility == 0:
+            return 0
+        return (self.calculate_annual_return() - risk_free_rate) / downside_volatility
+
+    def calculate_calmar_ratio(self):
+        """Calculate Calmar Ratio"""
+        max_dd = self.calculate_max_drawdown()
+        if max_dd == 0:
+            return 0
+        return self.calculate_cagr() / abs(max_dd)
+
+    def calculate_max_drawdown(self):
+        """Calculate Maximum Drawdown"""
+        return self.drawdowns.max_drawdown
+
+    def calculate_var(self):
+        """Estimate Value at Risk (VaR) at the accumulator's confidence level"""
+        return self.quantile.value()
+
+    def calculate_cvar(self):
+        """Estimate Conditional Value at Risk (CVaR) at the accumulator's confidence level"""
+        if self.returns.n == 0:
+            return float('nan')
+        return self.calculate_var() + self.shortfall / ((1 - self.confidence) * self.returns.n)
+
+    def calculate_skewness(self):
+        """Calculate Skewness of returns"""
+        m2 = self.returns.m2
+        if self.returns.n == 0 or m2 <= 0:
+            return float('nan')
+        return math.sqrt(self.returns.n) * self.returns.m3 / m2 ** 1.5
+
+    def calculate_kurtosis(self):
+        """Calculate (excess) Kurtosis of returns"""
+        m2 = self.returns.m2
+        if self.returns.n == 0 or m2 <= 0:
+            return float('nan')
+        return self.returns.n * self.returns.m4 / (m2 * m2) - 3
+
+    def calculate_recovery_factor(self):
+        """Calculate Recovery Factor"""
+        total_profit = self.calculate_total_return()
+        max_dd = abs(self.calculate_max_drawdown())
+        if max_dd == 0:
+            return 0 if total_profit == 0 else float('inf')
+        return total_profit / max_dd
+
+    def calculate_profit_factor(self):
+        """Calculate Profit Factor"""
+        losses = abs(self.losses)
+        if losses == 0:
+            return 0 if self.gains == 0 else float('inf')
+        return self.gains / losses
+
+    def calculate_win_rate(self):
+        """Calculate Win Rate"""
+        return self.wins / self.returns.n if self.returns.n > 0 else 0
+
+    def metrics(self, risk_free_rate=0.065):
+        """
+        Current values of every streaming metric
+
+        Args:
+            risk_free_rate (float): Annual risk-free rate
+
+        Returns:
+            dict: Metrics under the same keys as MetricsCalculator.calculate_all_metrics
+        """
+        std = self.returns.std()
+        annual_return = self.calculate_annual_return()
+        return {
+            'CAGR': self.calculate_cagr(),
+            'Total Return': self.calculate_total_return(),
+            'Annual Return': annual_return,
+            'Monthly Return': annual_return / 12,
+            'Annual Volatility': self.calculate_annual_volatility(),
+            'Monthly Volatility': std * math.sqrt(self.periods_per_year / 12),
+            'Daily Volatility': std * math.sqrt(self.bars_per_day),
+            'Sharpe Ratio': self.calculate_sharpe_ratio(risk_free_rate),
+            'Information Ratio': self.calculate_information_ratio(risk_free_rate),
+            'Sortino Ratio': self.calculate_sortino_ratio(risk_free_rate),
+            'Calmar Ratio': self.calculate_calmar_ratio(),
+            'Max Drawdown': self.calculate_max_drawdown(),
+            'Conditional Value at Risk': self.calculate_cvar(),
+            'Value at Risk': self.calculate_var(),
+            'Skewness': self.calculate_skewness(),
+            'Kurtosis': self.calculate_kurtosis(),
+            'Recovery Factor': self.calculate_recovery_factor(),
+            'Profit Factor': self.calculate_profit_factor(),
+            'Win Rate': self.calculate_win_rate(),
+        }
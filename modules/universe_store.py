@@ -0,0 +1,167 @@
+"""
+UNIVERSE STORE MODULE
+Compact memory-mapped OHLCV arrays for a whole ticker universe on one shared date axis
+"""
+
+import os
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+
+# Price fields kept as float32; Volume is kept separately as int64
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Adj Close']
+
+
+class UniverseView:
+    """
+    Read-only, memory-mapped view of one universe snapshot
+
+    Arrays are opened with ``mmap_mode='r'`` so every process on the host
+    shares the same physical pages through the OS page cache instead of
+    holding its own pandas copy.
+
+    Attributes:
+        symbols (list): Column order of the arrays
+        index (pd.DatetimeIndex): Shared date axis
+        prices (np.memmap): float32 array of shape (fields, dates, symbols)
+        volume (np.memmap): int64 array of shape (dates, symbols)
+        meta (dict): Snapshot metadata
+    """
+
+    def __init__(self, path):
+        """
+        Open a snapshot directory
+
+        Args:
+            path (str): Snapshot directory written by UniverseStore.write
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        self.symbols = self.meta['symbols']
+        self.index = pd.DatetimeIndex(np.load(os.path.join(path, 'dates.npy')).astype('datetime64[ns]'))
+        self.prices = np.load(os.path.join(path, 'prices.npy'), mmap_mode='r')
+        self.volume = np.load(os.path.join(path, 'volume.npy'), mmap_mode='r')
+
+    def field(self, field='Close', columns=None):
+        """
+        One OHLCV field as a DataFrame backed directly by the memory map
+
+        Args:
+            field (str): 'Open', 'High', 'Low', 'Close', 'Adj Close' or 'Volume'
+            columns (list): Column labels to use (default: symbols)
+
+        Returns:
+            pd.DataFrame: Dates x symbols (read-only, no copy)
+        """
+        if field == 'Volume':
+            values = self.volume
+        else:
+            values = self.prices[PRICE_FIELDS.index(field)]
+        return pd.DataFrame(values, index=self.index, columns=columns or self.symbols, copy=False)
+
+    @property
+    def nbytes(self):
+        """Size of the mapped arrays in bytes"""
+        return int(self.prices.nbytes + self.volume.nbytes)
+
+
+class UniverseStore:
+    """
+    Versioned on-disk universe snapshots
+
+    Each write goes to a new version directory and a ``CURRENT`` pointer file
+    is swapped atomically, so readers in other processes never see a half
+    written snapshot and can keep using an older one while it is replaced.
+    """
+
+    POINTER = 'CURRENT'
+    KEEP_VERSIONS = 2
+
+    def __init__(self, root):
+        """
+        Initialize the universe store
+
+        Args:
+            root (str): Directory holding the snapshot versions
+        """
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def open(self):
+        """
+        Open the current snapshot
+
+        Returns:
+            UniverseView: Memory-mapped view, or None if nothing was written yet
+        """
+        pointer = os.path.join(self.root, self.POINTER)
+        if not os.path.exists(pointer):
+            return None
+        try:
+            with open(pointer, 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+            return UniverseView(os.path.join(self.root, version))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write(self, frames, symbols, meta=None):
+        """
+        Write a new snapshot from per-symbol OHLCV frames
+
+        Args:
+            frames (dict): {symbol: DataFrame with PRICE_FIELDS and Volume columns}
+            symbols (list): Column order (symbols without a frame become NaN columns)
+            meta (dict): Extra metadata stored with the snapshot
+
+        Returns:
+            UniverseView: View of the new snapshot
+        """
+        dates = pd.DatetimeIndex([])
+        for frame in frames.values():
+            if frame is not None and not frame.empty:
+                dates = dates.union(frame.index)
+        dates = pd.DatetimeIndex(dates).sort_values()
+
+        prices = np.full((len(PRICE_FIELDS), len(dates), len(symbols)), np.nan, dtype=np.float32)
+        volume = np.zeros((len(dates), len(symbols)), dtype=np.int64)
+
+        for j, symbol in enumerate(symbols):
+            frame = frames.get(symbol)
+            if frame is None or frame.empty:
+                continue
+            frame = frame.reindex(dates)
+            for k, field in enumerate(PRICE_FIELDS):
+                if field in frame.columns:
+                    prices[k, :, j] = frame[field].to_numpy(dtype=np.float32, na_value=np.nan)
+            if 'Volume' in frame.columns:
+                volume[:, j] = frame['Volume'].fillna(0).to_numpy(dtype=np.int64)
+
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        path = os.path.join(self.root, version)
+        os.makedirs(path)
+        np.save(os.path.join(path, 'dates.npy'), dates.values.astype('datetime64[ns]').astype(np.int64))
+        np.save(os.path.join(path, 'prices.npy'), prices)
+        np.save(os.path.join(path, 'volume.npy'), volume)
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(dict(meta or {}, symbols=list(symbols)), f)
+
+        pointer = os.path.join(self.root, self.POINTER)
+        tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_pointer, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_pointer, pointer)
+
+        self._cleanup(version)
+        return UniverseView(path)
+
+    def _cleanup(self, current):
+        versions = sorted(name for name in os.listdir(self.root)
+                          if name.startswith('v') and os.path.isdir(os.path.join(self.root, name)))
+        stale = [name for name in versions if name != current][:-(self.KEEP_VERSIONS - 1) or None]
+        for name in stale:
+            # Processes still mapping an old snapshot keep their pages until they reopen
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
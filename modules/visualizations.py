@@ -266,7 +266,8 @@ class PortfolioVisualizer:
     def plot_rolling_volatility(self, window=30):
         """Plot rolling volatility"""
         daily_returns = self.analyzer.get_daily_returns()
-        rolling_vol = daily_returns.rolling(window).std() * np.sqrt(252) * 100
+        periods_per_year = getattr(self.analyzer, 'periods_per_year', 252)
+        rolling_vol = daily_returns.rolling(window).std() * np.sqrt(periods_per_year) * 100
         
         fig = go.Figure()
         
@@ -404,3 +405,158 @@ class PortfolioVisualizer:
         )
         
         return fig
+    
+    def plot_monte_carlo_fan(self, simulation, chart_id="monte_carlo_fan"):
+        """Plot simulated portfolio value percentiles (fan chart)"""
+        fan = simulation.fan
+        columns = list(fan.columns)
+        
+        fig = go.Figure()
+        
+        # Shade between symmetric percentile pairs, outermost (lightest) first
+        for i in range(len(columns) // 2):
+            lower, upper = columns[i], columns[-(i + 1)]
+            opacity = 0.15 + 0.15 * i
+            fig.add_trace(go.Scatter(
+                x=fan.index,
+                y=fan[upper],
+                mode='lines',
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo='skip',
+                uid=f'{chart_id}_upper_{i}'
+            ))
+            fig.add_trace(go.Scatter(
+                x=fan.index,
+                y=fan[lower],
+                mode='lines',
+                name=f"{lower[1:]}th-{upper[1:]}th percentile",
+                line=dict(width=0),
+                fill='tonexty',
+                fillcolor=f'rgba(0, 51, 102, {opacity:.2f})',
+                uid=f'{chart_id}_lower_{i}'
+            ))
+        
+        if len(columns) % 2:
+            middle = columns[len(columns) // 2]
+            fig.add_trace(go.Scatter(
+                x=fan.index,
+                y=fan[middle],
+                mode='lines',
+                name='Median' if middle == 'P50' else middle,
+                line=dict(color='#003366', width=3),
+                uid=f'{chart_id}_median'
+            ))
+        
+        fig.update_layout(
+            title=f"Monte Carlo Projection ({simulation.n_paths:,} paths, {simulation.method})",
+            xaxis_title="Bars Ahead",
+            yaxis_title="Portfolio Value (₹)",
+            hovermode='x unified',
+            template='plotly_white',
+            height=500,
+            font=dict(family="Times New Roman"),
+            plot_bgcolor='rgba(173, 216, 230, 0.1)',
+            uirevision=chart_id
+        )
+        
+        return fig
+    
+    def plot_monte_carlo_distribution(self, simulation, chart_id="monte_carlo_distribution"):
+        """Plot distributions of simulated terminal value and maximum drawdown"""
+        summary = simulation.summary()
+        
+        fig = make_subplots(
+            rows=1, cols=2,
+            subplot_titles=("Terminal Value", "Maximum Drawdown")
+        )
+        
+        fig.add_trace(go.Histogram(
+            x=simulation.terminal_values,
+            nbinsx=60,
+            name='Terminal Value',
+            marker=dict(color='#003366', line=dict(color='white', width=1)),
+            uid=f'{chart_id}_terminal'
+        ), row=1, col=1)
+        
+        fig.add_trace(go.Histogram(
+            x=simulation.max_drawdowns * 100,
+            nbinsx=60,
+            name='Max Drawdown (%)',
+            marker=dict(color='#FF6B6B', line=dict(color='white', width=1)),
+            uid=f'{chart_id}_drawdown'
+        ), row=1, col=2)
+        
+        fig.add_vline(
+            x=simulation.initial_investment,
+            line_dash="dash",
+            line_color="#FFD700",
+            annotation_text=f"Loss probability: {summary['Probability of Loss']*100:.1f}%",
+            row=1, col=1
+        )
+        fig.add_vline(
+            x=summary['Median Max Drawdown'] * 100,
+            line_dash="dash",
+            line_color="#FFD700",
+            annotation_text=f"Median: {summary['Median Max Drawdown']*100:.1f}%",
+            row=1, col=2
+        )
+        
+        fig.update_layout(
+            title="Simulated Outcome Distributions",
+            showlegend=False,
+            template='plotly_white',
+            height=500,
+            font=dict(family="Times New Roman")
+        )
+        
+        return fig
+    
+    def plot_efficient_frontier(self, frontier, chart_id="efficient_frontier"):
+        """Plot the efficient frontier with this portfolio and the maximum-Sharpe point marked"""
+        fig = go.Figure()
+        
+        fig.add_trace(go.Scatter(
+            x=frontier['Volatility'] * 100,
+            y=frontier['Expected Return'] * 100,
+            mode='lines+markers',
+            name='Efficient Frontier',
+            line=dict(color='#003366', width=3),
+            marker=dict(size=5),
+            customdata=frontier['Sharpe Ratio'],
+            hovertemplate='Volatility: %{x:.2f}%<br>Return: %{y:.2f}%<br>Sharpe: %{customdata:.3f}<extra></extra>',
+            uid=f'{chart_id}_frontier'
+        ))
+        
+        best = frontier.loc[frontier['Sharpe Ratio'].idxmax()]
+        fig.add_trace(go.Scatter(
+            x=[best['Volatility'] * 100],
+            y=[best['Expected Return'] * 100],
+            mode='markers',
+            name=f"Max Sharpe ({best['Sharpe Ratio']:.2f})",
+            marker=dict(color='#2ecc71', size=14, symbol='star'),
+            uid=f'{chart_id}_max_sharpe'
+        ))
+        
+        if 'Annual Volatility' in self.metrics and 'Annual Return' in self.metrics:
+            fig.add_trace(go.Scatter(
+                x=[self.metrics['Annual Volatility'] * 100],
+                y=[self.metrics['Annual Return'] * 100],
+                mode='markers',
+                name='This Portfolio',
+                marker=dict(color='#FFD700', size=14, line=dict(color='#003366', width=2)),
+                uid=f'{chart_id}_current'
+            ))
+        
+        fig.update_layout(
+            title="Efficient Frontier",
+            xaxis_title="Annual Volatility (%)",
+            yaxis_title="Expected Annual Return (%)",
+            template='plotly_white',
+            height=500,
+            font=dict(family="Times New Roman"),
+            plot_bgcolor='rgba(173, 216, 230, 0.1)',
+            uirevision=chart_id
+        )
+        
+        return fig